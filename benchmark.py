@@ -0,0 +1,463 @@
+"""
+Banc d'essai hors ligne du bot : appelle directement les callbacks des commandes
+(/fiche, /listejeux, /type, /proposejeu, /ajoutjeux, autocomplétions...) avec de fausses
+interactions Discord, contre une base PostgreSQL locale remplie de catalogues synthétiques.
+
+    python benchmark.py --database postgresql://localhost/botbench
+    python benchmark.py --sizes 100,10000 --iterations 300 --concurrency 8 --output resultats.json
+    python benchmark.py --baseline resultats.json --tolerance 0.25   # code 1 si régression
+    python benchmark.py --explain --sizes 10000                      # code 1 si un Seq Scan subsiste
+    python benchmark.py --audio 20 --streams 8                       # CPU de la chaîne audio de /ecoute
+
+⚠️ La base indiquée est VIDÉE avant chaque taille de catalogue : ne jamais viser la base du bot.
+"""
+import argparse
+import asyncio
+import datetime
+import itertools
+import json
+import os
+import random
+import sys
+import time
+
+TYPES = [
+    "fps", "aventure", "rpg", "action", "2d", "chill", "histoire", "horreur", "course",
+    "stratégie", "puzzle", "plateforme", "coop", "simulation", "survie", "roguelike",
+]
+WORDS = [
+    "dark", "star", "legend", "city", "dragon", "shadow", "space", "rogue", "planet", "quest",
+    "night", "iron", "hollow", "wild", "last", "neon", "lost", "crystal", "storm", "ghost",
+]
+
+
+############################################
+#         FAUSSES INTERACTIONS DISCORD
+############################################
+
+class StubResponse:
+    def __init__(self, interaction):
+        self.interaction = interaction
+        self.done = False
+
+    async def send_message(self, content=None, **kwargs):
+        self.done = True
+        self.interaction.sent.append(content)
+
+    async def defer(self, **kwargs):
+        self.done = True
+
+    async def edit_message(self, **kwargs):
+        self.done = True
+
+    async def autocomplete(self, choices):
+        self.done = True
+
+    def is_done(self):
+        return self.done
+
+
+class StubFollowup:
+    def __init__(self, interaction):
+        self.interaction = interaction
+
+    async def send(self, content=None, **kwargs):
+        self.interaction.sent.append(content)
+
+
+class StubChannel:
+    def __init__(self, channel_id, name, topic=None):
+        self.id = channel_id
+        self.name = name
+        self.topic = topic
+        self.mention = f"#{name}"
+        self.messages = 0
+
+    async def send(self, content=None, **kwargs):
+        self.messages += 1
+
+
+class StubPermissions:
+    administrator = True
+
+
+class StubUser:
+    def __init__(self, user_id):
+        self.id = user_id
+        self.name = f"joueur{user_id}"
+        self.display_name = self.name
+        self.mention = f"<@{user_id}>"
+        self.guild_permissions = StubPermissions()
+
+
+class StubGuild:
+    def __init__(self):
+        self.id = 1
+        self.text_channels = [StubChannel(10, "général"), StubChannel(11, "mrbalooum")]
+        self.roles = []
+
+    def get_channel(self, channel_id):
+        return next((c for c in self.text_channels if c.id == channel_id), None)
+
+    def get_member(self, user_id):
+        return StubUser(user_id)
+
+
+class StubInteraction:
+    """Le strict nécessaire de discord.Interaction utilisé par les commandes du bot."""
+
+    def __init__(self, guild, user_id):
+        self.guild = guild
+        self.guild_id = guild.id
+        self.user = StubUser(user_id)
+        self.channel = guild.text_channels[0]
+        self.created_at = datetime.datetime.now(datetime.timezone.utc)
+        self.data = {}
+        self.command_failed = False
+        self.sent = []
+        self.response = StubResponse(self)
+        self.followup = StubFollowup(self)
+
+
+############################################
+#         CATALOGUES SYNTHÉTIQUES
+############################################
+
+def synthetic_games(count, rng):
+    """Lignes (nom, ..., commentaire, price_value, duration_hours) et tags de `count` jeux."""
+    games = []
+    for i in range(count):
+        name = f"{rng.choice(WORDS)} {rng.choice(WORDS)} {i}"
+        tags = rng.sample(TYPES, rng.randint(1, 3))
+        price = round(rng.uniform(0, 70), 2)
+        hours = rng.randint(2, 80)
+        games.append((
+            (name, f"{rng.randint(1, 28)} mai {rng.randint(2000, 2025)}", f"{price} €", ", ".join(tags),
+             f"{hours}h", rng.choice(["Oui", "Non"]), "https://youtu.be/x", "https://store.steampowered.com/x",
+             "Aucun", price, hours),
+            tags,
+        ))
+    return games
+
+
+def seed(bot, size, users, favorites, rng):
+    """Vide les tables du bot puis les remplit avec un catalogue de `size` jeux."""
+    import psycopg2.extras
+
+    games = synthetic_games(size, rng)
+    with bot.db_cursor() as cur:
+        cur.execute(
+            "TRUNCATE games, game_types, user_favorites, pepite_games, game_requests, game_problems, "
+            "user_channels RESTART IDENTITY CASCADE"
+        )
+        ids = psycopg2.extras.execute_values(cur, '''
+            INSERT INTO games (nom, release_date, price, type, duration, cloud_available, youtube_link,
+                               steam_link, commentaire, price_value, duration_hours)
+            VALUES %s RETURNING id
+        ''', [row for row, _ in games], page_size=1000, fetch=True)
+        psycopg2.extras.execute_values(
+            cur, "INSERT INTO game_types (game_id, tag) VALUES %s",
+            [(game_id, tag) for (game_id,), (_, tags) in zip(ids, games) for tag in tags], page_size=5000
+        )
+        names = [row[0] for row, _ in games]
+        game_ids = [game_id for (game_id,) in ids]
+        psycopg2.extras.execute_values(
+            cur, "INSERT INTO pepite_games (game_name) VALUES %s",
+            [(name,) for name in rng.sample(names, max(1, size // 100))]
+        )
+        favorites_rows = {
+            (1000 + user, game_id)
+            for user in range(users)
+            for game_id in rng.sample(game_ids, min(favorites, size))
+        }
+        psycopg2.extras.execute_values(
+            cur, "INSERT INTO user_favorites (user_id, game_id) VALUES %s", list(favorites_rows), page_size=5000
+        )
+        cur.execute("ANALYZE")
+    return names
+
+
+############################################
+#         SCÉNARIOS
+############################################
+
+def scenarios(bot, names, rng, users):
+    """Nom du scénario -> fabrique de coroutine (appelée avec une fausse interaction)."""
+    import recommender
+
+    new_names = (f"nouveau jeu {n}" for n in itertools.count())
+
+    def prefix():
+        name = rng.choice(names)
+        return name[:rng.randint(1, 6)]
+
+    def favorite_user(interaction):
+        interaction.user = StubUser(1000 + rng.randrange(users))
+        return interaction
+
+    def batch(count=25):
+        return " ".join(
+            f'"{next(new_names)}" "1 mai 2024" "{rng.randint(5, 60)},99 €" "{rng.choice(TYPES)}, {rng.choice(TYPES)}" '
+            f'"{rng.randint(2, 40)}h" "Non" "https://youtu.be/x" "https://store.steampowered.com/x"'
+            for _ in range(count)
+        )
+
+    async def fav_unfav(i):
+        favorite_user(i)
+        name = rng.choice(names)
+        await bot.fav.callback(i, name)
+        await bot.unfav.callback(i, name)
+
+    return {
+        "fiche": lambda i: bot.fiche.callback(i, rng.choice(names)),
+        "fiche introuvable": lambda i: bot.fiche.callback(i, rng.choice(names)[:-1] + "q"),
+        "fiche_autocomplete": lambda i: bot.fiche_autocomplete(i, prefix()),
+        "recherche": lambda i: bot.recherche.callback(i, rng.choice(TYPES)),
+        "recherche nom": lambda i: bot.recherche.callback(i, rng.choice(names)[:-1] + "q"),
+        "fav_autocomplete": lambda i: bot.fav_autocomplete(favorite_user(i), prefix()),
+        "type_autocomplete": lambda i: bot.type_autocomplete(i, f"{rng.choice(TYPES)}, {rng.choice(TYPES)[:2]}"),
+        "unfav_autocomplete": lambda i: bot.unfav_autocomplete(favorite_user(i), ""),
+        "favoris": lambda i: bot.favoris.callback(favorite_user(i)),
+        "fav+unfav": fav_unfav,
+        "listejeux": lambda i: bot.listejeux.callback(i),
+        "listejeux par_type": lambda i: bot.listejeux.callback(i, True),
+        "type": lambda i: bot.type_command.callback(i, rng.choice(TYPES)),
+        "type et": lambda i: bot.type_command.callback(i, f"{rng.choice(TYPES)}, {rng.choice(TYPES)}", "et"),
+        "type ou": lambda i: bot.type_command.callback(i, f"{rng.choice(TYPES)}, {rng.choice(TYPES)}", "ou"),
+        "style": lambda i: bot.style.callback(i),
+        "dernier": lambda i: bot.dernier.callback(i),
+        "proposejeu": lambda i: bot.proposejeu.callback(i),
+        "proposejeu sans_favoris": lambda i: bot.proposejeu.callback(favorite_user(i), True),
+        "proposejeutype": lambda i: bot.proposejeutype.callback(i, rng.choice(TYPES)),
+        "recommande": lambda i: recommender.recommande.callback(favorite_user(i)),
+        "ajoutjeux x25": lambda i: bot.ajoutjeux.callback(i, batch()),
+    }
+
+
+def percentile(ordered, p):
+    return ordered[min(len(ordered) - 1, int(p * len(ordered)))]
+
+
+async def run_scenario(factory, guild, iterations, concurrency, warmup):
+    for _ in range(warmup):
+        await factory(StubInteraction(guild, 42))
+
+    latencies = []
+    remaining = itertools.count()
+
+    async def worker():
+        while next(remaining) < iterations:
+            interaction = StubInteraction(guild, 42)
+            start = time.perf_counter()
+            await factory(interaction)
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    wall = time.perf_counter() - start
+    latencies.sort()
+    return {
+        "iterations": len(latencies),
+        "ops_per_s": len(latencies) / wall if wall else 0.0,
+        "p50_ms": percentile(latencies, 0.50) * 1000,
+        "p95_ms": percentile(latencies, 0.95) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+        "max_ms": latencies[-1] * 1000,
+    }
+
+
+############################################
+#         PLANS D'EXÉCUTION
+############################################
+
+# Requêtes filtrantes des commandes : chacune doit pouvoir passer par un index
+EXPLAIN_QUERIES = {
+    "supprjeu": ("DELETE FROM games WHERE LOWER(nom) = %s RETURNING id", ("dark star 1",)),
+    "unfav": ("DELETE FROM user_favorites WHERE user_id = %s AND game_id = %s", (1000, 1)),
+    "favoris (cache)": ("SELECT game_id FROM user_favorites WHERE user_id = %s", (1000,)),
+    "supprdemande (problèmes)": ("SELECT user_id, game FROM game_problems WHERE LOWER(game) = %s", ("dark star 1",)),
+    "supprdemande (demandes)": (
+        "DELETE FROM game_requests WHERE LOWER(game_name) = %s RETURNING game_name", ("dark star 1",)
+    ),
+    "ask": ("SELECT * FROM game_requests WHERE LOWER(game_name) = %s", ("dark star 1",)),
+    "dernier": ("SELECT nom, date_ajout FROM games ORDER BY date_ajout DESC LIMIT 10", ()),
+    "recherche": (
+        "SELECT id FROM games g, websearch_to_tsquery('french', %s) AS q(tsq) WHERE g.search_vector @@ q.tsq",
+        ("aventure",)
+    ),
+}
+
+
+def explain_queries(bot):
+    """EXPLAIN de chaque requête, parcours séquentiels désactivés : un Seq Scan = index manquant."""
+    failures = []
+    with bot.db_cursor() as cur:
+        cur.execute("SET LOCAL enable_seqscan = off")
+        for label, (query, params) in EXPLAIN_QUERIES.items():
+            cur.execute("EXPLAIN " + query, params)
+            plan = [row[0] for row in cur.fetchall()]
+            ok = not any("Seq Scan" in line for line in plan)
+            print(f"{'✅' if ok else '❌'} {label:<26}{plan[0].strip()}")
+            if not ok:
+                failures.append(label)
+                print("    " + "\n    ".join(plan))
+    return failures
+
+
+def compare(results, baseline, tolerance):
+    """Scénarios dont le p95 dépasse celui de la référence de plus de `tolerance`."""
+    regressions = []
+    for size, rows in results.items():
+        for name, row in rows.items():
+            reference = baseline.get(size, {}).get(name)
+            if reference and row["p95_ms"] > reference["p95_ms"] * (1 + tolerance) and row["p95_ms"] > 1:
+                regressions.append(f"{size} jeux / {name} : p95 {reference['p95_ms']:.2f} -> {row['p95_ms']:.2f} ms")
+    return regressions
+
+
+############################################
+#         MICRO-BANC AUDIO
+############################################
+
+def synthetic_voice(seconds, rng):
+    """Paquets Discord (20 ms, 48 kHz stéréo 16 bits) : 1 s de « voix » puis 1 s de silence."""
+    import numpy as np
+
+    t = np.arange(48000) / 48000
+    voice = sum(np.sin(2 * np.pi * f * t) / (k + 1) for k, f in enumerate((160, 320, 480, 960, 2400)))
+    voice = voice / np.abs(voice).max() * 8000 + rng.normal(0, 300, t.size)
+    silence = rng.normal(0, 20, t.size)
+    signal = np.concatenate([voice if second % 2 == 0 else silence for second in range(seconds)])
+    stereo = np.repeat(signal, 2).astype(np.int16)
+    return [stereo[i:i + 960 * 2].tobytes() for i in range(0, stereo.size, 960 * 2)]
+
+
+def audio_benchmark(args):
+    """CPU consommé par seconde de flux par la chaîne audio de /ecoute (ni Discord, ni Vosk)."""
+    import tracemalloc
+    import numpy as np
+
+    os.environ.setdefault("METRICS_PORT", "0")
+    import voice
+
+    packets = synthetic_voice(args.audio, np.random.default_rng(args.seed))
+    stream_seconds = args.streams * len(packets) * 0.02
+
+    def naive(packet):
+        # Référence : moyenne des voies et 1 échantillon sur 3, sans filtre ni détection de parole
+        return np.frombuffer(packet, dtype=np.int16).reshape(-1, 2).mean(axis=1)[::3].astype(np.int16).tobytes()
+
+    print(f"🎧 {args.streams} flux de {args.audio} s ({len(packets)} paquets chacun)")
+    print(f"{'chaîne':<26}{'CPU ms/s de flux':>18}{'flux/cœur':>12}{'audio gardé':>13}")
+    for label, make in (("référence (mean + [::3])", lambda: naive), ("AudioFrontEnd", lambda: voice.AudioFrontEnd().push)):
+        streams = [make() for _ in range(args.streams)]
+        kept = 0
+        started = time.process_time()
+        for packet in packets:
+            for push in streams:
+                chunk = push(packet)
+                if chunk:
+                    kept += len(chunk)
+        cpu = time.process_time() - started
+        per_second = cpu / stream_seconds
+        print(f"{label:<26}{per_second * 1000:>18.3f}{1 / per_second:>12.0f}"
+              f"{kept / 2 / 16000 / stream_seconds:>13.0%}")
+
+    # Allocations par paquet une fois la traîne passée (seconde de silence, aucun bloc envoyé)
+    frontend = voice.AudioFrontEnd()
+    for packet in packets[:65]:
+        frontend.push(packet)
+    tracemalloc.start()
+    for packet in packets[65:100]:
+        frontend.push(packet)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    print(f"🧮 Pic d'allocation sur {len(packets[65:100])} paquets de silence : {peak} octets")
+    return 0
+
+
+async def main(args):
+    os.environ["DATABASE_URL"] = args.database
+    os.environ.setdefault("DATABASE_SSLMODE", "disable")
+    os.environ.setdefault("CATALOG_LISTEN", "0")
+    os.environ.setdefault("METRICS_PORT", "0")
+    import discord_game_bot as bot
+    import recommender
+
+    # /fav et /unfav alimentent les recommandations comme dans le bot (sans leur tâche de fond)
+    bot.favorites.listeners["recommender"] = recommender.recommendations.record
+    bot.open_database()
+    bot.run_migrations()
+    with bot.db_cursor() as cur:
+        bot.game_search.detect(cur)
+    rng = random.Random(args.seed)
+    selected = set(args.only.split(",")) if args.only else None
+    guild = StubGuild()
+    results = {}
+    exit_code = 0
+    for size in [int(s) for s in args.sizes.split(",")]:
+        start = time.perf_counter()
+        names = await asyncio.get_running_loop().run_in_executor(
+            None, seed, bot, size, args.users, args.favorites, rng
+        )
+        await bot.reload_catalog()
+        bot.favorites.clear()
+        if recommender.np is not None:
+            await recommender.recommendations.rebuild()
+        print(f"\n🎲 Catalogue de {size} jeux, {args.users} utilisateurs ({time.perf_counter() - start:.1f} s)")
+        if args.explain:
+            if explain_queries(bot):
+                exit_code = 1
+            continue
+        print(f"{'scénario':<26}{'ops/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+        rows = results[str(size)] = {}
+        for name, factory in scenarios(bot, names, rng, args.users).items():
+            if selected and name not in selected:
+                continue
+            row = rows[name] = await run_scenario(factory, guild, args.iterations, args.concurrency, args.warmup)
+            print(f"{name:<26}{row['ops_per_s']:>10.1f}{row['p50_ms']:>10.2f}{row['p95_ms']:>10.2f}"
+                  f"{row['p99_ms']:>10.2f}{row['max_ms']:>10.2f}")
+        await asyncio.sleep(bot.COALESCE_WINDOW)  # laisse la file d'envoi se vider
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"\n💾 Résultats écrits dans {args.output}")
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        if regressions:
+            print("\n🚨 Régressions :\n" + "\n".join(regressions))
+            return 1
+        print("\n✅ Aucune régression par rapport à la référence")
+    return exit_code
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Banc d'essai hors ligne des commandes du bot")
+    parser.add_argument("--database", default=os.getenv("BENCH_DATABASE_URL"),
+                        help="base PostgreSQL jetable (défaut : $BENCH_DATABASE_URL)")
+    parser.add_argument("--sizes", default="100,10000,100000", help="tailles de catalogue, séparées par des virgules")
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--warmup", type=int, default=10)
+    parser.add_argument("--concurrency", type=int, default=1, help="interactions traitées en parallèle")
+    parser.add_argument("--users", type=int, default=1000, help="utilisateurs ayant des favoris")
+    parser.add_argument("--favorites", type=int, default=20, help="favoris par utilisateur")
+    parser.add_argument("--only", help="scénarios à lancer, séparés par des virgules")
+    parser.add_argument("--explain", action="store_true",
+                        help="vérifie seulement que les requêtes filtrantes passent par un index (code 1 sinon)")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="fichier JSON où écrire les résultats")
+    parser.add_argument("--baseline", help="résultats JSON de référence à comparer")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="hausse de p95 tolérée (0.25 = +25 %%)")
+    parser.add_argument("--audio", type=int, metavar="SECONDES",
+                        help="micro-banc de la chaîne audio de /ecoute sur SECONDES de flux (sans base)")
+    parser.add_argument("--streams", type=int, default=8, help="flux audio simultanés pour --audio")
+    args = parser.parse_args()
+    if args.audio:
+        if args.audio < 2:
+            parser.error("--audio demande au moins 2 secondes (parole puis silence)")
+        sys.exit(audio_benchmark(args))
+    if not args.database:
+        parser.error("indiquez une base jetable avec --database ou BENCH_DATABASE_URL")
+    sys.exit(asyncio.run(main(args)))
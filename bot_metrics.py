@@ -0,0 +1,275 @@
+import asyncio
+import contextvars
+import os
+import re
+import time
+from collections import deque
+
+import aiohttp
+import discord
+from aiohttp import web
+from discord import app_commands
+
+############################################
+#         MÉTRIQUES
+############################################
+# Mesures des commandes, des requêtes à Discord et de la boucle asyncio. Le cœur du bot et
+# chaque sous-système ajoutent leurs propres jauges avec metrics.collectors.
+
+METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1")
+# 0 pour désactiver l'endpoint HTTP ; avec SHARD_IDS, décalé du premier shard du processus
+METRICS_PORT = int(os.getenv("METRICS_PORT", "9108"))
+METRICS_SAMPLES = 1024
+LOOP_LAG_INTERVAL = 0.5
+
+
+class LatencyStats:
+    """Compteurs et dernières durées (s) d'une commande, d'une autocomplétion ou d'une route."""
+
+    __slots__ = ("count", "errors", "total", "db", "api", "samples")
+
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.total = 0.0
+        self.db = 0.0
+        self.api = 0.0
+        self.samples = deque(maxlen=METRICS_SAMPLES)
+
+    def observe(self, seconds, error=False, db=0.0, api=0.0):
+        self.count += 1
+        self.errors += bool(error)
+        self.total += seconds
+        self.db += db
+        self.api += api
+        self.samples.append(seconds)
+
+    def quantiles(self, points=(0.5, 0.95, 0.99)):
+        ordered = sorted(self.samples)
+        if not ordered:
+            return {p: 0.0 for p in points}
+        return {p: ordered[min(len(ordered) - 1, int(p * len(ordered)))] for p in points}
+
+
+class CallTiming:
+    """Temps passé en base et dans l'API Discord pendant le traitement d'une interaction."""
+
+    __slots__ = ("db", "api", "db_errors", "open")
+
+    def __init__(self):
+        self.db = 0.0
+        self.api = 0.0
+        self.db_errors = 0
+        self.open = True
+
+
+# Interaction en cours de traitement dans la tâche courante
+current_call = contextvars.ContextVar("current_call", default=None)
+
+# Tâche asyncio -> commande qu'elle traite (alimenté par InstrumentedTree, lu par le diagnostic de la boucle)
+active_calls = {}
+
+
+class Exposition:
+    """Texte au format d'exposition Prometheus, écrit par Metrics.render et les collecteurs."""
+
+    def __init__(self):
+        self.lines = []
+
+    def summary(self, name, help_text, table, label):
+        self.lines.append(f"# HELP {name} {help_text}")
+        self.lines.append(f"# TYPE {name} summary")
+        for key, stats in table.items():
+            labels = label(key)
+            for point, value in stats.quantiles().items():
+                self.lines.append(f'{name}{{{labels},quantile="{point}"}} {value:.6f}')
+            self.lines.append(f"{name}_sum{{{labels}}} {stats.total:.6f}")
+            self.lines.append(f"{name}_count{{{labels}}} {stats.count}")
+
+    def counter(self, name, help_text, table, label, value):
+        self.lines.append(f"# HELP {name} {help_text}")
+        self.lines.append(f"# TYPE {name} counter")
+        for key, stats in table.items():
+            self.lines.append(f"{name}{{{label(key)}}} {value(stats)}")
+
+    def gauge(self, name, help_text, value, labels=""):
+        self.gauges(name, help_text, [(labels, value)])
+
+    def gauges(self, name, help_text, samples):
+        """Une jauge et ses valeurs [(étiquettes, valeur)], éventuellement aucune."""
+        self.lines.append(f"# HELP {name} {help_text}")
+        self.lines.append(f"# TYPE {name} gauge")
+        for labels, value in samples:
+            self.lines.append(f"{name}{{{labels}}} {value}" if labels else f"{name} {value}")
+
+    def text(self):
+        return "\n".join(self.lines) + "\n"
+
+
+class Metrics:
+    """Registre des mesures du bot, exportées au format Prometheus et résumées par /stats."""
+
+    def __init__(self):
+        self.calls = {}    # (genre, nom) -> LatencyStats
+        self.routes = {}   # "GET /channels/{id}/messages" -> LatencyStats
+        self.db = LatencyStats()
+        self.loop_lag = LatencyStats()
+        self.loop_lag_max = 0.0
+        self.started = time.time()
+        self.collectors = {}  # nom -> fonction(Exposition) qui écrit ses propres mesures
+
+    @staticmethod
+    def stats_for(table, key):
+        stats = table.get(key)
+        if stats is None:
+            stats = table[key] = LatencyStats()
+        return stats
+
+    def add_db(self, seconds, error):
+        self.db.observe(seconds, error)
+        timing = current_call.get()
+        if timing is not None and timing.open:
+            timing.db += seconds
+            timing.db_errors += bool(error)
+
+    def add_api(self, route, seconds, error):
+        self.stats_for(self.routes, route).observe(seconds, error)
+        timing = current_call.get()
+        if timing is not None and timing.open:
+            timing.api += seconds
+
+    def render(self):
+        """Texte au format d'exposition Prometheus."""
+        out = Exposition()
+
+        def call_label(key):
+            return f'kind="{key[0]}",command="{key[1]}"'
+
+        def route_label(key):
+            return 'route="{}"'.format(key.replace("\\", "\\\\").replace('"', '\\"'))
+
+        out.summary("bot_command_latency_seconds", "Durée des commandes et autocomplétions.", self.calls, call_label)
+        out.counter("bot_command_errors_total", "Commandes et autocomplétions en échec.", self.calls, call_label,
+                    lambda s: s.errors)
+        out.counter("bot_command_db_seconds_total", "Temps passé en base par commande.", self.calls, call_label,
+                    lambda s: f"{s.db:.6f}")
+        out.counter("bot_command_api_seconds_total", "Temps passé dans l'API Discord par commande.", self.calls,
+                    call_label, lambda s: f"{s.api:.6f}")
+        out.summary("bot_discord_api_latency_seconds", "Durée des requêtes à l'API Discord.", self.routes, route_label)
+        out.counter("bot_discord_api_errors_total", "Requêtes à l'API Discord en échec.", self.routes, route_label,
+                    lambda s: s.errors)
+        out.summary("bot_db_latency_seconds", "Durée des transactions (attente du pool comprise).",
+                    {"all": self.db}, lambda key: 'pool="main"')
+        out.summary("bot_event_loop_lag_seconds", "Retard de la boucle asyncio.",
+                    {"loop": self.loop_lag}, lambda key: 'loop="main"')
+        out.gauge("bot_event_loop_lag_max_seconds", "Retard maximal observé de la boucle asyncio.",
+                  f"{self.loop_lag_max:.6f}")
+        out.gauge("bot_uptime_seconds", "Temps depuis le démarrage.", f"{time.time() - self.started:.0f}")
+        for collector in list(self.collectors.values()):
+            collector(out)
+        return out.text()
+
+
+metrics = Metrics()
+
+
+class InstrumentedTree(app_commands.CommandTree):
+    """Arbre de commandes qui mesure chaque commande et chaque autocomplétion.
+
+    interaction_check (API publique) est appelé dans la tâche qui traite l'interaction, avant
+    la commande ou l'autocomplétion : la mesure démarre là et se termine avec cette tâche
+    (les autocomplétions n'ont pas d'événement de fin).
+    """
+
+    async def interaction_check(self, interaction):
+        data = interaction.data or {}
+        kind = "autocomplete" if interaction.type is discord.InteractionType.autocomplete else "commande"
+        name = data.get("name", "?")
+        timing = CallTiming()
+        current_call.set(timing)  # contexte de la tâche : vu par la commande qui suit
+        task = asyncio.current_task()
+        active_calls[task] = f"/{name}" + (" (autocomplétion)" if kind == "autocomplete" else "")
+        start = time.perf_counter()
+
+        def finished(task):
+            elapsed = time.perf_counter() - start
+            timing.open = False
+            active_calls.pop(task, None)
+            if kind == "autocomplete":
+                # discord.py avale les erreurs d'autocomplétion : pas de réponse = échec
+                failed = not interaction.response.is_done()
+            else:
+                failed = interaction.command_failed or task.cancelled() or task.exception() is not None
+            metrics.stats_for(metrics.calls, (kind, name)).observe(
+                elapsed, failed or timing.db_errors > 0, timing.db, timing.api
+            )
+
+        task.add_done_callback(finished)
+        return True
+
+
+# Préfixe de version et segments variables des URL de l'API : ids (snowflakes), jetons d'interaction
+API_PREFIX = re.compile(r"^/api/v\d+")
+API_SNOWFLAKE = re.compile(r"/\d{15,21}(?=/|$)")
+API_TOKEN = re.compile(r"(/(?:interactions|webhooks)/\{id\}/)[^/]+")
+
+
+def api_route(method, url):
+    """ "POST /channels/{id}/messages" pour une requête à l'API Discord."""
+    path = API_SNOWFLAKE.sub("/{id}", API_PREFIX.sub("", url.path))
+    return f"{method} " + API_TOKEN.sub(r"\1{token}", path)
+
+
+def api_trace_config():
+    """TraceConfig aiohttp qui chronomètre les requêtes HTTP du bot (REST et réponses aux interactions)."""
+    async def on_request_start(session, context, params):
+        context.start = time.perf_counter()
+
+    async def on_request_end(session, context, params):
+        metrics.add_api(api_route(params.method, params.url), time.perf_counter() - context.start,
+                        params.response.status >= 400)
+
+    async def on_request_exception(session, context, params):
+        metrics.add_api(api_route(params.method, params.url), time.perf_counter() - context.start, True)
+
+    trace = aiohttp.TraceConfig()
+    trace.on_request_start.append(on_request_start)
+    trace.on_request_end.append(on_request_end)
+    trace.on_request_exception.append(on_request_exception)
+    return trace
+
+
+async def monitor_loop_lag():
+    while True:
+        start = time.perf_counter()
+        await asyncio.sleep(LOOP_LAG_INTERVAL)
+        lag = max(0.0, time.perf_counter() - start - LOOP_LAG_INTERVAL)
+        metrics.loop_lag.observe(lag)
+        metrics.loop_lag_max = max(metrics.loop_lag_max, lag)
+
+
+def metrics_port(shard_ids=None):
+    """Port de l'endpoint : METRICS_PORT + premier shard du processus, un port par processus d'un même hôte."""
+    return METRICS_PORT + min(shard_ids) if METRICS_PORT and shard_ids else METRICS_PORT
+
+
+async def start_metrics_server(shard_ids=None):
+    port = metrics_port(shard_ids)
+    if not port:
+        return
+
+    async def handle(request):
+        return web.Response(text=metrics.render(), content_type="text/plain", charset="utf-8")
+
+    app = web.Application()
+    app.router.add_get("/metrics", handle)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    try:
+        await web.TCPSite(runner, METRICS_HOST, port).start()
+    except OSError as e:
+        # Port déjà pris : le bot démarre quand même, sans endpoint de métriques
+        await runner.cleanup()
+        print(f"⚠️ Endpoint de métriques indisponible sur le port {port} : {e}")
+        return
+    print(f"📈 Métriques disponibles sur http://{METRICS_HOST}:{port}/metrics")
@@ -1,6 +1,8 @@
 import discord
 from discord.ext import commands
 import psycopg2
+import psycopg2.extras
+from psycopg2 import pool as pg_pool
 import asyncio
 import os
 import random
@@ -8,117 +10,1602 @@ import re
 from discord import app_commands
 from discord.ext import tasks
 import datetime
+import bisect
+import copy
+import csv
+import heapq
+import importlib
+import io
+import itertools
+import json
+import math
+from collections import Counter, OrderedDict, deque
+import select
+import sys
+import threading
+import time
+import unicodedata
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from decimal import Decimal, InvalidOperation
+from bot_metrics import (
+    InstrumentedTree, active_calls, api_trace_config, metrics, monitor_loop_lag, start_metrics_server
+)
+
+# Début du démarrage à froid (durées des étapes dans startup_timings)
+STARTED_AT = time.perf_counter()
+# Étape du démarrage -> durée (s), remplie par setup_hook et on_ready
+startup_timings = {}
+
+############################################
+#         DIAGNOSTIC DE LA BOUCLE
+############################################
+
+LOOP_STALL_MS = int(os.getenv("LOOP_STALL_MS", "0"))    # seuil du chien de garde, 0 = désactivé
+PROFILE_ON_START = os.getenv("PROFILE_ON_START", "0") == "1"
+PROFILE_INTERVAL = float(os.getenv("PROFILE_INTERVAL_MS", "5")) / 1000
+PROFILE_DIR = os.getenv("PROFILE_DIR", "profiles")
+
+
+def frame_stack(frame):
+    """Pile d'appels de `frame`, de la plus ancienne à la plus récente."""
+    stack = []
+    while frame is not None:
+        code = frame.f_code
+        stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+        frame = frame.f_back
+    stack.reverse()
+    return stack
+
+
+class LoopDiagnostics:
+    """Chien de garde des blocages de la boucle asyncio et profileur par échantillonnage.
+
+    Les deux tournent dans des threads à part et lisent la pile du thread de la boucle
+    avec sys._current_frames(), ce qui marche justement quand la boucle est bloquée.
+    La commande en cause est retrouvée par la tâche asyncio en cours.
+    """
+
+    def __init__(self):
+        self.loop = None
+        self.loop_thread = None
+        self.beat = time.monotonic()
+        self.stalls = 0
+        self.profiling = False
+        self.samples = {}   # pile repliée "commande;f1;f2" -> nombre d'échantillons
+        self.lock = threading.Lock()
+
+    def attach(self, loop):
+        self.loop = loop
+        self.loop_thread = threading.get_ident()
+        if LOOP_STALL_MS:
+            start_background_task(self._heartbeat())
+            threading.Thread(target=self._watch, name="loop-watchdog", daemon=True).start()
+            print(f"🐕 Chien de garde de la boucle actif (seuil {LOOP_STALL_MS} ms)")
+        if PROFILE_ON_START:
+            self.start_profiling()
+
+    def current_command(self):
+        task = asyncio.current_task(self.loop)
+        if task is None:
+            return "(boucle)"
+        return active_calls.get(task) or f"(tâche {task.get_name()})"
+
+    def loop_stack(self):
+        frame = sys._current_frames().get(self.loop_thread)
+        return frame_stack(frame) if frame is not None else []
+
+    async def _heartbeat(self):
+        while True:
+            self.beat = time.monotonic()
+            await asyncio.sleep(LOOP_STALL_MS / 4000)
+
+    def _watch(self):
+        threshold = LOOP_STALL_MS / 1000
+        reported = None
+        while True:
+            time.sleep(threshold / 4)
+            beat = self.beat
+            stalled = time.monotonic() - beat
+            if stalled < threshold or reported == beat:
+                continue
+            reported = beat  # un seul rapport par blocage
+            self.stalls += 1
+            stack = "\n    ".join(self.loop_stack()[-15:])
+            print(f"🚨 Boucle bloquée depuis {stalled * 1000:.0f} ms dans {self.current_command()} :\n    {stack}")
+
+    def start_profiling(self):
+        if self.profiling:
+            return False
+        self.profiling = True
+        threading.Thread(target=self._sample, name="loop-profiler", daemon=True).start()
+        print("🔬 Profilage de la boucle démarré")
+        return True
+
+    def stop_profiling(self):
+        """Arrête le profilage et écrit les piles repliées (format flamegraph) sur disque."""
+        if not self.profiling:
+            return None
+        self.profiling = False
+        with self.lock:
+            samples, self.samples = self.samples, {}
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        path = os.path.join(PROFILE_DIR, f"profil-{datetime.datetime.now():%Y%m%d-%H%M%S}.folded")
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, count in sorted(samples.items(), key=lambda item: -item[1]):
+                f.write(f"{stack} {count}\n")
+        print(f"🔬 Profil écrit dans {path} ({sum(samples.values())} échantillons)")
+        return path
+
+    def _sample(self):
+        while self.profiling:
+            time.sleep(PROFILE_INTERVAL)
+            stack = self.loop_stack()
+            if not stack or stack[-1].startswith("select ("):
+                continue  # boucle au repos
+            key = ";".join([self.current_command()] + [entry.replace(";", ",") for entry in stack])
+            with self.lock:
+                self.samples[key] = self.samples.get(key, 0) + 1
+
+
+loop_diagnostics = LoopDiagnostics()
 
-# Vérification et installation de requests si manquant
-try:
-    import requests
-except ModuleNotFoundError:
-    import subprocess
-    subprocess.run(["pip", "install", "requests"])
-    import requests
 
 # Configuration du bot
 TOKEN = os.getenv("TOKEN")
-intents = discord.Intents.all()
-bot = commands.Bot(command_prefix="!", intents=intents)
-
-# Connexion à PostgreSQL
+# Sharding : SHARD_COUNT = nombre total de shards (recommandé par Discord si absent),
+# SHARD_IDS = shards de ce processus ("0,1"), pour répartir les shards sur plusieurs processus
+SHARD_COUNT = int(os.getenv("SHARD_COUNT")) if os.getenv("SHARD_COUNT") else None
+SHARD_IDS = [int(i) for i in os.getenv("SHARD_IDS", "").split(",") if i.strip()] or None
+if SHARD_IDS and SHARD_COUNT is None:
+    raise SystemExit("❌ SHARD_IDS demande aussi SHARD_COUNT (nombre total de shards).")
+
+# Seulement ce que le bot utilise : serveurs, salons et rôles, arrivées et départs des membres
+intents = discord.Intents.none()
+intents.guilds = True
+intents.members = True
+# Écoute des salons vocaux (/ecoute) et annonces vocales (/lire), voir voice.py
+VOICE_LISTEN = os.getenv("VOICE_LISTEN", "0") == "1"
+VOICE_TTS = os.getenv("VOICE_TTS", "0") == "1"
+intents.voice_states = VOICE_LISTEN or VOICE_TTS
+bot = commands.AutoShardedBot(
+    command_prefix="!", intents=intents, tree_cls=InstrumentedTree,
+    shard_count=SHARD_COUNT, shard_ids=SHARD_IDS,
+    # Pas de téléchargement de tous les membres au démarrage : les arrivants sont mis en cache
+    chunk_guilds_at_startup=False,
+    # Même session HTTP pour l'API REST et les réponses aux interactions : toutes chronométrées
+    http_trace=api_trace_config()
+)
+
+# Connexion à PostgreSQL (pool partagé par toutes les commandes)
 DATABASE_URL = os.getenv("DATABASE_URL")
-conn = psycopg2.connect(DATABASE_URL, sslmode="require", client_encoding="UTF8")
-cursor = conn.cursor()
-
-
-# Création (ou mise à jour) de la table "games"
-cursor.execute('''CREATE TABLE IF NOT EXISTS games (
-    id SERIAL PRIMARY KEY,
-    nom TEXT UNIQUE,
-    release_date TEXT,
-    price TEXT,
-    type TEXT,
-    duration TEXT,
-    cloud_available TEXT,
-    youtube_link TEXT,
-    steam_link TEXT
-)''')
-conn.commit()
-
-# Création de la table "user_favorites" (pour les favoris par utilisateur)
-cursor.execute('''CREATE TABLE IF NOT EXISTS user_favorites (
-    id SERIAL PRIMARY KEY,
-    user_id BIGINT,
-    game TEXT,
-    UNIQUE(user_id, game)
-)''')
-conn.commit()
-
-# Mettre "Aucun" dans la colonne commentaire pour tous les jeux déjà en base
-cursor.execute("UPDATE games SET commentaire = 'Aucun' WHERE commentaire IS NULL OR commentaire = ''")
-conn.commit()
-
-cursor.execute('''
-    CREATE TABLE IF NOT EXISTS pepite_games (
-        id SERIAL PRIMARY KEY,
-        game_name TEXT UNIQUE
+DB_SSLMODE = os.getenv("DATABASE_SSLMODE", "require")
+DB_POOL_MIN = int(os.getenv("DB_POOL_MIN", "1"))
+DB_POOL_MAX = int(os.getenv("DB_POOL_MAX", "10"))
+
+# Ouverts par open_database() au démarrage du bot, pas à l'import du module
+db_pool = None
+db_executor = None
+
+
+def open_database():
+    global db_pool, db_executor
+    if db_pool is not None:
+        return
+    db_pool = pg_pool.ThreadedConnectionPool(
+        DB_POOL_MIN, DB_POOL_MAX, DATABASE_URL,
+        sslmode=DB_SSLMODE, client_encoding="UTF8"
     )
-''')
-conn.commit()
-
-# S'assurer que la colonne "date_ajout" existe (si elle n'existe pas, on l'ajoute)
-try:
-    cursor.execute("ALTER TABLE games ADD COLUMN IF NOT EXISTS date_ajout TIMESTAMP DEFAULT CURRENT_TIMESTAMP")
-    conn.commit()
-except Exception as e:
-    print("Erreur lors de l'ajout de la colonne date_ajout :", e)
-
-# Vérification de la structure de la table pour renommer "name" en "nom" si nécessaire
-try:
-    cursor.execute("SELECT column_name FROM information_schema.columns WHERE table_name='games'")
-    columns = [row[0] for row in cursor.fetchall()]
+    # psycopg2 est bloquant : les requêtes tournent sur ces threads, jamais sur la boucle asyncio.
+    # Un thread par connexion au maximum, le pool ne peut donc jamais être épuisé.
+    db_executor = ThreadPoolExecutor(max_workers=DB_POOL_MAX, thread_name_prefix="db")
+
+
+def db_pool_stats():
+    if db_pool is None:
+        return {"used": 0, "idle": 0, "max": DB_POOL_MAX, "waiting": 0}
+    # Attributs internes du pool psycopg2 : connexions prêtées / au repos
+    return {
+        "used": len(db_pool._used),
+        "idle": len(db_pool._pool),
+        "max": db_pool.maxconn,
+        "waiting": db_executor._work_queue.qsize(),
+    }
+
+
+@contextmanager
+def db_cursor():
+    """Emprunte une connexion au pool pour une transaction.
+
+    COMMIT si le bloc se termine normalement, ROLLBACK automatique en cas d'erreur.
+    """
+    connection = db_pool.getconn()
+    try:
+        with connection.cursor() as cur:
+            yield cur
+        connection.commit()
+    except BaseException:
+        if not connection.closed:
+            connection.rollback()
+        raise
+    finally:
+        db_pool.putconn(connection, close=bool(connection.closed))
+
+
+async def db_run(func, *args):
+    """Exécute func(cursor, *args) dans une transaction, sur un thread du pool."""
+    def work():
+        with db_cursor() as cur:
+            return func(cur, *args)
+    loop = asyncio.get_running_loop()
+    start = time.perf_counter()
+    failed = True
+    try:
+        result = await loop.run_in_executor(db_executor, work)
+        failed = False
+        return result
+    finally:
+        metrics.add_db(time.perf_counter() - start, failed)
+
+
+async def db_fetchone(query, params=()):
+    def work(cur):
+        cur.execute(query, params)
+        return cur.fetchone()
+    return await db_run(work)
+
+
+async def db_fetchall(query, params=()):
+    def work(cur):
+        cur.execute(query, params)
+        return cur.fetchall()
+    return await db_run(work)
+
+
+async def db_execute(query, params=()):
+    """Exécute une requête d'écriture et renvoie le nombre de lignes touchées."""
+    def work(cur):
+        cur.execute(query, params)
+        return cur.rowcount
+    return await db_run(work)
+
+
+def parse_price(text):
+    """Premier nombre d'un prix texte : "19,99 €" -> Decimal("19.99"), None si illisible."""
+    match = re.search(r"\d[\d\.,]*", text or "")
+    if not match:
+        return None
+    try:
+        return Decimal(match.group().replace(",", ".")).quantize(Decimal("0.01"))
+    except InvalidOperation:
+        return None
+
+
+def parse_duration(text):
+    """Premier nombre d'une durée texte : "10h" -> 10.0, None si illisible."""
+    match = re.search(r"\d[\d\.,]*", text or "")
+    if not match:
+        return None
+    try:
+        return float(match.group().replace(",", "."))
+    except ValueError:
+        return None
+
+
+############################################
+#         MIGRATIONS DU SCHÉMA
+############################################
+# Chaque migration est appliquée une seule fois, dans sa propre transaction, et notée dans
+# schema_version. Les premières reprennent l'ancien schéma créé au démarrage : elles sont
+# idempotentes, une base existante les passe donc sans rien changer.
+
+def migrate_base_tables(cur):
+    # Vérification de la structure de la table pour renommer "name" en "nom" si nécessaire
+    cur.execute("SELECT column_name FROM information_schema.columns WHERE table_name='games'")
+    columns = [row[0] for row in cur.fetchall()]
     if 'name' in columns and 'nom' not in columns:
-        cursor.execute("ALTER TABLE games RENAME COLUMN name TO nom")
-        conn.commit()
+        cur.execute("ALTER TABLE games RENAME COLUMN name TO nom")
         print("Colonne 'name' renommée en 'nom'")
-except Exception as e:
-    print("Erreur lors de la vérification de la structure de la table games:", e)
-
-# Création de la table "game_requests" pour la commande /ask
-cursor.execute('''CREATE TABLE IF NOT EXISTS game_requests (
-    id SERIAL PRIMARY KEY,
-    user_id BIGINT,
-    username TEXT,
-    game_name TEXT UNIQUE,
-    date TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-)''')
-conn.commit()
-
-# Création de la table "game_problems" (pour les problèmes signalés)
-cursor.execute('''CREATE TABLE IF NOT EXISTS game_problems (
-    id SERIAL PRIMARY KEY,
-    user_id BIGINT,
-    username TEXT,
-    game TEXT,
-    message TEXT,
-    date TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-)''')
-conn.commit()
+
+    cur.execute('''CREATE TABLE IF NOT EXISTS games (
+        id SERIAL PRIMARY KEY,
+        nom TEXT UNIQUE,
+        release_date TEXT,
+        price TEXT,
+        type TEXT,
+        duration TEXT,
+        cloud_available TEXT,
+        youtube_link TEXT,
+        steam_link TEXT
+    )''')
+    cur.execute("ALTER TABLE games ADD COLUMN IF NOT EXISTS commentaire TEXT")
+    cur.execute("ALTER TABLE games ADD COLUMN IF NOT EXISTS date_ajout TIMESTAMP DEFAULT CURRENT_TIMESTAMP")
+
+    # Favoris par utilisateur
+    cur.execute('''CREATE TABLE IF NOT EXISTS user_favorites (
+        id SERIAL PRIMARY KEY,
+        user_id BIGINT,
+        game TEXT,
+        UNIQUE(user_id, game)
+    )''')
+    cur.execute('''
+        CREATE TABLE IF NOT EXISTS pepite_games (
+            id SERIAL PRIMARY KEY,
+            game_name TEXT UNIQUE
+        )
+    ''')
+    # Demandes d'ajout (/ask) et problèmes signalés (/probleme)
+    cur.execute('''CREATE TABLE IF NOT EXISTS game_requests (
+        id SERIAL PRIMARY KEY,
+        user_id BIGINT,
+        username TEXT,
+        game_name TEXT UNIQUE,
+        date TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )''')
+    cur.execute('''CREATE TABLE IF NOT EXISTS game_problems (
+        id SERIAL PRIMARY KEY,
+        user_id BIGINT,
+        username TEXT,
+        game TEXT,
+        message TEXT,
+        date TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )''')
+
+
+def migrate_default_comment(cur):
+    # "Aucun" pour les jeux sans commentaire, puis par défaut pour les suivants
+    cur.execute("UPDATE games SET commentaire = 'Aucun' WHERE commentaire IS NULL OR commentaire = ''")
+    cur.execute("ALTER TABLE games ALTER COLUMN commentaire SET DEFAULT 'Aucun'")
+
+
+def migrate_numeric_columns(cur):
+    # Prix et durée en valeurs numériques, calculées à partir des colonnes texte
+    cur.execute("ALTER TABLE games ADD COLUMN IF NOT EXISTS price_value NUMERIC(10, 2)")
+    cur.execute("ALTER TABLE games ADD COLUMN IF NOT EXISTS duration_hours REAL")
+    cur.execute('''
+        SELECT id, price, duration FROM games
+        WHERE (price_value IS NULL AND price ~ '[0-9]') OR (duration_hours IS NULL AND duration ~ '[0-9]')
+    ''')
+    numeric_values = [(parse_price(price), parse_duration(duration), game_id) for game_id, price, duration in cur.fetchall()]
+    if numeric_values:
+        psycopg2.extras.execute_values(cur, '''
+            UPDATE games SET price_value = v.price_value::NUMERIC, duration_hours = v.duration_hours::REAL
+            FROM (VALUES %s) AS v(price_value, duration_hours, id)
+            WHERE games.id = v.id
+        ''', numeric_values)
+        print(f"🔢 Prix et durées convertis pour {len(numeric_values)} jeux")
+
+
+def migrate_user_channels(cur):
+    # Salon personnel de chaque membre (retrouvé par id, même après un renommage)
+    cur.execute('''CREATE TABLE IF NOT EXISTS user_channels (
+        guild_id BIGINT,
+        user_id BIGINT,
+        channel_id BIGINT UNIQUE,
+        PRIMARY KEY (guild_id, user_id)
+    )''')
+
+
+def migrate_game_types(cur):
+    # Table de liaison jeu <-> type ("FPS, Aventure" devient deux lignes indexées par tag)
+    cur.execute('''CREATE TABLE IF NOT EXISTS game_types (
+        game_id INTEGER REFERENCES games(id) ON DELETE CASCADE,
+        tag TEXT NOT NULL,
+        PRIMARY KEY (game_id, tag)
+    )''')
+    cur.execute("CREATE INDEX IF NOT EXISTS game_types_tag_idx ON game_types (tag)")
+    # Migration des types texte existants (seuls les jeux encore sans tag sont traités)
+    cur.execute('''
+        INSERT INTO game_types (game_id, tag)
+        SELECT DISTINCT g.id, LOWER(TRIM(t.tag))
+        FROM games g, unnest(string_to_array(g.type, ',')) AS t(tag)
+        WHERE TRIM(t.tag) <> ''
+          AND NOT EXISTS (SELECT 1 FROM game_types gt WHERE gt.game_id = g.id)
+        ON CONFLICT DO NOTHING
+    ''')
+    if cur.rowcount:
+        print(f"🏷️ {cur.rowcount} types migrés vers la table game_types")
+
+
+def migrate_favorites_game_id(cur):
+    # Les favoris pointent sur games.id (suivent les renommages, supprimés avec le jeu)
+    cur.execute("ALTER TABLE user_favorites ADD COLUMN IF NOT EXISTS game_id INTEGER")
+    cur.execute('''
+        UPDATE user_favorites f SET game_id = g.id
+        FROM games g
+        WHERE f.game_id IS NULL AND LOWER(TRIM(g.nom)) = LOWER(TRIM(f.game))
+    ''')
+    cur.execute("DELETE FROM user_favorites WHERE game_id IS NULL")
+    if cur.rowcount:
+        print(f"🧹 {cur.rowcount} favoris de jeux disparus supprimés")
+    cur.execute('''
+        DELETE FROM user_favorites a USING user_favorites b
+        WHERE a.user_id = b.user_id AND a.game_id = b.game_id AND a.id > b.id
+    ''')
+    cur.execute("ALTER TABLE user_favorites DROP COLUMN game")
+    cur.execute("ALTER TABLE user_favorites ALTER COLUMN game_id SET NOT NULL")
+    cur.execute('''
+        ALTER TABLE user_favorites
+        ADD CONSTRAINT user_favorites_game_fk FOREIGN KEY (game_id) REFERENCES games(id) ON DELETE CASCADE
+    ''')
+    # (user_id, game_id) sert aussi d'index pour "WHERE user_id = ..."
+    cur.execute("ALTER TABLE user_favorites ADD CONSTRAINT user_favorites_user_game_key UNIQUE (user_id, game_id)")
+    cur.execute("CREATE INDEX IF NOT EXISTS user_favorites_game_idx ON user_favorites (game_id)")
+
+
+def migrate_filter_indexes(cur):
+    # Index sur les expressions utilisées telles quelles dans les WHERE / ORDER BY des commandes
+    cur.execute("CREATE INDEX IF NOT EXISTS games_lower_nom_idx ON games (LOWER(nom))")
+    cur.execute("CREATE INDEX IF NOT EXISTS games_date_ajout_idx ON games (date_ajout DESC)")
+    cur.execute("CREATE INDEX IF NOT EXISTS game_requests_lower_name_idx ON game_requests (LOWER(game_name))")
+    cur.execute("CREATE INDEX IF NOT EXISTS game_problems_lower_game_idx ON game_problems (LOWER(game))")
+
+
+def create_extension(cur, name):
+    """CREATE EXTENSION dans un point de sauvegarde : False si l'extension n'est pas disponible."""
+    cur.execute("SAVEPOINT extension")
+    try:
+        cur.execute(f"CREATE EXTENSION IF NOT EXISTS {name}")
+    except psycopg2.Error as e:
+        cur.execute("ROLLBACK TO SAVEPOINT extension")
+        print(f"⚠️ Extension {name} indisponible : {str(e).splitlines()[0]}")
+        return False
+    cur.execute("RELEASE SAVEPOINT extension")
+    return True
+
+
+def migrate_search(cur):
+    # Recherche plein texte : nom, types et commentaire, racinisés en français (sans accents si
+    # unaccent est disponible), dans une colonne générée indexée en GIN
+    config = "french"
+    if create_extension(cur, "unaccent"):
+        cur.execute("SELECT 1 FROM pg_ts_config WHERE cfgname = 'fr_unaccent'")
+        if not cur.fetchone():
+            cur.execute("CREATE TEXT SEARCH CONFIGURATION fr_unaccent (COPY = french)")
+            cur.execute('''ALTER TEXT SEARCH CONFIGURATION fr_unaccent
+                ALTER MAPPING FOR hword, hword_part, word WITH unaccent, french_stem''')
+        config = "fr_unaccent"
+    cur.execute(f'''ALTER TABLE games ADD COLUMN IF NOT EXISTS search_vector tsvector GENERATED ALWAYS AS (
+        setweight(to_tsvector('{config}', COALESCE(nom, '')), 'A') ||
+        setweight(to_tsvector('{config}', COALESCE(type, '')), 'B') ||
+        setweight(to_tsvector('{config}', COALESCE(NULLIF(commentaire, 'Aucun'), '')), 'C')
+    ) STORED''')
+    cur.execute("CREATE INDEX IF NOT EXISTS games_search_idx ON games USING GIN (search_vector)")
+    # Tolérance aux fautes de frappe : similarité des trigrammes sur le nom
+    if create_extension(cur, "pg_trgm"):
+        cur.execute("CREATE INDEX IF NOT EXISTS games_nom_trgm_idx ON games USING GIN (LOWER(nom) gin_trgm_ops)")
+
+
+def migrate_guild_config(cur):
+    # Salons et rôle utilisés par le bot, par serveur (NULL = repli sur les noms par défaut)
+    cur.execute('''CREATE TABLE IF NOT EXISTS guild_config (
+        guild_id BIGINT PRIMARY KEY,
+        announce_channel_id BIGINT,
+        staff_channel_id BIGINT,
+        access_role_id BIGINT
+    )''')
+
+
+def migrate_steam_proposals(cur):
+    # Valeurs proposées par le worker Steam (NULL = champ inchangé), appliquées par /steamvalide
+    cur.execute('''CREATE TABLE IF NOT EXISTS steam_proposals (
+        game_id INTEGER PRIMARY KEY REFERENCES games(id) ON DELETE CASCADE,
+        app_id INTEGER NOT NULL,
+        new_release_date TEXT,
+        new_price TEXT,
+        new_type TEXT,
+        refused BOOLEAN NOT NULL DEFAULT FALSE,
+        date TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )''')
+
+
+# (version, description, fonction) : ne jamais modifier une migration déjà déployée, en ajouter une
+MIGRATIONS = [
+    (1, "tables de base", migrate_base_tables),
+    (2, "commentaire par défaut", migrate_default_comment),
+    (3, "prix et durée numériques", migrate_numeric_columns),
+    (4, "salons personnels", migrate_user_channels),
+    (5, "table game_types", migrate_game_types),
+    (6, "favoris liés à games.id", migrate_favorites_game_id),
+    (7, "index des filtres", migrate_filter_indexes),
+    (8, "recherche plein texte", migrate_search),
+    (9, "configuration par serveur", migrate_guild_config),
+    (10, "propositions Steam", migrate_steam_proposals),
+]
+
+# Clé du verrou consultatif qui sérialise les migrations entre instances
+MIGRATION_LOCK_ID = 4242001
+
+
+def run_migrations():
+    """Applique les migrations manquantes. Renvoie le nombre de migrations appliquées."""
+    with db_cursor() as cur:
+        cur.execute('''CREATE TABLE IF NOT EXISTS schema_version (
+            version INTEGER PRIMARY KEY,
+            description TEXT,
+            applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )''')
+    applied = 0
+    for version, description, migrate in MIGRATIONS:
+        with db_cursor() as cur:
+            cur.execute("SELECT pg_advisory_xact_lock(%s)", (MIGRATION_LOCK_ID,))
+            cur.execute("SELECT 1 FROM schema_version WHERE version = %s", (version,))
+            if cur.fetchone():
+                continue
+            migrate(cur)
+            cur.execute("INSERT INTO schema_version (version, description) VALUES (%s, %s)", (version, description))
+            applied += 1
+            print(f"🧱 Migration {version} appliquée : {description}")
+    return applied
+
+############################################
+#         INDEX DE RECHERCHE (AUTOCOMPLÉTION)
+############################################
+
+def normalize_name(text):
+    """Minuscules, sans accents ni espaces superflus ("  Éclair  Noir" -> "eclair noir")."""
+    text = unicodedata.normalize("NFKD", text.lower())
+    return " ".join("".join(c for c in text if not unicodedata.combining(c)).split())
+
+
+def trigrams(text):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class GameSearchIndex:
+    """Index en mémoire des noms de jeux pour l'autocomplétion.
+
+    Une liste triée sert les recherches par préfixe (bisect), un index trigrammes
+    sert les recherches "contient". Les préfixes sont classés avant les sous-chaînes.
+    """
+
+    def __init__(self):
+        self.names = {}     # id -> nom normalisé
+        self.grams = {}     # trigramme -> set(id)
+        self._sorted = []   # [(nom normalisé, id)] triée
+
+    def clear(self):
+        self.names.clear()
+        self.grams.clear()
+        self._sorted.clear()
+
+    def add(self, game_id, name):
+        if game_id in self.names:
+            self.remove(game_id)
+        norm = normalize_name(name)
+        self.names[game_id] = norm
+        bisect.insort(self._sorted, (norm, game_id))
+        for gram in trigrams(norm):
+            self.grams.setdefault(gram, set()).add(game_id)
+
+    def remove(self, game_id):
+        norm = self.names.pop(game_id, None)
+        if norm is None:
+            return
+        pos = bisect.bisect_left(self._sorted, (norm, game_id))
+        if pos < len(self._sorted) and self._sorted[pos] == (norm, game_id):
+            del self._sorted[pos]
+        for gram in trigrams(norm):
+            ids = self.grams.get(gram)
+            if ids is not None:
+                ids.discard(game_id)
+                if not ids:
+                    del self.grams[gram]
+
+    def search(self, query, limit=25):
+        """Renvoie au plus `limit` ids : préfixes, puis débuts de mot, puis sous-chaînes."""
+        q = normalize_name(query)
+        if not q:
+            return [game_id for _, game_id in self._sorted[:limit]]
+
+        found = []
+        pos = bisect.bisect_left(self._sorted, (q,))
+        while pos < len(self._sorted) and len(found) < limit:
+            norm, game_id = self._sorted[pos]
+            if not norm.startswith(q):
+                break
+            found.append(game_id)
+            pos += 1
+        if len(found) >= limit:
+            return found
+
+        prefixed = set(found)
+        if len(q) < 3:
+            # Requête trop courte pour les trigrammes : parcours ordonné avec arrêt anticipé
+            matches = (
+                (norm, game_id) for norm, game_id in self._sorted
+                if q in norm and game_id not in prefixed
+            )
+            others = []
+            for match in matches:
+                others.append(match)
+                if len(others) >= limit - len(found):
+                    break
+        else:
+            postings = sorted((self.grams.get(gram, ()) for gram in trigrams(q)), key=len)
+            candidates = set(postings[0]).intersection(*postings[1:]) if postings else set()
+            others = [
+                (self.names[game_id], game_id) for game_id in candidates
+                if game_id not in prefixed and q in self.names[game_id]
+            ]
+        word_start = " " + q
+        others.sort(key=lambda match: (word_start not in match[0], match))
+        found.extend(game_id for _, game_id in others[:limit - len(found)])
+        return found
+
+    def fuzzy(self, query, limit=10, threshold=0.3):
+        """Ids des noms les plus proches malgré les fautes de frappe, du plus proche au moins proche.
+
+        Score : part des trigrammes de la requête présents dans le nom, départagée par la
+        similarité de Jaccard (un nom court et proche passe devant un long nom qui le contient).
+        """
+        grams = trigrams(normalize_name(query))
+        if not grams:
+            return []
+        shared = Counter(itertools.chain.from_iterable(self.grams.get(gram, ()) for gram in grams))
+        # Seuls les candidats au moins aussi couverts que le limit-ième sont départagés
+        cutoff = threshold * len(grams)
+        best = heapq.nlargest(limit, shared.values())
+        if len(best) == limit:
+            cutoff = max(cutoff, best[-1])
+        scored = []
+        for game_id, common in shared.items():
+            if common >= cutoff:
+                jaccard = common / (len(grams) + len(trigrams(self.names[game_id])) - common)
+                scored.append((-common, -jaccard, self.names[game_id], game_id))
+        return [entry[-1] for entry in heapq.nsmallest(limit, scored)]
+
+
+############################################
+#         CACHE DU CATALOGUE DE JEUX
+############################################
+
+# Colonnes chargées dans le cache, dans l'ordre attendu par GameRecord
+GAME_COLUMNS = (
+    "id, nom, release_date, price, type, duration, cloud_available, youtube_link, steam_link, "
+    "commentaire, date_ajout, price_value, duration_hours"
+)
+
+# Canal LISTEN/NOTIFY utilisé pour garder plusieurs instances du bot cohérentes
+CATALOG_CHANNEL = "games_changed"
+# Activé par défaut quand les shards sont répartis sur plusieurs processus
+CATALOG_LISTEN = os.getenv("CATALOG_LISTEN", "1" if SHARD_IDS else "0") == "1"
+INSTANCE_ID = uuid.uuid4().hex[:8]
+
+# Pondération des suggestions aléatoires (/proposejeu, /proposejeutype)
+SUGGEST_PEPITE_WEIGHT = float(os.getenv("SUGGEST_PEPITE_WEIGHT", "0.15"))
+SUGGEST_RECENT_WEIGHT = float(os.getenv("SUGGEST_RECENT_WEIGHT", "0.15"))
+SUGGEST_RECENT_DAYS = int(os.getenv("SUGGEST_RECENT_DAYS", "30"))
+SUGGEST_NO_REPEAT = int(os.getenv("SUGGEST_NO_REPEAT", "10"))
+
+
+def parse_types(types):
+    """Découpe la chaîne "FPS, Aventure" en tags normalisés ("fps", "aventure")."""
+    if not types:
+        return ()
+    return tuple(dict.fromkeys(t.strip().lower() for t in types.split(",") if t.strip()))
+
+
+def is_recent(record):
+    """Vrai si le jeu a été ajouté il y a moins de SUGGEST_RECENT_DAYS jours."""
+    if record.date_ajout is None:
+        return False
+    return datetime.datetime.now() - record.date_ajout < datetime.timedelta(days=SUGGEST_RECENT_DAYS)
+
+
+def format_types(tags, mode="et"):
+    """Libellé d'une recherche multi-types : "fps", "aventure" -> "Fps + Aventure" (ET) ou "Fps / Aventure" (OU)."""
+    separator = " / " if mode.strip().lower() == "ou" else " + "
+    return separator.join(tag.capitalize() for tag in tags)
+
+
+# Chaque fiche chargée ou réécrite reçoit un numéro de version unique (clé du cache des embeds)
+record_versions = itertools.count(1)
+
+
+class GameRecord:
+    """Fiche compacte d'un jeu telle que stockée dans le cache."""
+    __slots__ = (
+        "id", "nom", "release_date", "price", "type", "duration", "cloud_available",
+        "youtube_link", "steam_link", "commentaire", "date_ajout", "price_value",
+        "duration_hours", "tags", "version"
+    )
+
+    def __init__(self, row, tags=None):
+        (self.id, self.nom, self.release_date, self.price, self.type, self.duration,
+         self.cloud_available, self.youtube_link, self.steam_link, self.commentaire,
+         self.date_ajout, self.price_value, self.duration_hours) = row
+        self.tags = tuple(tags) if tags is not None else parse_types(self.type)
+        self.version = next(record_versions)
+
+    @property
+    def rounded_hours(self):
+        """Durée arrondie à l'heure, telle que comptée dans le temps total du bundle."""
+        return int(round(self.duration_hours)) if self.duration_hours is not None else None
+
+    @property
+    def key(self):
+        """Clé de recherche exacte, équivalente à TRIM(LOWER(nom)) côté SQL."""
+        return self.nom.strip().lower()
+
+
+class IdPool:
+    """Ensemble d'ids avec ajout, retrait et tirage aléatoire en O(1).
+
+    Les ids sont gardés dans une liste (tirage par index) et leur position dans un
+    dictionnaire : un retrait échange l'élément avec le dernier avant de le dépiler.
+    """
+    __slots__ = ("ids", "positions")
+
+    def __init__(self, ids=()):
+        self.ids = []
+        self.positions = {}
+        for game_id in ids:
+            self.add(game_id)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __iter__(self):
+        return iter(self.ids)
+
+    def __contains__(self, game_id):
+        return game_id in self.positions
+
+    def add(self, game_id):
+        if game_id not in self.positions:
+            self.positions[game_id] = len(self.ids)
+            self.ids.append(game_id)
+
+    def discard(self, game_id):
+        pos = self.positions.pop(game_id, None)
+        if pos is None:
+            return
+        last = self.ids.pop()
+        if last != game_id:
+            self.ids[pos] = last
+            self.positions[last] = pos
+
+    def clear(self):
+        self.ids.clear()
+        self.positions.clear()
+
+    def choice(self):
+        return random.choice(self.ids)
+
+
+class BundleStats:
+    """Totaux du bundle (nombre, prix, durée), globaux et par type.
+
+    Tenus à jour à chaque ajout/retrait de fiche : lire l'en-tête de /listejeux
+    ne demande aucun parcours du catalogue.
+    """
+
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        self.total = self._empty()
+        self.by_type = {}
+
+    @staticmethod
+    def _empty():
+        # [jeux, somme des prix, jeux avec prix, somme des heures, jeux avec durée]
+        return [0, Decimal(0), 0, 0, 0]
+
+    def add(self, record, sign=1):
+        for totals in [self.total] + [self.by_type.setdefault(tag, self._empty()) for tag in record.tags]:
+            totals[0] += sign
+            if record.price_value is not None:
+                totals[1] += sign * record.price_value
+                totals[2] += sign
+            if record.duration_hours is not None:
+                totals[3] += sign * record.rounded_hours
+                totals[4] += sign
+        if sign < 0:
+            for tag in record.tags:
+                if self.by_type[tag][0] == 0:
+                    del self.by_type[tag]
+
+    def remove(self, record):
+        self.add(record, sign=-1)
+
+    @staticmethod
+    def summary(totals):
+        """(jeux, prix total, prix moyen, heures totales, durée moyenne) ; moyennes à None si inconnues."""
+        count, price, priced, hours, timed = totals
+        return (
+            count, price, price / priced if priced else None,
+            hours, hours / timed if timed else None
+        )
+
+
+class GameCatalog:
+    """Copie en mémoire de la table games.
+
+    Chargée une fois au démarrage puis mise à jour fiche par fiche par les commandes
+    d'administration : les commandes de lecture n'interrogent plus PostgreSQL.
+    """
+
+    def __init__(self):
+        self.games = {}      # id -> GameRecord
+        self.by_name = {}    # nom normalisé -> id
+        self.by_type = {}    # index inversé tag -> IdPool
+        self.all_ids = IdPool()
+        self.pepites = IdPool()        # jeux présents dans pepite_games
+        self.pepite_names = set()
+        self.recent = IdPool()         # jeux ajoutés depuis moins de SUGGEST_RECENT_DAYS jours
+        self.stats = BundleStats()
+        self.search_index = GameSearchIndex()
+        self.loaded = False
+        self._sorted = None  # vues dérivées, recalculées à la première lecture après une modification
+        self._type_names = None
+
+    def __len__(self):
+        return len(self.games)
+
+    def load(self, rows, tags_by_id=None, pepite_names=()):
+        """Remplace le contenu du cache.
+
+        tags_by_id provient de la table game_types, pepite_names de la table pepite_games.
+        """
+        tags_by_id = tags_by_id or {}
+        self.games.clear()
+        self.by_name.clear()
+        self.by_type.clear()
+        self.all_ids.clear()
+        self.pepites.clear()
+        self.recent.clear()
+        self.pepite_names = {name.strip().lower() for name in pepite_names}
+        self.stats.clear()
+        self.search_index.clear()
+        game_cards.clear()
+        self._invalidate()
+        for row in rows:
+            self._index(GameRecord(row, tags_by_id.get(row[0], ())))
+        self.loaded = True
+
+    def upsert(self, row):
+        """Ajoute ou remplace une fiche à partir d'une ligne SELECT {GAME_COLUMNS}."""
+        record = GameRecord(row)
+        if record.id in self.games:
+            self._unindex(self.games[record.id])
+        self._index(record)
+        self._invalidate()
+        return record
+
+    def remove(self, game_id):
+        record = self.games.get(game_id)
+        if record is None:
+            return None
+        self._unindex(record)
+        self._invalidate()
+        return record
+
+    def get(self, game_id):
+        return self.games.get(game_id)
+
+    def find(self, name):
+        """Recherche exacte (insensible à la casse et aux espaces autour du nom)."""
+        game_id = self.by_name.get(name.strip().lower())
+        return self.games.get(game_id) if game_id is not None else None
+
+    def autocomplete(self, current, limit=25):
+        """Fiches dont le nom correspond à la saisie, les meilleures d'abord."""
+        return [self.games[i] for i in self.search_index.search(current, limit)]
+
+    def sorted_games(self):
+        """Toutes les fiches, triées par nom."""
+        if self._sorted is None:
+            self._sorted = sorted(self.games.values(), key=lambda g: g.nom.lower())
+        return self._sorted
+
+    def ids_with_types(self, tags, match_all=True):
+        """IdPool des jeux ayant tous les tags donnés (ET) ou au moins l'un d'eux (OU).
+
+        Pour un seul tag, c'est directement le pool de l'index inversé (aucune copie).
+        """
+        postings = [self.by_type.get(tag) or IdPool() for tag in tags]
+        if len(postings) == 1:
+            return postings[0]
+        if match_all:
+            postings.sort(key=len)
+            smallest, others = postings[0], postings[1:]
+            return IdPool(i for i in smallest if all(i in p for p in others))
+        return IdPool(i for p in postings for i in p)
+
+    def games_with_types(self, tags, match_all=True):
+        """Fiches ayant tous les tags donnés (ET) ou au moins l'un d'eux (OU), triées par nom."""
+        if not tags:
+            return []
+        ids = self.ids_with_types(tags, match_all)
+        return sorted((self.games[i] for i in ids), key=lambda g: g.nom.lower())
+
+    def type_names(self):
+        """Liste triée des types disponibles, tels qu'affichés ("Aventure")."""
+        if self._type_names is None:
+            self._type_names = sorted({t.capitalize() for t in self.by_type})
+        return self._type_names
+
+    def _index(self, record):
+        self.games[record.id] = record
+        self.by_name[record.key] = record.id
+        self.all_ids.add(record.id)
+        if record.key in self.pepite_names:
+            self.pepites.add(record.id)
+        if is_recent(record):
+            self.recent.add(record.id)
+        self.stats.add(record)
+        self.search_index.add(record.id, record.nom)
+        for tag in record.tags:
+            self.by_type.setdefault(tag, IdPool()).add(record.id)
+
+    def _unindex(self, record):
+        del self.games[record.id]
+        if self.by_name.get(record.key) == record.id:
+            del self.by_name[record.key]
+        game_cards.invalidate(record.id)
+        self.all_ids.discard(record.id)
+        self.pepites.discard(record.id)
+        self.recent.discard(record.id)
+        self.stats.remove(record)
+        self.search_index.remove(record.id)
+        for tag in record.tags:
+            ids = self.by_type.get(tag)
+            if ids is not None:
+                ids.discard(record.id)
+                if not ids:
+                    del self.by_type[tag]
+
+    def _invalidate(self):
+        self._sorted = None
+        self._type_names = None
+
+
+catalog = GameCatalog()
+
+
+def notify_catalog_change(cur, ids):
+    """Prévient les autres instances (NOTIFY), à appeler dans la transaction d'écriture."""
+    payload = f"{INSTANCE_ID}:{','.join(str(i) for i in ids)}"
+    if len(payload) > 7000:  # limite de 8000 octets pour un NOTIFY : on demande un rechargement complet
+        payload = f"{INSTANCE_ID}:*"
+    cur.execute("SELECT pg_notify(%s, %s)", (CATALOG_CHANNEL, payload))
+
+
+async def reload_catalog():
+    def work(cur):
+        cur.execute(f"SELECT {GAME_COLUMNS} FROM games")
+        rows = cur.fetchall()
+        cur.execute("SELECT game_id, tag FROM game_types ORDER BY game_id, tag")
+        tag_rows = cur.fetchall()
+        cur.execute("SELECT game_name FROM pepite_games")
+        return rows, tag_rows, [row[0] for row in cur.fetchall()]
+    rows, tag_rows, pepite_names = await db_run(work)
+    tags_by_id = {}
+    for game_id, tag in tag_rows:
+        tags_by_id.setdefault(game_id, []).append(tag)
+    catalog.load(rows, tags_by_id, pepite_names)
+    print(f"📚 Catalogue chargé en mémoire : {len(catalog)} jeux")
+
+
+async def refresh_catalog_games(ids):
+    """Relit quelques fiches depuis la base (les fiches disparues sont retirées du cache)."""
+    rows = await db_fetchall(f"SELECT {GAME_COLUMNS} FROM games WHERE id = ANY(%s)", (list(ids),))
+    for row in rows:
+        catalog.upsert(row)
+    for game_id in set(ids) - {row[0] for row in rows}:
+        catalog.remove(game_id)
+
+
+def sync_numeric_columns(cur, rows):
+    """Recalcule price_value / duration_hours des jeux écrits ; renvoie les lignes à jour."""
+    synced, changed = [], []
+    for row in rows:
+        price_value, duration_hours = parse_price(row[3]), parse_duration(row[5])
+        if (price_value, duration_hours) != tuple(row[11:13]):
+            changed.append((price_value, duration_hours, row[0]))
+        synced.append(tuple(row[:11]) + (price_value, duration_hours))
+    if changed:
+        psycopg2.extras.execute_values(cur, '''
+            UPDATE games SET price_value = v.price_value::NUMERIC, duration_hours = v.duration_hours::REAL
+            FROM (VALUES %s) AS v(price_value, duration_hours, id)
+            WHERE games.id = v.id
+        ''', changed)
+    return synced
+
+
+def sync_game_types(cur, rows):
+    """Réécrit les lignes game_types des jeux écrits à partir de leur colonne type."""
+    ids = [row[0] for row in rows]
+    cur.execute("DELETE FROM game_types WHERE game_id = ANY(%s)", (ids,))
+    values = [(row[0], tag) for row in rows for tag in parse_types(row[4])]
+    if values:
+        psycopg2.extras.execute_values(cur, "INSERT INTO game_types (game_id, tag) VALUES %s", values)
+
+
+async def save_games(query, params=(), values=None):
+    """Écriture sur games se terminant par RETURNING {GAME_COLUMNS}.
+
+    Avec `values`, la requête contient un unique VALUES %s rempli par execute_values
+    (insertion multi-lignes). Met à jour les colonnes dérivées (prix/durée numériques,
+    tags), le cache, et notifie les autres instances. Renvoie les fiches écrites.
+    """
+    def work(cur):
+        if values is None:
+            cur.execute(query, params)
+            rows = cur.fetchall()
+        else:
+            rows = psycopg2.extras.execute_values(cur, query, values, page_size=500, fetch=True)
+        if rows:
+            rows = sync_numeric_columns(cur, rows)
+            sync_game_types(cur, rows)
+            notify_catalog_change(cur, [row[0] for row in rows])
+        return rows
+    rows = await db_run(work)
+    return [catalog.upsert(row) for row in rows]
+
+
+async def delete_games(query, params=()):
+    """Suppression sur games se terminant par RETURNING id. Renvoie les fiches retirées."""
+    def work(cur):
+        cur.execute(query, params)
+        ids = [row[0] for row in cur.fetchall()]
+        if ids:
+            notify_catalog_change(cur, ids)
+        return ids
+    ids = await db_run(work)
+    return [record for record in (catalog.remove(i) for i in ids) if record]
+
+
+async def apply_remote_catalog_change(payload):
+    if payload == "*":
+        await reload_catalog()
+    else:
+        await refresh_catalog_games([int(i) for i in payload.split(",") if i])
+
+
+def listen_catalog_changes(loop):
+    """Thread d'écoute LISTEN/NOTIFY : applique les modifications faites par les autres instances."""
+    reconnecting = False
+    while True:
+        try:
+            listen_conn = psycopg2.connect(DATABASE_URL, sslmode=DB_SSLMODE, client_encoding="UTF8")
+            listen_conn.autocommit = True
+            with listen_conn.cursor() as cur:
+                cur.execute(f"LISTEN {CATALOG_CHANNEL}")
+            print("👂 Écoute des modifications du catalogue (LISTEN/NOTIFY)")
+            if reconnecting:
+                # Des notifications ont pu être perdues pendant la coupure
+                asyncio.run_coroutine_threadsafe(reload_catalog(), loop)
+            while True:
+                if select.select([listen_conn], [], [], 60) == ([], [], []):
+                    continue
+                listen_conn.poll()
+                while listen_conn.notifies:
+                    notify = listen_conn.notifies.pop(0)
+                    instance, _, payload = notify.payload.partition(":")
+                    if instance != INSTANCE_ID:
+                        asyncio.run_coroutine_threadsafe(apply_remote_catalog_change(payload), loop)
+        except Exception as e:
+            print(f"❌ Écoute du catalogue interrompue : {e}")
+            reconnecting = True
+            time.sleep(5)
+
+
+############################################
+#         FICHE D'UN JEU (EMBED)
+############################################
+
+GAME_CARD_CACHE_SIZE = int(os.getenv("GAME_CARD_CACHE_SIZE", "512"))
+
+
+class GameCardRenderer:
+    """Rendu unique de la fiche d'un jeu, utilisé par toutes les commandes.
+
+    Les embeds sont gardés sérialisés (to_dict) dans un cache LRU indexé par id de jeu,
+    et reconstruits dès que la version de la fiche change.
+    """
+
+    def __init__(self, max_size=GAME_CARD_CACHE_SIZE):
+        self.max_size = max_size
+        self.cache = OrderedDict()  # id -> (version, payload)
+
+    def render(self, record):
+        cached = self.cache.get(record.id)
+        if cached is not None and cached[0] == record.version:
+            self.cache.move_to_end(record.id)
+            payload = cached[1]
+        else:
+            payload = self.build(record).to_dict()
+            self.cache[record.id] = (record.version, payload)
+            self.cache.move_to_end(record.id)
+            if len(self.cache) > self.max_size:
+                self.cache.popitem(last=False)
+        # from_dict garde des références aux listes du dict : copie, pour qu'un add_field
+        # sur l'embed rendu ne modifie pas la fiche en cache
+        return discord.Embed.from_dict(copy.deepcopy(payload))
+
+    def invalidate(self, game_id):
+        self.cache.pop(game_id, None)
+
+    def clear(self):
+        self.cache.clear()
+
+    @staticmethod
+    def build(record):
+        embed = discord.Embed(title=f"🎮 {record.nom.capitalize()}", color=discord.Color.blue())
+        embed.add_field(name="📅 Date de sortie", value=record.release_date or "—", inline=False)
+        embed.add_field(name="💰 Prix", value=record.price or "—", inline=False)
+        embed.add_field(name="🎮 Type", value=(record.type or "—").capitalize(), inline=False)
+        embed.add_field(name="⏳ Durée", value=record.duration or "—", inline=False)
+        embed.add_field(name="☁️ Cloud disponible", value=record.cloud_available or "—", inline=False)
+        if record.youtube_link and record.youtube_link.strip():
+            embed.add_field(name="▶️ Gameplay YouTube", value=f"[Voir ici]({record.youtube_link})", inline=False)
+        if record.steam_link and record.steam_link.strip():
+            embed.add_field(name="🛒 Page Steam", value=f"[Voir sur Steam]({record.steam_link})", inline=False)
+        if record.commentaire:
+            embed.add_field(name="ℹ️ Commentaire", value=record.commentaire, inline=False)
+        return embed
+
+
+game_cards = GameCardRenderer()
+
+
+############################################
+#         SUGGESTIONS ALÉATOIRES
+############################################
+
+# Dernières suggestions faites à chaque utilisateur (fenêtre anti-répétition)
+suggestion_history = OrderedDict()
+SUGGESTION_HISTORY_USERS = 5000
+
+
+def pick_suggestion(candidates, user_id, excluded=()):
+    """Tire un id dans `candidates` (IdPool) en O(1) en moyenne.
+
+    Les pépites et les jeux récents ont une chance supplémentaire d'être tirés ;
+    les ids exclus (favoris) et les dernières suggestions de l'utilisateur sont évités.
+    """
+    if not candidates:
+        return None
+    history = suggestion_history.get(user_id)
+    if history is None:
+        history = suggestion_history[user_id] = deque(maxlen=SUGGEST_NO_REPEAT)
+        if len(suggestion_history) > SUGGESTION_HISTORY_USERS:
+            suggestion_history.popitem(last=False)
+    else:
+        suggestion_history.move_to_end(user_id)
+    excluded = set(excluded)
+    blocked = excluded.union(history)
+
+    choice = None
+    for _ in range(20):
+        roll = random.random()
+        pool = candidates
+        if roll < SUGGEST_PEPITE_WEIGHT and catalog.pepites:
+            pool = catalog.pepites
+        elif roll < SUGGEST_PEPITE_WEIGHT + SUGGEST_RECENT_WEIGHT and catalog.recent:
+            pool = catalog.recent
+        game_id = pool.choice()
+        if pool is catalog.recent and not is_recent(catalog.games[game_id]):
+            catalog.recent.discard(game_id)
+            continue
+        if game_id in candidates and game_id not in blocked:
+            choice = game_id
+            break
+
+    if choice is None:
+        # Presque tout est bloqué : tirage exact parmi les candidats restants,
+        # en oubliant l'historique s'il couvre tout le pool
+        remaining = [i for i in candidates if i not in blocked] or [i for i in candidates if i not in excluded]
+        if not remaining:
+            return None
+        choice = random.choice(remaining)
+
+    history.append(choice)
+    return choice
+
+
+############################################
+#         RECHERCHE
+############################################
+
+SEARCH_LIMIT = 25
+# Seuil de word_similarity (pg_trgm) au-delà duquel un nom est considéré comme proche
+SEARCH_TRGM_THRESHOLD = float(os.getenv("SEARCH_TRGM_THRESHOLD", "0.4"))
+
+
+class GameSearch:
+    """Recherche classée dans le catalogue pour /recherche et les suggestions de /fiche.
+
+    PostgreSQL fait le classement : plein texte (colonne search_vector, racines françaises)
+    et, si pg_trgm est installé, similarité des trigrammes sur le nom. Les résultats sont
+    complétés par l'index en mémoire (préfixes, puis noms proches), qui sert aussi de
+    repli complet quand la colonne n'existe pas ou que la requête échoue.
+    """
+
+    def __init__(self):
+        self.fulltext = False
+        self.config = "french"
+        self.trigram = False
+
+    def detect(self, cur):
+        """Relève ce que la base sait faire (appelé après les migrations)."""
+        cur.execute("SELECT 1 FROM information_schema.columns WHERE table_name = 'games' AND column_name = 'search_vector'")
+        self.fulltext = cur.fetchone() is not None
+        cur.execute("SELECT 1 FROM pg_ts_config WHERE cfgname = 'fr_unaccent'")
+        self.config = "fr_unaccent" if cur.fetchone() else "french"
+        cur.execute("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")
+        self.trigram = cur.fetchone() is not None
+        print(
+            f"🔎 Recherche : plein texte {'✅' if self.fulltext else '❌'} ({self.config}), "
+            f"trigrammes {'✅' if self.trigram else '❌'}"
+        )
+
+    async def search(self, text, limit=SEARCH_LIMIT):
+        """Fiches correspondant à `text`, de la plus pertinente à la moins pertinente."""
+        found = []
+        if self.fulltext and text.strip():
+            try:
+                found = await db_run(self._query, text, limit)
+            except psycopg2.Error as e:
+                print(f"⚠️ Recherche en base impossible, repli sur l'index en mémoire : {e}")
+        seen = set(found)
+        for game_id in itertools.chain(catalog.search_index.search(text, limit), self.suggest_ids(text, limit)):
+            if len(found) >= limit:
+                break
+            if game_id not in seen:
+                seen.add(game_id)
+                found.append(game_id)
+        # Une fiche ajoutée par une autre instance peut ne pas encore être dans le catalogue
+        return [catalog.games[game_id] for game_id in found if game_id in catalog.games]
+
+    def suggest_ids(self, text, limit=5):
+        """Noms proches en mémoire, sans aller en base (fautes de frappe)."""
+        return catalog.search_index.fuzzy(text, limit)
+
+    def _query(self, cur, text, limit):
+        params = {"config": self.config, "text": text, "name": text.strip().lower(), "limit": limit}
+        if self.trigram:
+            cur.execute("SET LOCAL pg_trgm.word_similarity_threshold = %s", (SEARCH_TRGM_THRESHOLD,))
+            cur.execute('''
+                SELECT g.id
+                FROM games g, websearch_to_tsquery(%(config)s::regconfig, %(text)s) AS q(tsq)
+                WHERE g.search_vector @@ q.tsq OR %(name)s <%% LOWER(g.nom)
+                ORDER BY ts_rank(g.search_vector, q.tsq) + word_similarity(%(name)s, LOWER(g.nom)) DESC, g.nom
+                LIMIT %(limit)s
+            ''', params)
+        else:
+            cur.execute('''
+                SELECT g.id
+                FROM games g, websearch_to_tsquery(%(config)s::regconfig, %(text)s) AS q(tsq)
+                WHERE g.search_vector @@ q.tsq
+                ORDER BY ts_rank(g.search_vector, q.tsq) DESC, g.nom
+                LIMIT %(limit)s
+            ''', params)
+        return [row[0] for row in cur.fetchall()]
+
+
+game_search = GameSearch()
+
+
+############################################
+#         CACHE DES FAVORIS
+############################################
+
+FAVORITES_TTL = float(os.getenv("FAVORITES_TTL", "600"))
+FAVORITES_CACHE_BYTES = int(os.getenv("FAVORITES_CACHE_BYTES", str(4 * 1024 * 1024)))
+# Estimation de la mémoire d'une entrée : l'entrée elle-même, plus chaque id du set
+FAVORITES_ENTRY_BYTES = 300
+FAVORITES_ID_BYTES = 64
+
+
+class FavoritesCache:
+    """Ids des jeux favoris de chaque utilisateur, gardés en mémoire.
+
+    LRU borné par une estimation de la mémoire occupée ; chaque entrée expire après
+    FAVORITES_TTL (modifications faites par une autre instance). /fav, /unfav et le
+    bouton ⭐ écrivent en base puis dans le cache (write-through) : les autocomplétions
+    et /favoris ne lisent que la mémoire.
+    """
+
+    def __init__(self):
+        self.entries = OrderedDict()  # user_id -> (expiration, set d'ids)
+        self.size = 0
+        self.loading = {}             # user_id -> tâche de chargement en cours
+        self.dirty = set()            # utilisateurs modifiés pendant leur chargement
+        self.hits = 0
+        self.misses = 0
+        self.listeners = {}           # nom -> fonction(user_id, game_id, présent), après chaque changement
+
+    async def get(self, user_id):
+        """Set des ids favoris (à ne pas modifier)."""
+        entry = self.entries.get(user_id)
+        if entry is not None and entry[0] > time.monotonic():
+            self.entries.move_to_end(user_id)
+            self.hits += 1
+            return entry[1]
+        self.misses += 1
+        task = self.loading.get(user_id)
+        if task is None:
+            task = self.loading[user_id] = asyncio.ensure_future(self._load(user_id))
+            task.add_done_callback(lambda _: self.loading.pop(user_id, None))
+        return await asyncio.shield(task)
+
+    def clear(self):
+        self.entries.clear()
+        self.size = 0
+
+    async def add(self, user_id, game_id):
+        """Ajoute un favori. Renvoie False s'il y était déjà."""
+        added = await db_execute(
+            "INSERT INTO user_favorites (user_id, game_id) VALUES (%s, %s) ON CONFLICT DO NOTHING",
+            (user_id, game_id)
+        )
+        self._write(user_id, game_id, True)
+        if added:
+            self._notify(user_id, game_id, True)
+        return added > 0
+
+    async def remove(self, user_id, game_id):
+        """Retire un favori. Renvoie False s'il n'y était pas."""
+        deleted = await db_execute(
+            "DELETE FROM user_favorites WHERE user_id = %s AND game_id = %s", (user_id, game_id)
+        )
+        self._write(user_id, game_id, False)
+        if deleted:
+            self._notify(user_id, game_id, False)
+        return deleted > 0
+
+    async def _load(self, user_id):
+        while True:
+            self.dirty.discard(user_id)
+            rows = await db_fetchall("SELECT game_id FROM user_favorites WHERE user_id = %s", (user_id,))
+            if user_id not in self.dirty:
+                break
+        ids = {row[0] for row in rows}
+        self._drop(user_id)
+        self.entries[user_id] = (time.monotonic() + FAVORITES_TTL, ids)
+        self.size += FAVORITES_ENTRY_BYTES + FAVORITES_ID_BYTES * len(ids)
+        while self.size > FAVORITES_CACHE_BYTES and len(self.entries) > 1:
+            self._drop(next(iter(self.entries)))
+        return ids
+
+    def _write(self, user_id, game_id, present):
+        if user_id in self.loading:
+            self.dirty.add(user_id)
+        entry = self.entries.get(user_id)
+        if entry is None:
+            return
+        ids = entry[1]
+        if present and game_id not in ids:
+            ids.add(game_id)
+            self.size += FAVORITES_ID_BYTES
+        elif not present and game_id in ids:
+            ids.discard(game_id)
+            self.size -= FAVORITES_ID_BYTES
+
+    def _drop(self, user_id):
+        entry = self.entries.pop(user_id, None)
+        if entry is not None:
+            self.size -= FAVORITES_ENTRY_BYTES + FAVORITES_ID_BYTES * len(entry[1])
+
+    def _notify(self, user_id, game_id, present):
+        for listener in list(self.listeners.values()):
+            listener(user_id, game_id, present)
+
+
+favorites = FavoritesCache()
+
+
+############################################
+#         FILE D'ENVOI DES MESSAGES
+############################################
+
+# Limites Discord : 5 messages / 5 s par salon, 50 requêtes / s pour tout le bot
+CHANNEL_RATE = (5, 5.0)
+GLOBAL_RATE = (50, 1.0)
+COALESCE_WINDOW = 2.0   # secondes pendant lesquelles les annonces similaires sont regroupées
+SEND_MAX_ATTEMPTS = 5
+
+# Titre du message récapitulatif de chaque type d'annonce regroupable
+DIGEST_TITLES = {
+    "jeux_ajoutes": "📣 {count} jeux viennent d'être ajoutés !",
+}
+
+
+class TokenBucket:
+    """Seau à jetons : `capacity` envois par période de `period` secondes."""
+
+    def __init__(self, capacity, period):
+        self.capacity = capacity
+        self.rate = capacity / period
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+
+    def pause(self, seconds):
+        """Bloque le seau (réponse 429 de Discord)."""
+        self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+
+    async def acquire(self):
+        while True:
+            now = time.monotonic()
+            if now < self.blocked_until:
+                await asyncio.sleep(self.blocked_until - now)
+                continue
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return
+            await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class OutgoingMessage:
+    __slots__ = ("channel", "content", "embed", "attempts")
+
+    def __init__(self, channel, content, embed):
+        self.channel = channel
+        self.content = content
+        self.embed = embed
+        self.attempts = 0
+
+
+class MessageQueue:
+    """File d'envoi centrale des messages du bot (annonces, messages de résolution...).
+
+    `send` rend la main immédiatement. Chaque salon a sa propre file, vidée par une
+    tâche dédiée qui respecte les limites du salon et la limite globale, et réessaie
+    avec attente croissante en cas de 429 ou d'erreur serveur. Les annonces portant
+    une clé de regroupement sont fusionnées en un récapitulatif si elles arrivent en rafale.
+    """
+
+    def __init__(self):
+        self.global_bucket = TokenBucket(*GLOBAL_RATE)
+        self.buckets = {}    # id du salon -> TokenBucket
+        self.pending = {}    # id du salon -> deque de OutgoingMessage
+        self.workers = {}    # id du salon -> tâche d'envoi
+        self.digests = {}    # (id du salon, clé) -> [(contenu, embed, ligne du récapitulatif)]
+
+    def send(self, channel, content=None, embed=None, coalesce_key=None, digest_line=None):
+        if channel is None:
+            return
+        if coalesce_key is None:
+            self._enqueue(OutgoingMessage(channel, content, embed))
+            return
+        key = (channel.id, coalesce_key)
+        group = self.digests.get(key)
+        if group is None:
+            group = self.digests[key] = []
+            asyncio.get_running_loop().call_later(COALESCE_WINDOW, self._flush_digest, channel, coalesce_key)
+        group.append((content, embed, digest_line or content))
+
+    def queued(self):
+        """Nombre de messages en attente d'envoi."""
+        return sum(len(messages) for messages in self.pending.values()) + sum(len(g) for g in self.digests.values())
+
+    def _flush_digest(self, channel, coalesce_key):
+        group = self.digests.pop((channel.id, coalesce_key), [])
+        if len(group) == 1:
+            content, embed, _ = group[0]
+            self._enqueue(OutgoingMessage(channel, content, embed))
+        elif group:
+            lines, description = [line for _, _, line in group], ""
+            for index, line in enumerate(lines):
+                if len(description) + len(line) + 3 > 4000:
+                    description += f"… et {len(lines) - index} autres"
+                    break
+                description += f"• {line}\n"
+            title = DIGEST_TITLES.get(coalesce_key, "📣 {count} annonces").format(count=len(group))
+            embed = discord.Embed(title=title, description=description, color=discord.Color.blue())
+            self._enqueue(OutgoingMessage(channel, None, embed))
+
+    def _enqueue(self, message):
+        channel_id = message.channel.id
+        self.pending.setdefault(channel_id, deque()).append(message)
+        if channel_id not in self.workers:
+            self.workers[channel_id] = start_background_task(self._drain(channel_id))
+
+    async def _drain(self, channel_id):
+        bucket = self.buckets.setdefault(channel_id, TokenBucket(*CHANNEL_RATE))
+        messages = self.pending[channel_id]
+        try:
+            while messages:
+                message = messages[0]
+                await bucket.acquire()
+                await self.global_bucket.acquire()
+                try:
+                    await message.channel.send(message.content, embed=message.embed)
+                    messages.popleft()
+                except (discord.RateLimited, discord.HTTPException) as e:
+                    message.attempts += 1
+                    status = getattr(e, "status", 429)  # RateLimited n'a pas de statut HTTP
+                    retryable = status == 429 or status >= 500
+                    if not retryable or message.attempts >= SEND_MAX_ATTEMPTS:
+                        print(f"❌ Message abandonné dans {message.channel} après {message.attempts} essai(s) : {e}")
+                        messages.popleft()
+                        continue
+                    delay = getattr(e, "retry_after", None) or min(60, 2 ** message.attempts)
+                    print(f"⏳ Envoi limité dans {message.channel}, nouvel essai dans {delay:.1f} s")
+                    bucket.pause(delay)
+                    if status == 429 and getattr(e, "is_global", False):
+                        self.global_bucket.pause(delay)
+                except Exception as e:
+                    print(f"❌ Erreur lors de l'envoi d'un message dans {message.channel} : {e}")
+                    messages.popleft()
+        finally:
+            del self.workers[channel_id]
+            if not messages:
+                self.pending.pop(channel_id, None)
+
+
+outbox = MessageQueue()
+
+
+background_tasks = set()
+
+
+def start_background_task(coro):
+    task = asyncio.create_task(coro)
+    background_tasks.add(task)
+    task.add_done_callback(background_tasks.discard)
+    return task
+
+
+# Sous-systèmes autonomes, un module chacun : setup(bot) y ajoute leurs commandes, leurs tâches
+# de fond, leurs métriques et leur partie de /stats. Importés une seule fois (pas de
+# load_extension, qui réexécuterait voice.py déjà importé par __main__ pour l'écoute vocale).
+SUBSYSTEMS = ("voice", "recommender", "steam_enrichment")
+
+# Nom -> fonction(serveur, jeux) appelée après /ajoutjeu et /ajoutjeux (annonces vocales...)
+games_added_listeners = {}
+
+
+@bot.event
+async def setup_hook():
+    loop_diagnostics.attach(asyncio.get_running_loop())
+    start_background_task(monitor_loop_lag())
+    await start_metrics_server(SHARD_IDS)
+    startup_timings["import"] = time.perf_counter() - STARTED_AT
+
+    started = time.perf_counter()
+    open_database()
+    await asyncio.get_running_loop().run_in_executor(db_executor, run_migrations)
+    await db_run(game_search.detect)
+    startup_timings["migrations"] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    await asyncio.gather(reload_catalog(), load_personal_channels(), load_guild_configs())
+    startup_timings["caches"] = time.perf_counter() - started
+    for name in SUBSYSTEMS:
+        await importlib.import_module(name).setup(bot)
+    if CATALOG_LISTEN:
+        threading.Thread(
+            target=listen_catalog_changes, args=(asyncio.get_running_loop(),),
+            name="catalog-listen", daemon=True
+        ).start()
 
 @bot.event
 async def on_ready():
     print(f"✅ Bot connecté en tant que {bot.user}")
+    if "prêt" not in startup_timings:
+        startup_timings["prêt"] = time.perf_counter() - STARTED_AT
+        print("🚀 Démarrage : " + ", ".join(f"{phase} {seconds:.2f} s" for phase, seconds in startup_timings.items()))
+    if not personal_channels.rebuilt:
+        await personal_channels.rebuild(bot.guilds)
     await bot.change_presence(activity=discord.Game(name="Snake 🐍"))
-    
-    if bot.user.name != "Clank 2.0":
+
+    # Le compte du bot est commun à tous les processus : seul celui du shard 0 le renomme
+    if bot.user.name != "Clank 2.0" and 0 in (bot.shard_ids or [0]):
         try:
             await bot.user.edit(username="Clank 2.0")
             print("✅ Nom du bot mis à jour !")
         except discord.errors.HTTPException as e:
             print(f"❌ Impossible de changer le nom : {e}")
 
-def save_database():
-    """Sauvegarde immédiate des changements dans PostgreSQL."""
-    conn.commit()
-    print("📂 Base de données sauvegardée avec succès.")
-
 ############################################
 #         COMMANDES SLASH
 ############################################
@@ -131,26 +1618,9 @@ async def fiche(interaction: discord.Interaction, game: str):
     """Affiche la fiche d'un jeu dont le nom est fourni."""
     game_query = game.strip().lower()
     try:
-        cursor.execute("""
-            SELECT nom, release_date, price, type, duration, cloud_available, youtube_link, steam_link, commentaire
-            FROM games
-            WHERE TRIM(LOWER(nom)) = %s
-        """, (game_query,))
-        game_info = cursor.fetchone()
+        game_info = catalog.find(game_query)
         if game_info:
-            embed = discord.Embed(
-                title=f"🎮 {game_info[0].capitalize()}",
-                color=discord.Color.blue()
-            )
-            embed.add_field(name="📅 Date de sortie", value=game_info[1], inline=False)
-            embed.add_field(name="💰 Prix", value=game_info[2], inline=False)
-            embed.add_field(name="🎮 Type", value=game_info[3].capitalize(), inline=False)
-            embed.add_field(name="⏳ Durée", value=game_info[4], inline=False)
-            embed.add_field(name="☁️ Cloud disponible", value=game_info[5], inline=False)
-            embed.add_field(name="▶️ Gameplay YouTube", value=f"[Voir ici]({game_info[6]})", inline=False)
-            embed.add_field(name="🛒 Page Steam", value=f"[Voir sur Steam]({game_info[7]})", inline=False)
-            if game_info[8]:
-                embed.add_field(name="ℹ️ Commentaire", value=game_info[8], inline=False)
+            embed = game_cards.render(game_info)
 
             view = discord.ui.View()
 
@@ -159,126 +1629,470 @@ async def fiche(interaction: discord.Interaction, game: str):
                     super().__init__(style=discord.ButtonStyle.primary, emoji="⭐", label="Ajouter aux favoris")
                 async def callback(self, interaction: discord.Interaction):
                     try:
-                        cursor.execute("INSERT INTO user_favorites (user_id, game) VALUES (%s, %s) ON CONFLICT DO NOTHING", (interaction.user.id, game_info[0]))
-                        conn.commit()
-                        await interaction.response.send_message(f"✅ **{game_info[0].capitalize()}** ajouté à vos favoris !", ephemeral=True)
+                        await favorites.add(interaction.user.id, game_info.id)
+                        await interaction.response.send_message(f"✅ **{game_info.nom.capitalize()}** ajouté à vos favoris !", ephemeral=True)
                     except Exception as e:
-                        conn.rollback()
                         await interaction.response.send_message(f"❌ Erreur lors de l'ajout aux favoris : {str(e)}", ephemeral=True)
 
             view.add_item(FavButton())
             await interaction.response.send_message(embed=embed, view=view)
         else:
-            await interaction.response.send_message(f"❌ Aucun jeu trouvé avec le nom '{game_query}'.", ephemeral=True)
+            message = f"❌ Aucun jeu trouvé avec le nom '{game_query}'."
+            close = [catalog.games[game_id].nom.capitalize() for game_id in game_search.suggest_ids(game_query)]
+            if close:
+                message += "\n🔎 Vouliez-vous dire : " + ", ".join(f"**{name}**" for name in close) + " ?"
+            await interaction.response.send_message(message, ephemeral=True)
     except Exception as e:
-        conn.rollback()
         await interaction.response.send_message(f"❌ Erreur SQL: {str(e)}", ephemeral=True)
 
 @fiche.autocomplete("game")
 async def fiche_autocomplete(interaction: discord.Interaction, current: str):
-    current_lower = current.lower().strip()
+    suggestions = [game.nom.capitalize() for game in catalog.autocomplete(current)]
+    return [app_commands.Choice(name=name, value=name) for name in suggestions]
+
+@bot.tree.command(name="recherche", description="Recherche un jeu par nom, type ou commentaire (fautes de frappe tolérées)")
+async def recherche(interaction: discord.Interaction, texte: str):
+    """Résultats classés par pertinence, une page à la fois."""
     try:
-        cursor.execute("""
-            SELECT nom FROM games
-            WHERE LOWER(nom) LIKE %s
-            ORDER BY nom ASC
-            LIMIT 25
-        """, (f"%{current_lower}%",))
-        results = cursor.fetchall()
-        suggestions = [row[0].capitalize() for row in results]
-        return [app_commands.Choice(name=name, value=name) for name in suggestions]
+        results = await game_search.search(texte)
+        if not results:
+            await interaction.response.send_message(f"❌ Aucun jeu ne correspond à '{texte.strip()}'.", ephemeral=True)
+            return
+        source = ListPageSource(
+            f"🔎 Résultats pour '{texte.strip()}'", results,
+            lambda game: f"• **{game.nom.capitalize()}** ({(game.type or '—').capitalize()})"
+        )
+        await Paginator(source).start(interaction.response.send_message)
     except Exception as e:
-        conn.rollback()
-        return []
+        await interaction.response.send_message(f"❌ Erreur lors de la recherche : {str(e)}", ephemeral=True)
 
 import asyncio
 
-@bot.event
-async def on_member_join(member):
-    guild = member.guild
+############################################
+#         CONFIGURATION DES SERVEURS
+############################################
 
-    print(f"🔹 Nouveau membre : {member.name}")
+# Noms utilisés tant qu'un serveur n'a pas choisi ses salons et son rôle avec /config
+DEFAULT_ANNOUNCE_CHANNEL = os.getenv("DEFAULT_ANNOUNCE_CHANNEL", "général")
+DEFAULT_STAFF_CHANNEL = os.getenv("DEFAULT_STAFF_CHANNEL", "mrbalooum")
+ACCESS_ROLE_NAME = os.getenv("DEFAULT_ACCESS_ROLE", "UserAccess")
 
-    # Vérification du rôle UserAccess
-    role = discord.utils.get(guild.roles, name="UserAccess")
-    if role is None:
-        role = await guild.create_role(name="UserAccess")
-        print("✅ Rôle UserAccess créé")
-
-    # Ajouter le rôle au membre
-    await member.add_roles(role)
-    print(f"✅ Rôle UserAccess ajouté à {member.name}")
-
-    # Définition du nom du salon
-    channel_name = member.name.lower().replace(" ", "-")
-
-    # Vérifier si un salon avec ce nom existe déjà et le supprimer
-    existing_channel = discord.utils.get(guild.text_channels, name=channel_name)
-    if existing_channel:
-        print(f"🗑️ Suppression de l'ancien salon {existing_channel.name}")
-        await existing_channel.delete(reason="Création d'un nouveau salon personnel.")
-
-    # Définition des permissions du salon
-    overwrites = {
-        guild.default_role: discord.PermissionOverwrite(view_channel=False),
-        member: discord.PermissionOverwrite(view_channel=True, send_messages=True, read_message_history=True),
-        role: discord.PermissionOverwrite(view_channel=True, send_messages=True, read_message_history=True)
-    }
 
-    # Création du salon textuel
+class GuildConfig:
+    """Réglages d'un serveur : ids Discord, None = repli sur le nom par défaut."""
+
+    __slots__ = ("announce_channel_id", "staff_channel_id", "access_role_id")
+
+    def __init__(self, announce_channel_id=None, staff_channel_id=None, access_role_id=None):
+        self.announce_channel_id = announce_channel_id
+        self.staff_channel_id = staff_channel_id
+        self.access_role_id = access_role_id
+
+
+class GuildConfigCache:
+    """Table guild_config gardée en mémoire, chargée une fois au démarrage.
+
+    Un serveur n'est servi que par un shard, donc par un seul processus : c'est lui qui
+    modifie sa configuration (en base, puis en mémoire), les autres n'ont pas à la relire.
+    """
+
+    def __init__(self):
+        self.configs = {}  # id du serveur -> GuildConfig
+
+    def load(self, rows):
+        for guild_id, *values in rows:
+            self.configs[guild_id] = GuildConfig(*values)
+
+    def get(self, guild_id):
+        return self.configs.get(guild_id) or GuildConfig()
+
+    async def update(self, guild_id, **values):
+        current = self.get(guild_id)
+        config = GuildConfig(current.announce_channel_id, current.staff_channel_id, current.access_role_id)
+        for name, value in values.items():
+            setattr(config, name, value)
+        await db_execute('''
+            INSERT INTO guild_config (guild_id, announce_channel_id, staff_channel_id, access_role_id)
+            VALUES (%s, %s, %s, %s)
+            ON CONFLICT (guild_id) DO UPDATE SET
+                announce_channel_id = EXCLUDED.announce_channel_id,
+                staff_channel_id = EXCLUDED.staff_channel_id,
+                access_role_id = EXCLUDED.access_role_id
+        ''', (guild_id, config.announce_channel_id, config.staff_channel_id, config.access_role_id))
+        self.configs[guild_id] = config
+        return config
+
+    def announce_channel(self, guild):
+        """Salon des annonces (ajouts, suppressions, demandes), ou None."""
+        return self._channel(guild, self.get(guild.id).announce_channel_id, DEFAULT_ANNOUNCE_CHANNEL)
+
+    def staff_channel(self, guild):
+        """Salon où arrivent les problèmes signalés, ou None."""
+        return self._channel(guild, self.get(guild.id).staff_channel_id, DEFAULT_STAFF_CHANNEL)
+
+    @staticmethod
+    def _channel(guild, channel_id, default_name):
+        channel = guild.get_channel(channel_id) if channel_id else None
+        return channel or discord.utils.get(guild.text_channels, name=default_name)
+
+
+guild_configs = GuildConfigCache()
+
+
+async def load_guild_configs():
+    guild_configs.load(await db_fetchall(
+        "SELECT guild_id, announce_channel_id, staff_channel_id, access_role_id FROM guild_config"
+    ))
+
+
+@bot.tree.command(name="config", description="Affiche ou modifie les salons et le rôle utilisés sur ce serveur (ADMIN)")
+@app_commands.default_permissions(administrator=True)
+@app_commands.check(lambda interaction: interaction.user.guild_permissions.administrator)
+async def config_command(
+    interaction: discord.Interaction,
+    annonces: discord.TextChannel = None, staff: discord.TextChannel = None, role: discord.Role = None
+):
+    """Sans argument, affiche la configuration ; sinon modifie les réglages fournis."""
+    guild = interaction.guild
     try:
-        user_channel = await guild.create_text_channel(
-            name=channel_name,
-            overwrites=overwrites,
-            topic=f"Salon personnel de {member.name}. ID: {member.id}"
+        values = {}
+        if annonces is not None:
+            values["announce_channel_id"] = annonces.id
+        if staff is not None:
+            values["staff_channel_id"] = staff.id
+        if role is not None:
+            values["access_role_id"] = role.id
+            join_pipeline.roles.pop(guild.id, None)
+        if values:
+            await guild_configs.update(guild.id, **values)
+
+        config = guild_configs.get(guild.id)
+        announce = guild_configs.announce_channel(guild)
+        tech = guild_configs.staff_channel(guild)
+        access = guild.get_role(config.access_role_id) if config.access_role_id else None
+        access = access or discord.utils.get(guild.roles, name=ACCESS_ROLE_NAME)
+        embed = discord.Embed(title=f"⚙️ Configuration de {guild.name}", color=discord.Color.blue())
+        embed.add_field(name="📣 Annonces", value=announce.mention if announce else f"— (#{DEFAULT_ANNOUNCE_CHANNEL} introuvable)", inline=False)
+        embed.add_field(name="🔧 Problèmes signalés", value=tech.mention if tech else f"— (#{DEFAULT_STAFF_CHANNEL} introuvable)", inline=False)
+        embed.add_field(name="🔑 Rôle des nouveaux membres", value=access.mention if access else f"{ACCESS_ROLE_NAME} (créé à la première arrivée)", inline=False)
+        await interaction.response.send_message(
+            "✅ Configuration mise à jour !" if values else None, embed=embed, ephemeral=True
         )
-        print(f"✅ Salon créé : {user_channel.name}")
     except Exception as e:
-        print(f"❌ Erreur lors de la création du salon : {e}")
-        return  # On arrête ici si la création a échoué
+        await interaction.response.send_message(f"❌ Erreur lors de la configuration : {str(e)}", ephemeral=True)
 
-    # Attendre 2 secondes pour éviter un bug de Discord
-    await asyncio.sleep(2)
 
-    # Test des permissions pour voir si le bot peut envoyer un message
-    if user_channel.permissions_for(guild.me).send_messages:
-        print(f"📢 Le bot peut envoyer des messages dans {user_channel.name}")
-    else:
-        print(f"🚨 Le bot N'A PAS la permission d'envoyer des messages dans {user_channel.name} !")
-
-    # Message de bienvenue
-    welcome_message = (
-        f"🔹Bienvenue {member.mention} sur ton salon personnel !\n"
-        "🔹Ici, tu peux utiliser les commandes pour consulter les jeux de la bibliothèque, ajouter des jeux en favori, faire des demandes d'ajout et signaler des problèmes.\n"
-        "🔹N'oublie pas de consulter le salon #infos pour connaître les règles et les infos a savoir sur l'utilisation du serveur.\n"
-        "🔹Bienvenue et amuse-toi bien ! 🎉"
-    )
+############################################
+#         SALONS PERSONNELS
+############################################
+
+PERSONAL_TOPIC_ID = re.compile(r"ID: (\d+)")
 
-    try:
-        await user_channel.send(welcome_message)
-        print(f"✅ Message de bienvenue envoyé à {member.name} dans {user_channel.name}")
-    except Exception as e:
-        print(f"❌ Erreur lors de l'envoi du message de bienvenue : {e}")
+
+class PersonalChannelIndex:
+    """Correspondance membre -> salon personnel, en mémoire et dans la table user_channels.
+
+    Reconstruite une fois depuis les sujets des salons ("... ID: <id>") au premier on_ready,
+    puis tenue à jour par les arrivées / départs : plus aucun parcours des salons par événement.
+    """
+
+    def __init__(self):
+        self.channels = {}   # (guild_id, user_id) -> channel_id
+        self.owners = {}     # channel_id -> (guild_id, user_id)
+        self.rebuilt = False
+
+    def load(self, rows):
+        for guild_id, user_id, channel_id in rows:
+            self._set(guild_id, user_id, channel_id)
+
+    def get(self, guild, user_id):
+        """Salon personnel d'un membre, ou None (les correspondances obsolètes sont oubliées)."""
+        channel_id = self.channels.get((guild.id, user_id))
+        if channel_id is None:
+            return None
+        channel = guild.get_channel(channel_id)
+        if channel is None:
+            self._forget(channel_id)
+        return channel
+
+    async def set(self, guild_id, user_id, channel_id):
+        await db_execute('''
+            INSERT INTO user_channels (guild_id, user_id, channel_id) VALUES (%s, %s, %s)
+            ON CONFLICT (guild_id, user_id) DO UPDATE SET channel_id = EXCLUDED.channel_id
+        ''', (guild_id, user_id, channel_id))
+        self._set(guild_id, user_id, channel_id)
+
+    async def discard_channel(self, channel_id):
+        if self._forget(channel_id):
+            await db_execute("DELETE FROM user_channels WHERE channel_id = %s", (channel_id,))
+
+    async def rebuild(self, guilds):
+        """Relit les sujets de tous les salons et remplace le contenu de la table."""
+        found = []
+        for guild in guilds:
+            for channel in guild.text_channels:
+                match = PERSONAL_TOPIC_ID.search(channel.topic or "")
+                if match:
+                    found.append((guild.id, int(match.group(1)), channel.id))
+        guild_ids = [guild.id for guild in guilds]
+
+        def work(cur):
+            cur.execute("DELETE FROM user_channels WHERE guild_id = ANY(%s)", (guild_ids,))
+            if found:
+                psycopg2.extras.execute_values(cur, '''
+                    INSERT INTO user_channels (guild_id, user_id, channel_id) VALUES %s
+                    ON CONFLICT DO NOTHING
+                ''', found)
+        await db_run(work)
+        for key in [key for key in self.channels if key[0] in guild_ids]:
+            self._forget(self.channels[key])
+        self.load(found)
+        self.rebuilt = True
+        print(f"📇 {len(found)} salons personnels indexés")
+
+    def _set(self, guild_id, user_id, channel_id):
+        old = self.channels.get((guild_id, user_id))
+        if old is not None:
+            self.owners.pop(old, None)
+        self.channels[(guild_id, user_id)] = channel_id
+        self.owners[channel_id] = (guild_id, user_id)
+
+    def _forget(self, channel_id):
+        owner = self.owners.pop(channel_id, None)
+        if owner is not None and self.channels.get(owner) == channel_id:
+            del self.channels[owner]
+        return owner is not None
+
+
+personal_channels = PersonalChannelIndex()
+
+
+async def load_personal_channels():
+    personal_channels.load(await db_fetchall("SELECT guild_id, user_id, channel_id FROM user_channels"))
 
 
 @bot.event
-async def on_member_remove(member):
-    guild = member.guild
+async def on_guild_channel_delete(channel):
+    await personal_channels.discard_channel(channel.id)
 
-    print(f"🔹 {member.name} a quitté le serveur")
 
-    # Recherche du salon basé sur l'ID dans le topic
-    for channel in guild.text_channels:
-        if channel.topic and f"ID: {member.id}" in channel.topic:
-            print(f"🔍 Salon trouvé pour suppression : {channel.name}")
+############################################
+#         ARRIVÉES DES MEMBRES
+############################################
+
+JOIN_QUEUE_SIZE = int(os.getenv("JOIN_QUEUE_SIZE", "1000"))
+JOIN_WORKERS = int(os.getenv("JOIN_WORKERS", "4"))
+JOIN_MAX_ATTEMPTS = 4
+JOIN_LATENCY_SAMPLES = 500
+CHANNEL_CREATE_RATE = (5, 10.0)  # créations de salons par serveur
+
+WELCOME_MESSAGE = (
+    "🔹Bienvenue {mention} sur ton salon personnel !\n"
+    "🔹Ici, tu peux utiliser les commandes pour consulter les jeux de la bibliothèque, ajouter des jeux en favori, faire des demandes d'ajout et signaler des problèmes.\n"
+    "🔹N'oublie pas de consulter le salon #infos pour connaître les règles et les infos a savoir sur l'utilisation du serveur.\n"
+    "🔹Bienvenue et amuse-toi bien ! 🎉"
+)
+
+
+class JoinJob:
+    """Arrivée d'un membre en cours de traitement ; retient les étapes déjà faites."""
+
+    __slots__ = ("member", "queued_at", "attempts", "role_done", "channel_id", "welcomed")
+
+    def __init__(self, member):
+        self.member = member
+        self.queued_at = time.monotonic()
+        self.attempts = 0
+        self.role_done = False
+        self.channel_id = None
+        self.welcomed = False
+
+
+class JoinPipeline:
+    """Traitement des arrivées de membres par un pool de workers.
+
+    on_member_join ne fait que déposer le membre dans une file bornée. Les workers
+    attribuent le rôle d'accès du serveur (mis en cache, créé une seule fois sous verrou),
+    créent le salon personnel au rythme autorisé par serveur, et en cas d'échec
+    réessaient plus tard sans refaire les étapes déjà réussies.
+    """
+
+    def __init__(self):
+        self.queue = None
+        self.workers = []
+        self.roles = {}       # id du serveur -> rôle d'accès
+        self.role_locks = {}  # id du serveur -> asyncio.Lock
+        self.buckets = {}     # id du serveur -> TokenBucket des créations de salons
+        self.latencies = deque(maxlen=JOIN_LATENCY_SAMPLES)
+        self.processed = 0
+        self.failed = 0
+        self.retried = 0
+        self.max_depth = 0
+
+    def start(self):
+        if self.queue is None:
+            self.queue = asyncio.Queue(maxsize=JOIN_QUEUE_SIZE)
+            self.workers = [start_background_task(self._work()) for _ in range(JOIN_WORKERS)]
+
+    async def submit(self, member):
+        self.start()
+        if self.queue.full():
+            print(f"⚠️ File des arrivées pleine ({self.queue.qsize()}), {member.name} attend une place")
+        await self.queue.put(JoinJob(member))
+        self.max_depth = max(self.max_depth, self.queue.qsize())
+
+    def stats(self):
+        """Profondeur de la file, compteurs et latences (s) d'arrivée à fin de traitement."""
+        latencies = sorted(self.latencies)
+
+        def percentile(p):
+            return latencies[min(len(latencies) - 1, int(p * len(latencies)))] if latencies else 0.0
+
+        return {
+            "depth": self.queue.qsize() if self.queue else 0,
+            "max_depth": self.max_depth,
+            "processed": self.processed,
+            "failed": self.failed,
+            "retried": self.retried,
+            "p50": percentile(0.50),
+            "p95": percentile(0.95),
+        }
+
+    async def access_role(self, guild):
+        role = self.roles.get(guild.id)
+        if role is not None and guild.get_role(role.id) is not None:
+            return role
+        async with self.role_locks.setdefault(guild.id, asyncio.Lock()):
+            role = self.roles.get(guild.id)
+            if role is None or guild.get_role(role.id) is None:
+                role_id = guild_configs.get(guild.id).access_role_id
+                role = guild.get_role(role_id) if role_id else None
+                role = role or discord.utils.get(guild.roles, name=ACCESS_ROLE_NAME)
+                if role is None:
+                    role = await guild.create_role(name=ACCESS_ROLE_NAME)
+                    await guild_configs.update(guild.id, access_role_id=role.id)
+                    print(f"✅ Rôle {role.name} créé")
+                self.roles[guild.id] = role
+        return role
+
+    async def _work(self):
+        while True:
+            job = await self.queue.get()
             try:
-                await channel.delete(reason=f"Le membre {member.name} a quitté le serveur")
-                print(f"🗑️ Salon {channel.name} supprimé")
+                await self._process(job)
             except Exception as e:
-                print(f"❌ Erreur lors de la suppression du salon {channel.name} : {e}")
-            return  # On arrête la boucle dès qu'on trouve le bon salon
+                job.attempts += 1
+                status = getattr(e, "status", None)
+                retryable = status is None or status == 429 or status >= 500
+                if not retryable or job.attempts >= JOIN_MAX_ATTEMPTS:
+                    self.failed += 1
+                    print(f"❌ Arrivée de {job.member.name} abandonnée après {job.attempts} essai(s) : {e}")
+                else:
+                    self.retried += 1
+                    delay = getattr(e, "retry_after", None) or min(60, 2 ** job.attempts)
+                    print(f"⏳ Arrivée de {job.member.name} en échec ({e}), nouvel essai dans {delay:.1f} s")
+                    start_background_task(self._retry_later(job, delay))
+            else:
+                latency = time.monotonic() - job.queued_at
+                self.processed += 1
+                self.latencies.append(latency)
+                print(f"✅ Arrivée de {job.member.name} traitée en {latency:.1f} s (file : {self.queue.qsize()})")
+            finally:
+                self.queue.task_done()
+
+    async def _retry_later(self, job, delay):
+        await asyncio.sleep(delay)
+        await self.queue.put(job)
+
+    async def _process(self, job):
+        member = job.member
+        guild = member.guild
+        if guild.get_member(member.id) is None:
+            print(f"⚠️ {member.name} a quitté le serveur avant la fin de son arrivée")
+            return
 
-    print(f"⚠️ Aucun salon trouvé pour {member.name}")
+        # Rôle d'accès
+        role = await self.access_role(guild)
+        if not job.role_done:
+            if role not in member.roles:
+                await member.add_roles(role)
+            job.role_done = True
+            print(f"✅ Rôle {role.name} ajouté à {member.name}")
+
+        # Salon personnel (recréé seulement s'il n'a pas déjà été créé par un essai précédent)
+        user_channel = guild.get_channel(job.channel_id) if job.channel_id else None
+        if user_channel is None:
+            existing_channel = personal_channels.get(guild, member.id)
+            if existing_channel:
+                print(f"🗑️ Suppression de l'ancien salon {existing_channel.name}")
+                await existing_channel.delete(reason="Création d'un nouveau salon personnel.")
+                await personal_channels.discard_channel(existing_channel.id)
+            user_channel = await self._create_channel(guild, member, role)
+            job.channel_id = user_channel.id
+            print(f"✅ Salon créé : {user_channel.name}")
+        if personal_channels.channels.get((guild.id, member.id)) != user_channel.id:
+            await personal_channels.set(guild.id, member.id, user_channel.id)
+
+        # Message de bienvenue
+        if not job.welcomed:
+            if not user_channel.permissions_for(guild.me).send_messages:
+                print(f"🚨 Le bot N'A PAS la permission d'envoyer des messages dans {user_channel.name} !")
+            outbox.send(user_channel, WELCOME_MESSAGE.format(mention=member.mention))
+            job.welcomed = True
+
+    async def _create_channel(self, guild, member, role):
+        # Définition des permissions du salon
+        overwrites = {
+            guild.default_role: discord.PermissionOverwrite(view_channel=False),
+            member: discord.PermissionOverwrite(view_channel=True, send_messages=True, read_message_history=True),
+            role: discord.PermissionOverwrite(view_channel=True, send_messages=True, read_message_history=True)
+        }
+        bucket = self.buckets.setdefault(guild.id, TokenBucket(*CHANNEL_CREATE_RATE))
+        await bucket.acquire()
+        try:
+            return await guild.create_text_channel(
+                name=member.name.lower().replace(" ", "-"),
+                overwrites=overwrites,
+                topic=f"Salon personnel de {member.name}. ID: {member.id}"
+            )
+        except (discord.RateLimited, discord.HTTPException) as e:
+            if getattr(e, "status", 429) == 429:
+                bucket.pause(getattr(e, "retry_after", None) or 5)
+            raise
+
+
+join_pipeline = JoinPipeline()
+
+
+@bot.event
+async def on_member_join(member):
+    print(f"🔹 Nouveau membre : {member.name}")
+    await join_pipeline.submit(member)
+
+
+@bot.event
+async def on_raw_member_remove(payload):
+    # Événement "raw" : les membres ne sont pas tous en cache (pas de chargement au démarrage)
+    guild = bot.get_guild(payload.guild_id)
+    member = payload.user
+    if guild is None:
+        return
+
+    print(f"🔹 {member.name} a quitté le serveur")
+
+    # Recherche du salon personnel dans l'index
+    channel = personal_channels.get(guild, member.id)
+    if channel is None:
+        print(f"⚠️ Aucun salon trouvé pour {member.name}")
+        return
+
+    print(f"🔍 Salon trouvé pour suppression : {channel.name}")
+    try:
+        await channel.delete(reason=f"Le membre {member.name} a quitté le serveur")
+        await personal_channels.discard_channel(channel.id)
+        print(f"🗑️ Salon {channel.name} supprimé")
+    except Exception as e:
+        print(f"❌ Erreur lors de la suppression du salon {channel.name} : {e}")
 
 @bot.tree.command(name="ask", description="Demande l'ajout d'un jeu")
 async def ask(interaction: discord.Interaction, game_name: str):
@@ -287,19 +2101,16 @@ async def ask(interaction: discord.Interaction, game_name: str):
     username = interaction.user.name
     game_name_clean = game_name.strip().capitalize()
     try:
-        cursor.execute("SELECT * FROM game_requests WHERE LOWER(game_name) = %s", (game_name_clean.lower(),))
-        existing = cursor.fetchone()
+        existing = await db_fetchone("SELECT * FROM game_requests WHERE LOWER(game_name) = %s", (game_name_clean.lower(),))
         if existing:
             await interaction.response.send_message(f"❌ **{game_name_clean}** est déjà dans la liste des demandes.", ephemeral=True)
             return
-        cursor.execute("INSERT INTO game_requests (user_id, username, game_name) VALUES (%s, %s, %s)", (user_id, username, game_name_clean))
-        conn.commit()
+        await db_execute("INSERT INTO game_requests (user_id, username, game_name) VALUES (%s, %s, %s)", (user_id, username, game_name_clean))
         await interaction.response.send_message(f"📩 **{game_name_clean}** a été ajouté à la liste des demandes par {username} !")
-        general_channel = discord.utils.get(interaction.guild.text_channels, name="général")
+        general_channel = guild_configs.announce_channel(interaction.guild)
         if general_channel:
-            await general_channel.send(f"📣 Le jeu **{game_name_clean}** a été demandé par **{username}**.")
+            outbox.send(general_channel, f"📣 Le jeu **{game_name_clean}** a été demandé par **{username}**.")
     except Exception as e:
-        conn.rollback()
         await interaction.response.send_message(f"❌ Erreur lors de l'ajout de la demande : {str(e)}", ephemeral=True)
 
 @bot.tree.command(name="supprdemande", description="Supprime une demande de jeu ou un problème signalé (ADMIN)")
@@ -310,41 +2121,41 @@ async def supprdemande(interaction: discord.Interaction, name: str, type: str):
 
     try:
         if type_clean == "probleme":
-            cursor.execute("SELECT user_id, game FROM game_problems WHERE LOWER(game) = %s", (name.lower(),))
-            problem_data = cursor.fetchone()
+            def delete_problem(cur):
+                cur.execute("SELECT user_id, game FROM game_problems WHERE LOWER(game) = %s", (name.lower(),))
+                found = cur.fetchone()
+                if found:
+                    cur.execute("DELETE FROM game_problems WHERE LOWER(game) = %s", (name.lower(),))
+                return found
+
+            problem_data = await db_run(delete_problem)
 
             if problem_data:
                 user_id, game_name = problem_data 
-                cursor.execute("DELETE FROM game_problems WHERE LOWER(game) = %s", (name.lower(),))
-                conn.commit()
 
-                general_channel = discord.utils.get(interaction.guild.text_channels, name="général")
-                tech_channel = discord.utils.get(interaction.guild.text_channels, name="mrbalooum")
+                general_channel = guild_configs.announce_channel(interaction.guild)
+                tech_channel = guild_configs.staff_channel(interaction.guild)
 
                 # 🔍 Trouver le salon personnel de l'utilisateur
-                user_channel = None
-                for channel in interaction.guild.text_channels:
-                    if channel.topic and f"ID: {user_id}" in channel.topic:
-                        user_channel = channel
-                        break
+                user_channel = personal_channels.get(interaction.guild, user_id)
 
                 if "(Problème technique)" in game_name:
                     # ✅ Problème technique -> Message dans le salon personnel
                     cleaned_game_name = game_name.replace("(Problème technique)", "").strip()
                     if user_channel:
-                        await user_channel.send(f"🎉 **Ton problème technique sur {cleaned_game_name} a été résolu !**")
-                    else:
-                        await general_channel.send(f"🎉 **Problème technique sur {cleaned_game_name} résolu !**")
+                        outbox.send(user_channel, f"🎉 **Ton problème technique sur {cleaned_game_name} a été résolu !**")
+                    elif general_channel:
+                        outbox.send(general_channel, f"🎉 **Problème technique sur {cleaned_game_name} résolu !**")
 
                 else:
                     # ✅ Problème de jeu -> Message dans le salon personnel
                     if user_channel:
-                        await user_channel.send(f"✅ **Le problème sur {game_name} a été résolu !**")
+                        outbox.send(user_channel, f"✅ **Le problème sur {game_name} a été résolu !**")
                     elif general_channel:
-                        await general_channel.send(f"✅ **Le problème sur {game_name} a été résolu !**")
+                        outbox.send(general_channel, f"✅ **Le problème sur {game_name} a été résolu !**")
 
                     if tech_channel:
-                        await tech_channel.send(f"🎮 **{game_name} (Problème jeu résolu)**\n**Date :** {interaction.created_at.strftime('%d/%m/%Y %H:%M')}")
+                        outbox.send(tech_channel, f"🎮 **{game_name} (Problème jeu résolu)**\n**Date :** {interaction.created_at.strftime('%d/%m/%Y %H:%M')}")
 
                 await interaction.response.send_message(f"✅ Le problème sur **{game_name}** a été supprimé avec succès.")
 
@@ -352,9 +2163,7 @@ async def supprdemande(interaction: discord.Interaction, name: str, type: str):
                 await interaction.response.send_message(f"❌ Aucun problème trouvé pour **{name.capitalize()}**.", ephemeral=True)
 
         elif type_clean == "demande":
-            cursor.execute("DELETE FROM game_requests WHERE LOWER(game_name) = %s RETURNING game_name", (name.lower(),))
-            deleted_request = cursor.fetchone()
-            conn.commit()
+            deleted_request = await db_fetchone("DELETE FROM game_requests WHERE LOWER(game_name) = %s RETURNING game_name", (name.lower(),))
 
             if deleted_request:
                 await interaction.response.send_message(f"✅ La demande pour **{deleted_request[0].capitalize()}** a été supprimée avec succès.")
@@ -365,7 +2174,6 @@ async def supprdemande(interaction: discord.Interaction, name: str, type: str):
             await interaction.response.send_message("❌ Type invalide. Utilisez 'demande' ou 'probleme'.", ephemeral=True)
 
     except Exception as e:
-        conn.rollback()
         await interaction.response.send_message(f"❌ Erreur lors de la suppression : {str(e)}", ephemeral=True)
 
 @supprdemande.autocomplete("type")
@@ -381,15 +2189,13 @@ async def supprdemande_name_autocomplete(interaction: discord.Interaction, curre
 
     try:
         # Récupérer les problèmes et les demandes qui matchent avec la saisie de l'utilisateur
-        cursor.execute("""
+        results = await db_fetchall("""
             SELECT DISTINCT game FROM game_problems WHERE LOWER(game) LIKE %s
             UNION
             SELECT DISTINCT game_name FROM game_requests WHERE LOWER(game_name) LIKE %s
             ORDER BY game ASC LIMIT 25
         """, (f"%{current_lower}%", f"%{current_lower}%"))
 
-        results = cursor.fetchall()
-
         if not results:
             return []
 
@@ -409,33 +2215,23 @@ async def supprjeu(interaction: discord.Interaction, name: str):
     """
     try:
         name_clean = name.strip().lower()
-        cursor.execute("SELECT nom FROM games WHERE LOWER(nom) LIKE %s", (f"%{name_clean}%",))
-        jeu = cursor.fetchone()
+        jeu = await db_fetchone("SELECT nom FROM games WHERE LOWER(nom) LIKE %s", (f"%{name_clean}%",))
         if jeu:
-            cursor.execute("DELETE FROM games WHERE LOWER(nom) = %s", (name_clean,))
-            save_database()
+            await delete_games("DELETE FROM games WHERE LOWER(nom) = %s RETURNING id", (name_clean,))
             await interaction.response.send_message(f"🗑️ Jeu '{name.capitalize()}' supprimé avec succès !")
-            general_channel = discord.utils.get(interaction.guild.text_channels, name="général")
+            general_channel = guild_configs.announce_channel(interaction.guild)
             if general_channel:
-                await general_channel.send(f"📣 **{name.capitalize()}** n'est plus disponible !")
+                outbox.send(general_channel, f"📣 **{name.capitalize()}** n'est plus disponible !")
         else:
             await interaction.response.send_message(f"❌ Aucun jeu trouvé avec le nom '{name}'.", ephemeral=True)
     except Exception as e:
-        conn.rollback()
         await interaction.response.send_message(f"❌ Erreur lors de la suppression du jeu : {str(e)}", ephemeral=True)
 
 @supprjeu.autocomplete("name")
 async def supprjeu_autocomplete(interaction: discord.Interaction, current: str):
     """Propose les noms de jeux présents dans la bibliothèque pour le paramètre 'name'."""
-    try:
-        current_lower = current.strip().lower()
-        cursor.execute("SELECT nom FROM games WHERE LOWER(nom) LIKE %s ORDER BY nom ASC LIMIT 25", (f"%{current_lower}%",))
-        results = cursor.fetchall()
-        suggestions = [row[0] for row in results]
-        return [app_commands.Choice(name=s.capitalize(), value=s) for s in suggestions]
-    except Exception as e:
-        conn.rollback()
-        return []
+    suggestions = [game.nom for game in catalog.autocomplete(current)]
+    return [app_commands.Choice(name=s.capitalize(), value=s) for s in suggestions]
 
 @bot.tree.command(name="modifjeu", description="Modifie un champ d'un jeu (ADMIN)")
 @app_commands.check(lambda interaction: interaction.user.guild_permissions.administrator)
@@ -476,27 +2272,21 @@ async def modifjeu(interaction: discord.Interaction, name: str, champ: str, nouv
         new_value = nouvelle_valeur.strip() if nouvelle_valeur else "Aucun"
 
         actual_field = mapping[champ_clean]
-        cursor.execute(f"UPDATE games SET {actual_field} = %s WHERE LOWER(nom) LIKE %s", (new_value, f"%{name_clean}%"))
-        conn.commit()
+        await save_games(
+            f"UPDATE games SET {actual_field} = %s WHERE LOWER(nom) LIKE %s RETURNING {GAME_COLUMNS}",
+            (new_value, f"%{name_clean}%")
+        )
 
         await interaction.response.send_message(f"✅ {champ.capitalize()} de **{name.capitalize()}** mis à jour : {new_value}")
 
     except Exception as e:
-        conn.rollback()
         await interaction.response.send_message(f"❌ Erreur lors de la modification : {str(e)}", ephemeral=True)
 
 
 @modifjeu.autocomplete("name")
 async def modifjeu_autocomplete(interaction: discord.Interaction, current: str):
     """Propose des noms de jeux présents dans la bibliothèque pour le paramètre 'name'."""
-    current_lower = current.strip().lower()
-    try:
-        cursor.execute("SELECT nom FROM games WHERE LOWER(nom) LIKE %s ORDER BY nom ASC LIMIT 25", (f"%{current_lower}%",))
-        results = cursor.fetchall()
-        return [app_commands.Choice(name=row[0].capitalize(), value=row[0]) for row in results]
-    except Exception as e:
-        conn.rollback()
-        return []
+    return [app_commands.Choice(name=game.nom.capitalize(), value=game.nom) for game in catalog.autocomplete(current)]
 
 
 @modifjeu.autocomplete("champ")
@@ -523,40 +2313,28 @@ async def fav(interaction: discord.Interaction, name: str):
     """
     try:
         name_clean = name.strip().lower()
-        cursor.execute("SELECT nom FROM games WHERE LOWER(nom) LIKE %s", (f"%{name_clean}%",))
-        jeu = cursor.fetchone()
+        jeu = await db_fetchone("SELECT id, nom FROM games WHERE LOWER(nom) LIKE %s", (f"%{name_clean}%",))
         if not jeu:
             await interaction.response.send_message(f"❌ Aucun jeu trouvé correspondant à '{name}'.", ephemeral=True)
             return
-        try:
-            cursor.execute("INSERT INTO user_favorites (user_id, game) VALUES (%s, %s)", (interaction.user.id, jeu[0]))
-            conn.commit()
-        except psycopg2.IntegrityError:
-            conn.rollback()
-            await interaction.response.send_message(f"❌ Le jeu **{jeu[0].capitalize()}** est déjà dans vos favoris.", ephemeral=True)
+        if not await favorites.add(interaction.user.id, jeu[0]):
+            await interaction.response.send_message(f"❌ Le jeu **{jeu[1].capitalize()}** est déjà dans vos favoris.", ephemeral=True)
             return
-        await interaction.response.send_message(f"✅ **{jeu[0].capitalize()}** a été ajouté à vos favoris !")
+        await interaction.response.send_message(f"✅ **{jeu[1].capitalize()}** a été ajouté à vos favoris !")
     except Exception as e:
-        conn.rollback()
         await interaction.response.send_message(f"❌ Erreur lors de l'ajout aux favoris : {str(e)}", ephemeral=True)
 
 @fav.autocomplete("name")
 async def fav_autocomplete(interaction: discord.Interaction, current: str):
     """Propose uniquement les jeux non déjà dans les favoris de l'utilisateur."""
     try:
-        current_lower = current.strip().lower()
-        # Récupérer les jeux dans la bibliothèque
-        cursor.execute("SELECT nom FROM games WHERE LOWER(nom) LIKE %s", (f"%{current_lower}%",))
-        games = cursor.fetchall()
         # Récupérer les jeux déjà en favoris pour l'utilisateur
-        cursor.execute("SELECT game FROM user_favorites WHERE user_id = %s", (interaction.user.id,))
-        favs = cursor.fetchall()
-        fav_list = {row[0].lower() for row in favs}
-        suggestions = [game[0] for game in games if game[0].lower() not in fav_list]
-        suggestions = sorted(suggestions, key=str.lower)
+        fav_ids = await favorites.get(interaction.user.id)
+        # Jeux de la bibliothèque, classés par l'index de recherche
+        games = catalog.autocomplete(current, limit=25 + len(fav_ids))
+        suggestions = [game.nom for game in games if game.id not in fav_ids]
         return [app_commands.Choice(name=s.capitalize(), value=s) for s in suggestions][:25]
     except Exception as e:
-        conn.rollback()
         return []
 
 @bot.tree.command(name="favoris", description="Affiche votre liste de favoris")
@@ -565,16 +2343,17 @@ async def favoris(interaction: discord.Interaction):
     Affiche la liste des jeux favoris de l'utilisateur.
     """
     try:
-        cursor.execute("SELECT game FROM user_favorites WHERE user_id = %s ORDER BY game ASC", (interaction.user.id,))
-        favs = cursor.fetchall()
+        fav_ids = await favorites.get(interaction.user.id)
+        favs = sorted((game.nom for game in map(catalog.get, fav_ids) if game), key=str.lower)
         if not favs:
             await interaction.response.send_message("❌ Vous n'avez aucun jeu favori.", ephemeral=True)
             return
-        fav_list = "\n".join(f"• {row[0].capitalize()}" for row in favs)
-        embed = discord.Embed(title="🌟 Vos favoris", description=fav_list, color=discord.Color.gold())
-        await interaction.response.send_message(embed=embed)
+        source = ListPageSource(
+            "🌟 Vos favoris", favs, lambda nom: f"• {nom.capitalize()}",
+            sort_key=str.lower, color=discord.Color.gold()
+        )
+        await Paginator(source).start(interaction.response.send_message)
     except Exception as e:
-        conn.rollback()
         await interaction.response.send_message(f"❌ Erreur lors de la récupération des favoris : {str(e)}", ephemeral=True)
 
 @bot.tree.command(name="unfav", description="Retire un jeu de vos favoris")
@@ -584,17 +2363,12 @@ async def unfav(interaction: discord.Interaction, name: str):
     Utilisation : /unfav "Nom du jeu"
     """
     try:
-        name_clean = name.strip().lower()
-        cursor.execute("SELECT game FROM user_favorites WHERE user_id = %s AND LOWER(game) = %s", (interaction.user.id, name_clean))
-        fav = cursor.fetchone()
-        if not fav:
+        game = catalog.find(name)
+        if game is None or not await favorites.remove(interaction.user.id, game.id):
             await interaction.response.send_message(f"❌ Le jeu **{name}** n'est pas dans vos favoris.", ephemeral=True)
             return
-        cursor.execute("DELETE FROM user_favorites WHERE user_id = %s AND LOWER(game) = %s", (interaction.user.id, name_clean))
-        conn.commit()
         await interaction.response.send_message(f"✅ **{name.capitalize()}** a été retiré de vos favoris.")
     except Exception as e:
-        conn.rollback()
         await interaction.response.send_message(f"❌ Erreur lors de la suppression des favoris : {str(e)}", ephemeral=True)
 
 @unfav.autocomplete("name")
@@ -602,13 +2376,12 @@ async def unfav_autocomplete(interaction: discord.Interaction, current: str):
     """Propose uniquement les jeux déjà dans vos favoris."""
     try:
         current_lower = current.strip().lower()
-        cursor.execute("SELECT game FROM user_favorites WHERE user_id = %s", (interaction.user.id,))
-        favs = cursor.fetchall()
-        suggestions = [row[0] for row in favs if current_lower in row[0].lower()]
+        fav_ids = await favorites.get(interaction.user.id)
+        favs = [game.nom for game in map(catalog.get, fav_ids) if game]
+        suggestions = [nom for nom in favs if current_lower in nom.lower()]
         suggestions = sorted(set(suggestions), key=str.lower)
         return [app_commands.Choice(name=s.capitalize(), value=s) for s in suggestions][:25]
     except Exception as e:
-        conn.rollback()
         return []
 
 @bot.tree.command(name="ajoutjeu", description="Ajoute un jeu (ADMIN)")
@@ -619,152 +2392,207 @@ async def ajoutjeu(
     duration: str, cloud_available: str, youtube_link: str, steam_link: str, 
     commentaire: str = "Aucun"
 ):
-    """Ajoute un nouveau jeu avec un commentaire et envoie la fiche dans le salon 'général'."""
+    """Ajoute un nouveau jeu avec un commentaire et envoie la fiche dans le salon des annonces."""
     try:
-        cursor.execute(
-            "INSERT INTO games (nom, release_date, price, type, duration, cloud_available, youtube_link, steam_link, commentaire) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)", 
+        game_info, = await save_games(
+            f"INSERT INTO games (nom, release_date, price, type, duration, cloud_available, youtube_link, steam_link, commentaire) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s) RETURNING {GAME_COLUMNS}", 
             (name.lower(), release_date, price, types.lower(), duration, cloud_available, youtube_link, steam_link, commentaire)
         )
-        save_database()
 
         # Supprime la demande associée s'il y en avait une
-        cursor.execute("DELETE FROM game_requests WHERE LOWER(game_name) = %s", (name.lower(),))
-        conn.commit()
-
-        # Récupérer les infos du jeu ajouté
-        cursor.execute("""
-            SELECT nom, release_date, price, type, duration, cloud_available, youtube_link, steam_link, commentaire
-            FROM games 
-            WHERE LOWER(nom) = %s
-        """, (name.lower(),))
-        game_info = cursor.fetchone()
-
-        embed = discord.Embed(title=f"🎮 {game_info[0].capitalize()}", color=discord.Color.blue())
-        embed.add_field(name="📅 Date de sortie", value=game_info[1], inline=False)
-        embed.add_field(name="💰 Prix", value=game_info[2], inline=False)
-        embed.add_field(name="🎮 Type", value=game_info[3].capitalize(), inline=False)
-        embed.add_field(name="⏳ Durée", value=game_info[4], inline=False)
-        embed.add_field(name="☁️ Cloud disponible", value=game_info[5], inline=False)
-        embed.add_field(name="▶️ Gameplay YouTube", value=f"[Voir ici]({game_info[6]})", inline=False)
-        embed.add_field(name="🛒 Page Steam", value=f"[Voir sur Steam]({game_info[7]})", inline=False)
-        embed.add_field(name="ℹ️ Commentaire", value=game_info[8], inline=False)
+        await db_execute("DELETE FROM game_requests WHERE LOWER(game_name) = %s", (name.lower(),))
+
+        embed = game_cards.render(game_info)
 
         await interaction.response.send_message(f"✅ **{name.capitalize()}** ajouté avec succès et retiré des demandes !")
 
-        general_channel = discord.utils.get(interaction.guild.text_channels, name="général")
+        general_channel = guild_configs.announce_channel(interaction.guild)
         if general_channel:
-            await general_channel.send(f"📣 **{name.capitalize()}** vient d'être ajouté !", embed=embed)
+            outbox.send(
+                general_channel, f"📣 **{name.capitalize()}** vient d'être ajouté !", embed=embed,
+                coalesce_key="jeux_ajoutes", digest_line=name.capitalize()
+            )
+        for listener in list(games_added_listeners.values()):
+            listener(interaction.guild, [game_info])
 
     except psycopg2.IntegrityError:
-        conn.rollback()
         await interaction.response.send_message(f"❌ Ce jeu existe déjà dans la base de données : **{name}**", ephemeral=True)
     except Exception as e:
-        conn.rollback()
         await interaction.response.send_message(f"❌ Erreur lors de l'ajout du jeu : {str(e)}", ephemeral=True)
 
 ############################################
 # NOUVELLE COMMANDE POUR AJOUTER PLUSIEURS JEUX
 ############################################
 
-import asyncio
-import re
+# Colonnes d'un import, dans l'ordre du bloc texte ("Nom" "Date de sortie" ... "Lien Steam")
+IMPORT_FIELDS = (
+    "nom", "release_date", "price", "type", "duration", "cloud_available",
+    "youtube_link", "steam_link", "commentaire"
+)
+# Noms de colonnes acceptés dans les fichiers CSV / JSON
+IMPORT_ALIASES = {
+    "name": "nom", "sortie": "release_date", "date": "release_date", "prix": "price",
+    "types": "type", "durée": "duration", "duree": "duration", "cloud": "cloud_available",
+    "youtube": "youtube_link", "steam": "steam_link",
+}
+
+
+def parse_games_block(text):
+    """Bloc de valeurs entre guillemets, 8 par jeu. Renvoie (entrées, erreurs)."""
+    matches = re.findall(r'"(.*?)"', text)
+    if len(matches) % 8 != 0:
+        return [], [
+            f"le nombre total de valeurs extraites est {len(matches)}, "
+            "et ce n'est pas un multiple de 8. Vérifiez le format."
+        ]
+    return [dict(zip(IMPORT_FIELDS, matches[i:i + 8])) for i in range(0, len(matches), 8)], []
+
+
+def parse_games_file(filename, data):
+    """Fichier CSV (avec en-tête) ou JSON (liste d'objets). Renvoie (entrées, erreurs)."""
+    text = data.decode("utf-8-sig")
+    if filename.lower().endswith(".json"):
+        try:
+            items = json.loads(text)
+        except ValueError as e:
+            return [], [f"JSON invalide : {e}"]
+        if isinstance(items, dict):
+            items = items.get("games", [])
+        if not isinstance(items, list) or not all(isinstance(item, dict) for item in items):
+            return [], ["le JSON doit être une liste d'objets"]
+    else:
+        try:
+            dialect = csv.Sniffer().sniff(text[:4096], delimiters=",;\t")
+        except csv.Error:
+            dialect = csv.excel
+        items = list(csv.DictReader(io.StringIO(text), dialect=dialect))
+    entries = []
+    for item in items:
+        entry = {}
+        for key, value in item.items():
+            if key is None:
+                continue
+            key = key.strip().lower()
+            entry[IMPORT_ALIASES.get(key, key)] = "" if value is None else str(value).strip()
+        entries.append(entry)
+    return entries, []
+
+
+def validate_games(entries):
+    """Prépare les lignes à insérer. Renvoie (lignes, erreurs) ; rien n'est écrit ici."""
+    rows, errors, seen = [], [], set()
+    for line, entry in enumerate(entries, start=1):
+        nom = entry.get("nom", "").strip().lower()
+        if not nom:
+            errors.append(f"Jeu n°{line} : nom manquant")
+            continue
+        if nom in seen:
+            errors.append(f"'{nom}' : présent plusieurs fois dans l'import")
+            continue
+        seen.add(nom)
+        if catalog.find(nom):
+            errors.append(f"'{nom}' : existe déjà dans la base de données")
+            continue
+        rows.append((
+            nom, entry.get("release_date", ""), entry.get("price", ""), entry.get("type", "").lower(),
+            entry.get("duration", ""), entry.get("cloud_available", ""), entry.get("youtube_link", ""),
+            entry.get("steam_link", ""), entry.get("commentaire") or "Aucun"
+        ))
+    return rows, errors
+
 
 @bot.tree.command(name="ajoutjeux", description="Ajoute plusieurs jeux à la fois (ADMIN)")
 @app_commands.check(lambda interaction: interaction.user.guild_permissions.administrator)
-async def ajoutjeux(interaction: discord.Interaction, games: str):
+async def ajoutjeux(interaction: discord.Interaction, games: str = "", fichier: discord.Attachment = None):
     """
-    Ajoute plusieurs jeux à partir d'un bloc de texte.
-    Chaque jeu doit être défini par exactement 8 valeurs entre guillemets :
+    Ajoute plusieurs jeux à partir d'un bloc de texte ou d'un fichier CSV / JSON.
+    Dans le bloc, chaque jeu doit être défini par exactement 8 valeurs entre guillemets :
     "Nom" "Date de sortie" "Prix" "Type" "Durée" "Cloud" "Lien YouTube" "Lien Steam"
 
     Exemple de bloc :
     /ajoutjeu "High on Life" "13 décembre 2022" "36.99" "FPS, Aventure" "10h" "Non" "https://..." "https://..."
     /ajoutjeu "Planet Of Lana" "23 mai 2023" "19,99 €" "2D, Chill, Histoire" "5h" "Non" "https://..." "https://..."
-    """
-    pattern = r'"(.*?)"'
-    # Extrait toutes les valeurs entre guillemets dans le bloc
-    matches = re.findall(pattern, games)
-    total = len(matches)
-    if total % 8 != 0:
-        await interaction.response.send_message(
-            f"❌ Erreur : le nombre total de valeurs extraites est {total}, "
-            "et ce n'est pas un multiple de 8. Vérifiez le format.",
-            ephemeral=True
-        )
-        return
-
-    added_games = []
-    errors = []
 
+    Le fichier a une ligne (CSV, avec en-tête) ou un objet (JSON) par jeu, avec les colonnes
+    nom, sortie, prix, type, duree, cloud, youtube, steam et éventuellement commentaire.
+    Tout l'import est vérifié puis inséré en une seule transaction.
+    """
     # On répond d'abord au slash command pour éviter le "Interaction Failed"
     await interaction.response.send_message("⏳ Traitement en cours...", ephemeral=True)
 
-    general_channel = discord.utils.get(interaction.guild.text_channels, name="général")
-
-    for i in range(0, total, 8):
-        nom, date_sortie, prix, type_jeu, duree, cloud, lien_yt, lien_steam = matches[i:i+8]
+    entries, errors = [], []
+    if games.strip():
+        parsed, parse_errors = parse_games_block(games)
+        entries += parsed
+        errors += parse_errors
+    if fichier is not None:
         try:
-            cursor.execute(
-                "INSERT INTO games (nom, release_date, price, type, duration, cloud_available, youtube_link, steam_link) VALUES (%s, %s, %s, %s, %s, %s, %s, %s)",
-                (nom.lower(), date_sortie, prix, type_jeu.lower(), duree, cloud, lien_yt, lien_steam)
-            )
-            conn.commit()
-            added_games.append(nom)
+            parsed, parse_errors = parse_games_file(fichier.filename, await fichier.read())
+        except UnicodeDecodeError:
+            parsed, parse_errors = [], ["le fichier doit être encodé en UTF-8"]
+        entries += parsed
+        errors += [f"{fichier.filename} : {error}" for error in parse_errors]
+    if not entries and not errors:
+        errors.append("aucun jeu fourni (bloc de texte ou fichier CSV / JSON)")
 
-            # Si on a trouvé le salon "général", on y envoie la fiche du jeu
-            if general_channel:
-                embed = discord.Embed(title=f"🎮 {nom.capitalize()}", color=discord.Color.blue())
-                embed.add_field(name="📅 Date de sortie", value=date_sortie, inline=False)
-                embed.add_field(name="💰 Prix", value=prix, inline=False)
-                embed.add_field(name="🎮 Type", value=type_jeu.capitalize(), inline=False)
-                embed.add_field(name="⏳ Durée", value=duree, inline=False)
-                embed.add_field(name="☁️ Cloud disponible", value=cloud, inline=False)
-                embed.add_field(name="▶️ Gameplay YouTube", value=f"[Voir ici]({lien_yt})", inline=False)
-                if lien_steam.strip():
-                    embed.add_field(name="🛒 Page Steam", value=f"[Voir sur Steam]({lien_steam})", inline=False)
-
-                await general_channel.send(f"📣 **{nom.capitalize()}** vient d'être ajouté !", embed=embed)
-                # Attendre 3 secondes avant d'envoyer le prochain
-                await asyncio.sleep(3)
+    rows, validation_errors = validate_games(entries)
+    errors += validation_errors
 
+    added_games = []
+    if rows:
+        try:
+            added_games = await save_games(
+                "INSERT INTO games (nom, release_date, price, type, duration, cloud_available, youtube_link, steam_link, commentaire) "
+                f"VALUES %s ON CONFLICT (nom) DO NOTHING RETURNING {GAME_COLUMNS}",
+                values=rows
+            )
+            # Conflits apparus entre la vérification et l'insertion (ajout concurrent)
+            inserted = {game.nom for game in added_games}
+            errors += [f"'{row[0]}' : existe déjà dans la base de données" for row in rows if row[0] not in inserted]
         except Exception as e:
-            conn.rollback()
-            errors.append(f"Erreur pour '{nom}': {str(e)}")
+            errors.append(f"Import annulé, aucun jeu ajouté : {str(e)}")
+
+    # Les annonces sont regroupées en un seul récapitulatif par la file d'envoi
+    general_channel = guild_configs.announce_channel(interaction.guild)
+    for game_info in added_games:
+        outbox.send(
+            general_channel, f"📣 **{game_info.nom.capitalize()}** vient d'être ajouté !",
+            embed=game_cards.render(game_info) if len(added_games) == 1 else None,
+            coalesce_key="jeux_ajoutes", digest_line=game_info.nom.capitalize()
+        )
+    if added_games:
+        for listener in list(games_added_listeners.values()):
+            listener(interaction.guild, added_games)
 
     # Récapitulatif final
     response = ""
     if added_games:
-        response += f"✅ Jeux ajoutés : {', '.join(added_games)}\n"
+        names = ", ".join(game.nom.capitalize() for game in added_games)
+        if len(names) > 1500:
+            names = names[:1500] + "…"
+        response += f"✅ {len(added_games)} jeux ajoutés : {names}\n"
     if errors:
-        response += "❌ Erreurs :\n" + "\n".join(errors)
+        shown = errors[:20]
+        response += "❌ Erreurs :\n" + "\n".join(shown)
+        if len(errors) > len(shown):
+            response += f"\n… et {len(errors) - len(shown)} autres erreurs"
 
     if not response.strip():
         response = "Aucun jeu ajouté et aucune erreur détectée."
 
     # Envoie un message récapitulatif dans le canal "privé" de l'interaction
     # (celui qui a tapé la commande verra ce message)
-    await interaction.followup.send(response, ephemeral=True)
+    await interaction.followup.send(response[:2000], ephemeral=True)
 
 @bot.tree.command(name="listejeux", description="Affiche infos Bundle et liste des jeux (15 par page)")
-async def listejeux(interaction: discord.Interaction):
-    """Envoie 2 messages : le premier avec les infos du bundle, le second avec la liste paginée des jeux."""
+async def listejeux(interaction: discord.Interaction, par_type: bool = False):
+    """
+    Envoie 2 messages : le premier avec les infos du bundle, le second avec la liste paginée des jeux.
+    Avec par_type, ajoute les totaux et moyennes de chaque type.
+    """
     try:
-        # Récupérer les infos du Bundle
-        cursor.execute("SELECT price, duration FROM games")
-        data = cursor.fetchall()
-        total_games = len(data)
-        total_price = 0.0
-        total_time = 0
-        for row in data:
-            price_str, duration_str = row
-            p_match = re.findall(r"[\d\.,]+", price_str)
-            if p_match:
-                p = float(p_match[0].replace(",", "."))
-                total_price += p
-            t_match = re.findall(r"[\d\.,]+", duration_str)
-            if t_match:
-                t = float(t_match[0].replace(",", "."))
-                total_time += int(round(t))
+        # Infos du Bundle, tenues à jour par le cache
+        total_games, total_price, _, total_time, _ = BundleStats.summary(catalog.stats.total)
 
         # Création du header avec chaque info sur une ligne
         bundle_info = (
@@ -774,30 +2602,38 @@ async def listejeux(interaction: discord.Interaction):
         )
         await interaction.response.send_message(bundle_info)
 
-        # Récupérer la liste des jeux
-        cursor.execute("SELECT nom FROM games ORDER BY LOWER(nom) ASC")
-        games = cursor.fetchall()
+        if par_type and catalog.stats.by_type:
+            lines = []
+            for tag, totals in sorted(catalog.stats.by_type.items(), key=lambda item: (-item[1][0], item[0])):
+                count, price, avg_price, hours, avg_hours = BundleStats.summary(totals)
+                line = f"**{tag.capitalize()}** : {count} jeu{'x' if count > 1 else ''} · {price:.2f} €"
+                if avg_price is not None:
+                    line += f" (moy. {avg_price:.2f} €)"
+                line += f" · {hours} h"
+                if avg_hours is not None:
+                    line += f" (moy. {avg_hours:.1f} h)"
+                lines.append(line)
+            description = ""
+            for line in lines:
+                if len(description) + len(line) + 1 > 4000:
+                    description += "…"
+                    break
+                description += line + "\n"
+            embed = discord.Embed(title="📊 Statistiques par type", description=description, color=discord.Color.blue())
+            await interaction.followup.send(embed=embed)
+
+        # Liste des jeux, page par page (la liste triée du catalogue n'est pas copiée)
+        games = catalog.sorted_games()
         if not games:
             await interaction.followup.send("❌ Aucun jeu enregistré.")
             return
-        game_names = [game[0].replace("||", "").strip().capitalize() for game in games]
-        pages = [game_names[i:i+15] for i in range(0, len(game_names), 15)]
-        embeds = []
-        for idx, page in enumerate(pages, start=1):
-            embed = discord.Embed(
-                title=f"🎮 Liste des jeux (Page {idx}/{len(pages)})",
-                color=discord.Color.blue()
-            )
-            embed.description = "\n".join(f"• {name}" for name in page)
-            embeds.append(embed)
-
-        if len(embeds) == 1:
-            await interaction.followup.send(embed=embeds[0])
-        else:
-            view = PaginationView(embeds)
-            await interaction.followup.send(embed=embeds[0], view=view)
+        source = ListPageSource(
+            "🎮 Liste des jeux", games,
+            lambda game: f"• {game.nom.replace('||', '').strip().capitalize()}",
+            sort_key=lambda game: game.nom.lower()
+        )
+        await Paginator(source).start(interaction.followup.send)
     except Exception as e:
-        conn.rollback()
         await interaction.response.send_message(f"❌ Erreur lors de la récupération des jeux : {str(e)}", ephemeral=True)
 
 ############################################
@@ -811,8 +2647,7 @@ async def probleme(interaction: discord.Interaction, game: str, message: str, ty
     try:
         game_clean = game.strip().lower()
         type_clean = type_probleme.strip().lower()
-        cursor.execute("SELECT nom FROM games WHERE LOWER(nom) LIKE %s", (f"%{game_clean}%",))
-        jeu = cursor.fetchone()
+        jeu = await db_fetchone("SELECT nom FROM games WHERE LOWER(nom) LIKE %s", (f"%{game_clean}%",))
 
         if not jeu:
             await interaction.response.send_message(f"❌ Aucun jeu trouvé correspondant à '{game}'.", ephemeral=True)
@@ -822,41 +2657,38 @@ async def probleme(interaction: discord.Interaction, game: str, message: str, ty
         date_heure = interaction.created_at.strftime('%d/%m/%Y %H:%M')
 
         if type_clean == "jeu":
-            cursor.execute(
+            await db_execute(
                 "INSERT INTO game_problems (user_id, username, game, message) VALUES (%s, %s, %s, %s)",
                 (interaction.user.id, interaction.user.name, jeu_nom, message)
             )
-            conn.commit()
 
-            general_channel = discord.utils.get(interaction.guild.text_channels, name="général")
-            tech_channel = discord.utils.get(interaction.guild.text_channels, name="mrbalooum")
+            general_channel = guild_configs.announce_channel(interaction.guild)
+            tech_channel = guild_configs.staff_channel(interaction.guild)
 
             if general_channel:
-                await general_channel.send(f"🚨 **{jeu_nom} (Problème jeu)** ! (Signalé par {interaction.user.name} à {date_heure})")
+                outbox.send(general_channel, f"🚨 **{jeu_nom} (Problème jeu)** ! (Signalé par {interaction.user.name} à {date_heure})")
 
             if tech_channel:
-                await tech_channel.send(f"🎮 **{jeu_nom} (Problème jeu)**\n**Utilisateur :** {interaction.user.name}\n**Message :** {message}\n**Date :** {date_heure}")
+                outbox.send(tech_channel, f"🎮 **{jeu_nom} (Problème jeu)**\n**Utilisateur :** {interaction.user.name}\n**Message :** {message}\n**Date :** {date_heure}")
 
             await interaction.response.send_message(f"✅ Problème signalé pour **{jeu_nom}** : {message}")
 
         elif type_clean == "technique":
             # 🔥 **Ajout dans game_problems pour qu’il apparaisse dans /demandes et /supprdemande**
-            cursor.execute(
+            await db_execute(
                 "INSERT INTO game_problems (user_id, username, game, message) VALUES (%s, %s, %s, %s)",
                 (interaction.user.id, interaction.user.name, f"{jeu_nom} (Problème technique)", message)
             )
-            conn.commit()
 
-            tech_channel = discord.utils.get(interaction.guild.text_channels, name="mrbalooum")
+            tech_channel = guild_configs.staff_channel(interaction.guild)
             if tech_channel:
-                await tech_channel.send(f"🔧 **{jeu_nom} (Problème technique)**\n**Utilisateur :** {interaction.user.name}\n**Message :** {message}\n**Date :** {date_heure}")
+                outbox.send(tech_channel, f"🔧 **{jeu_nom} (Problème technique)**\n**Utilisateur :** {interaction.user.name}\n**Message :** {message}\n**Date :** {date_heure}")
             await interaction.response.send_message(f"✅ Problème technique signalé pour **{jeu_nom}**")
 
         else:
             await interaction.response.send_message("❌ Type de problème invalide. Utilisez 'jeu' ou 'technique'.", ephemeral=True)
 
     except Exception as e:
-        conn.rollback()
         await interaction.response.send_message(f"❌ Erreur lors de la signalisation du problème : {str(e)}", ephemeral=True)
 
 @probleme.autocomplete("game")
@@ -869,14 +2701,7 @@ async def probleme_autocomplete(interaction: discord.Interaction, current: str):
         param_name = interaction.data["options"][-1]["name"]  # Récupère le paramètre en cours
 
     if param_name == "game":
-        current_lower = current.strip().lower()
-        try:
-            cursor.execute("SELECT nom FROM games WHERE LOWER(nom) LIKE %s ORDER BY nom ASC LIMIT 25", (f"%{current_lower}%",))
-            results = cursor.fetchall()
-            return [app_commands.Choice(name=row[0].capitalize(), value=row[0]) for row in results]
-        except Exception as e:
-            conn.rollback()
-            return []
+        return [app_commands.Choice(name=game.nom.capitalize(), value=game.nom) for game in catalog.autocomplete(current)]
 
     elif param_name == "type_probleme":
         return [
@@ -897,35 +2722,35 @@ async def demandes(interaction: discord.Interaction):
       2) Problèmes signalés (table game_problems)
     """
     try:
-        # Récupérer les demandes de jeux
-        cursor.execute("SELECT username, game_name, date FROM game_requests ORDER BY date DESC")
-        requests_data = cursor.fetchall()
-        if requests_data:
-            demandes_msg = "\n".join(f"- **{r[1]}** (demandé par {r[0]} le {r[2].strftime('%d/%m %H:%M')})" for r in requests_data)
-        else:
-            demandes_msg = "Aucune demande de jeu."
-
-        # Récupérer les problèmes signalés
-        cursor.execute("SELECT username, game, message, date FROM game_problems ORDER BY date DESC")
-        problems_data = cursor.fetchall()
-        if problems_data:
-            problemes_msg = "\n".join(f"- **{r[1]}** (signalé par {r[0]} le {r[3].strftime('%d/%m %H:%M')}) : {r[2]}" for r in problems_data)
-        else:
-            problemes_msg = "Aucun problème signalé."
+        # Demandes de jeux et problèmes signalés, lus en base page par page
+        demandes_source = QueryPageSource(
+            "Demandes de jeux", "game_requests", "username, game_name, date",
+            lambda r: f"- **{r[1]}** (demandé par {r[0]} le {r[2].strftime('%d/%m %H:%M')})"
+        )
+        problemes_source = QueryPageSource(
+            "Problèmes signalés", "game_problems", "username, game, message, date",
+            lambda r: f"- **{r[1]}** (signalé par {r[0]} le {r[3].strftime('%d/%m %H:%M')}) : {r[2]}"
+        )
 
         # Envoyer deux messages séparés
-        await interaction.response.send_message("**Demandes de jeux :**\n" + demandes_msg)
-        await interaction.followup.send("**Problèmes signalés :**\n" + problemes_msg)
+        await interaction.response.defer()
+        for source, empty in (
+            (demandes_source, "**Demandes de jeux :**\nAucune demande de jeu."),
+            (problemes_source, "**Problèmes signalés :**\nAucun problème signalé."),
+        ):
+            await source.page_count()
+            if source.total:
+                await Paginator(source).start(interaction.followup.send)
+            else:
+                await interaction.followup.send(empty)
     except Exception as e:
-        conn.rollback()
-        await interaction.response.send_message(f"❌ Erreur lors de la récupération des demandes : {str(e)}", ephemeral=True)
+        await interaction.followup.send(f"❌ Erreur lors de la récupération des demandes : {str(e)}", ephemeral=True)
 
 @bot.tree.command(name="dernier", description="Affiche les 10 derniers jeux ajoutés")
 async def dernier(interaction: discord.Interaction):
     """Affiche les 10 derniers jeux ajoutés à la base."""
     try:
-        cursor.execute("SELECT nom, date_ajout FROM games ORDER BY date_ajout DESC LIMIT 10")
-        derniers = cursor.fetchall()
+        derniers = await db_fetchall("SELECT nom, date_ajout FROM games ORDER BY date_ajout DESC LIMIT 10")
         if derniers:
             description = "\n".join(
                 f"- **{jeu[0].capitalize()}** ajouté le {jeu[1].strftime('%d/%m/%Y')}" for jeu in derniers
@@ -939,97 +2764,52 @@ async def dernier(interaction: discord.Interaction):
         else:
             await interaction.response.send_message("❌ Aucun jeu enregistré.")
     except Exception as e:
-        conn.rollback()
         await interaction.response.send_message(f"❌ Erreur lors de la récupération des derniers jeux : {str(e)}", ephemeral=True)
 
 @bot.tree.command(name="proposejeu", description="Propose un jeu aléatoire avec sa fiche")
-async def proposejeu(interaction: discord.Interaction):
-    """Propose un jeu aléatoire et affiche sa fiche complète."""
+async def proposejeu(interaction: discord.Interaction, sans_favoris: bool = False):
+    """Propose un jeu aléatoire (hors favoris si demandé) et affiche sa fiche complète."""
     try:
-        cursor.execute("SELECT nom FROM games")
-        games = cursor.fetchall()
-        if games:
-            jeu_choisi = random.choice(games)[0]
-            cursor.execute("""
-                SELECT nom, release_date, price, type, duration, cloud_available, youtube_link, steam_link
-                SELECT nom, release_date, price, type, duration, cloud_available, youtube_link, steam_link, commentaire
-                FROM games WHERE LOWER(nom) = %s
-            """, (jeu_choisi.lower(),))
-            game_info = cursor.fetchone()
-            if game_info:
-                embed = discord.Embed(title=f"🎮 {game_info[0].capitalize()}", color=discord.Color.blue())
-                embed.add_field(name="📅 Date de sortie", value=game_info[1], inline=False)
-                embed.add_field(name="💰 Prix", value=game_info[2], inline=False)
-                embed.add_field(name="🎮 Type", value=game_info[3].capitalize(), inline=False)
-                embed.add_field(name="⏳ Durée", value=game_info[4], inline=False)
-                embed.add_field(name="☁️ Cloud disponible", value=game_info[5], inline=False)
-                embed.add_field(name="▶️ Gameplay YouTube", value=f"[Voir ici]({game_info[6]})", inline=False)
-                embed.add_field(name="🛒 Page Steam", value=f"[Voir sur Steam]({game_info[7]})", inline=False)
-                if game_info[8]:
-                    embed.add_field(name="ℹ️ Commentaire", value=game_info[8], inline=False)
-                await interaction.response.send_message(f"🎲 Pourquoi ne pas essayer **{jeu_choisi.capitalize()}** ?", embed=embed)
-            else:
-                await interaction.response.send_message("❌ Erreur lors de la récupération de la fiche du jeu.")
+        excluded = await favorites.get(interaction.user.id) if sans_favoris else ()
+        game_id = pick_suggestion(catalog.all_ids, interaction.user.id, excluded)
+        if game_id is not None:
+            game_info = catalog.get(game_id)
+            jeu_choisi = game_info.nom
+            embed = game_cards.render(game_info)
+            await interaction.response.send_message(f"🎲 Pourquoi ne pas essayer **{jeu_choisi.capitalize()}** ?", embed=embed)
+        elif catalog.all_ids:
+            await interaction.response.send_message("❌ Tous les jeux sont déjà dans vos favoris.", ephemeral=True)
         else:
             await interaction.response.send_message("❌ Aucun jeu enregistré.")
     except Exception as e:
-        conn.rollback()
         await interaction.response.send_message(f"❌ Erreur lors de la proposition du jeu : {str(e)}", ephemeral=True)
 
 @bot.tree.command(name="proposejeutype", description="Propose un jeu aléatoire d'un type donné avec sa fiche")
-async def proposejeutype(interaction: discord.Interaction, game_type: str):
-    """Propose un jeu aléatoire d'un type précis et affiche sa fiche complète."""
+async def proposejeutype(interaction: discord.Interaction, game_type: str, mode: str = "et", sans_favoris: bool = False):
+    """Propose un jeu aléatoire d'un ou plusieurs types ("FPS, Aventure") et affiche sa fiche complète."""
     try:
-        game_type = game_type.lower().strip()
-        cursor.execute("SELECT nom, type FROM games")
-        games_found = cursor.fetchall()
-        matching_games = []
-        for nom, types in games_found:
-            type_list = [t.strip().lower() for t in types.split(",")]
-            if game_type in type_list:
-                matching_games.append(nom)
-        if matching_games:
-            jeu_choisi = random.choice(matching_games)
-            cursor.execute("""
-                SELECT nom, release_date, price, type, duration, cloud_available, youtube_link, steam_link
-                SELECT nom, release_date, price, type, duration, cloud_available, youtube_link, steam_link, commentaire
-                FROM games WHERE LOWER(nom) = %s
-            """, (jeu_choisi.lower(),))
-            game_info = cursor.fetchone()
-            if game_info:
-                embed = discord.Embed(title=f"🎮 {game_info[0].capitalize()}", color=discord.Color.blue())
-                embed.add_field(name="📅 Date de sortie", value=game_info[1], inline=False)
-                embed.add_field(name="💰 Prix", value=game_info[2], inline=False)
-                embed.add_field(name="🎮 Type", value=game_info[3].capitalize(), inline=False)
-                embed.add_field(name="⏳ Durée", value=game_info[4], inline=False)
-                embed.add_field(name="☁️ Cloud disponible", value=game_info[5], inline=False)
-                embed.add_field(name="▶️ Gameplay YouTube", value=f"[Voir ici]({game_info[6]})", inline=False)
-                embed.add_field(name="🛒 Page Steam", value=f"[Voir sur Steam]({game_info[7]})", inline=False)
-                if game_info[8]:
-                    embed.add_field(name="ℹ️ Commentaire", value=game_info[8], inline=False)
-                await interaction.response.send_message(f"🎲 Pourquoi ne pas essayer **{jeu_choisi.capitalize()}** ?", embed=embed)
-            else:
-                await interaction.response.send_message("❌ Erreur lors de la récupération de la fiche du jeu.")
+        tags = parse_types(game_type)
+        game_type = format_types(tags, mode)
+        candidates = catalog.ids_with_types(tags, match_all=mode.strip().lower() != "ou") if tags else IdPool()
+        excluded = await favorites.get(interaction.user.id) if sans_favoris else ()
+        game_id = pick_suggestion(candidates, interaction.user.id, excluded)
+        if game_id is not None:
+            game_info = catalog.get(game_id)
+            jeu_choisi = game_info.nom
+            embed = game_cards.render(game_info)
+            await interaction.response.send_message(f"🎲 Pourquoi ne pas essayer **{jeu_choisi.capitalize()}** ?", embed=embed)
         else:
-            await interaction.response.send_message(f"❌ Aucun jeu trouvé pour le type '{game_type.capitalize()}'.")
+            await interaction.response.send_message(f"❌ Aucun jeu trouvé pour le type '{game_type}'.")
     except Exception as e:
-        conn.rollback()
         await interaction.response.send_message(f"❌ Erreur lors de la proposition du jeu par type : {str(e)}", ephemeral=True)
 
 @bot.tree.command(name="style", description="Affiche tous les types de jeux disponibles")
 async def style(interaction: discord.Interaction):
     """Affiche la liste de tous les types de jeux disponibles."""
     try:
-        cursor.execute("SELECT DISTINCT type FROM games")
-        types_found = cursor.fetchall()
-        unique_types = set()
-        for row in types_found:
-            for t in row[0].split(","):
-                t_clean = t.strip()
-                if t_clean:
-                    unique_types.add(t_clean.capitalize())
+        unique_types = catalog.type_names()
         if unique_types:
-            type_list = "\n".join(f"- {t}" for t in sorted(unique_types))
+            type_list = "\n".join(f"- {t}" for t in unique_types)
             embed = discord.Embed(
                 title="🎮 Types de jeux disponibles",
                 description=type_list,
@@ -1039,94 +2819,310 @@ async def style(interaction: discord.Interaction):
         else:
             await interaction.response.send_message("❌ Aucun type de jeu trouvé dans la base.")
     except Exception as e:
-        conn.rollback()
         await interaction.response.send_message(f"❌ Erreur lors de la récupération des types : {str(e)}", ephemeral=True)
 
-# Nouvelle commande /type : affiche tous les jeux d'un type choisi
+# Nouvelle commande /type : affiche tous les jeux d'un ou plusieurs types choisis
 @bot.tree.command(name="type", description="Affiche tous les jeux d'un type choisi")
-async def type_command(interaction: discord.Interaction, game_type: str):
-    """Affiche la liste des jeux correspondant au type choisi."""
+async def type_command(interaction: discord.Interaction, game_type: str, mode: str = "et"):
+    """
+    Affiche la liste des jeux correspondant au(x) type(s) choisi(s).
+    Plusieurs types séparés par des virgules : mode "et" (tous les types) ou "ou" (au moins un).
+    """
     try:
-        query_type = game_type.lower().strip()
-        cursor.execute("SELECT nom, type FROM games")
-        games_found = cursor.fetchall()
-        matching_games = []
-        for nom, types in games_found:
-            type_list = [t.strip().lower() for t in types.split(",")]
-            if query_type in type_list:
-                matching_games.append(nom.capitalize())
-        if matching_games:
-            embed = discord.Embed(
-                title=f"Jeux du type {query_type.capitalize()}",
-                color=discord.Color.blue()
+        tags = parse_types(game_type)
+        query_type = format_types(tags, mode)
+        games = catalog.games_with_types(tags, match_all=mode.strip().lower() != "ou")
+        if games:
+            source = ListPageSource(
+                f"Jeux du type {query_type}", games, lambda game: f"- {game.nom.capitalize()}",
+                sort_key=lambda game: game.nom.lower()
             )
-            embed.description = "\n".join(f"- {jeu}" for jeu in matching_games)
-            await interaction.response.send_message(embed=embed)
+            await Paginator(source).start(interaction.response.send_message)
         else:
-            await interaction.response.send_message(f"❌ Aucun jeu trouvé pour le type '{query_type.capitalize()}'.", ephemeral=True)
+            await interaction.response.send_message(f"❌ Aucun jeu trouvé pour le type '{query_type}'.", ephemeral=True)
     except Exception as e:
-        conn.rollback()
         await interaction.response.send_message(f"❌ Erreur lors de la récupération des jeux pour le type : {str(e)}", ephemeral=True)
 
 @type_command.autocomplete("game_type")
+@proposejeutype.autocomplete("game_type")
 async def type_autocomplete(interaction: discord.Interaction, current: str):
-    current_lower = current.lower().strip()
+    """Complète le dernier type saisi ("FPS, Av" -> "Fps, Aventure")."""
+    head, _, last = current.rpartition(",")
+    already = parse_types(head)
+    prefix = "".join(f"{t.capitalize()}, " for t in already)
+    current_lower = last.lower().strip()
     try:
-        cursor.execute("SELECT DISTINCT type FROM games")
-        types_found = cursor.fetchall()
-        all_types = set()
-        for row in types_found:
-            for t in row[0].split(","):
-                t_clean = t.strip()
-                if t_clean:
-                    all_types.add(t_clean.capitalize())
-        suggestions = sorted([t for t in all_types if current_lower in t.lower()])
-        return [app_commands.Choice(name=s, value=s) for s in suggestions]
+        suggestions = [
+            t for t in catalog.type_names()
+            if current_lower in t.lower() and t.lower() not in already
+        ]
+        return [app_commands.Choice(name=prefix + s, value=prefix + s) for s in suggestions][:25]
     except Exception as e:
-        conn.rollback()
         return []
+
+@type_command.autocomplete("mode")
+@proposejeutype.autocomplete("mode")
+async def type_mode_autocomplete(interaction: discord.Interaction, current: str):
+    """Autocomplétion du paramètre 'mode' : 'et' (tous les types) ou 'ou' (au moins un)."""
+    options = ["et", "ou"]
+    return [app_commands.Choice(name=opt.capitalize(), value=opt) for opt in options if current.lower() in opt]
         
+############################################
+#         STATISTIQUES DU BOT
+############################################
+
+# Nom -> fonction qui renvoie (titre, texte) d'une section de /stats, ou None : une par sous-système
+stats_fields = {}
+
+
+def core_metrics(out):
+    """Mesures du cœur du bot pour l'endpoint Prometheus (les sous-systèmes ajoutent les leurs)."""
+    for state, value in db_pool_stats().items():
+        out.gauge(f"bot_db_pool_{state}", f"Pool de connexions : {state}.", value)
+    out.gauge("bot_event_loop_stalls", "Blocages de la boucle signalés par le chien de garde.", loop_diagnostics.stalls)
+    out.gauge("bot_outbox_queued", "Messages en attente d'envoi.", outbox.queued())
+    out.gauge("bot_favorites_cache_hits", "Lectures de favoris servies par le cache.", favorites.hits)
+    out.gauge("bot_favorites_cache_misses", "Lectures de favoris chargées depuis la base.", favorites.misses)
+    out.gauge("bot_favorites_cache_bytes", "Mémoire estimée du cache des favoris.", favorites.size)
+    joins = join_pipeline.stats()
+    out.gauge("bot_join_queue_depth", "Arrivées de membres en attente.", joins["depth"])
+    out.gauge("bot_join_processed", "Arrivées de membres traitées.", joins["processed"])
+    out.gauge("bot_guilds", "Serveurs servis par ce processus.", len(bot.guilds))
+    out.gauges("bot_shard_latency_seconds", "Latence du heartbeat de chaque shard de ce processus.", [
+        (f'shard="{shard_id}"', f"{latency:.6f}") for shard_id, latency in bot.latencies
+        if math.isfinite(latency)  # NaN / inf tant que le shard n'est pas connecté
+    ])
+    out.gauges("bot_startup_seconds", "Durée de chaque étape du démarrage à froid.", [
+        (f'phase="{phase}"', f"{seconds:.3f}") for phase, seconds in startup_timings.items()
+    ])
+
+
+metrics.collectors["bot"] = core_metrics
+
+@bot.tree.command(name="stats", description="Affiche les temps de réponse et l'état du bot (ADMIN)")
+@app_commands.check(lambda interaction: interaction.user.guild_permissions.administrator)
+async def stats(interaction: discord.Interaction):
+    """Commandes les plus coûteuses (temps cumulé), pool de connexions, boucle et files d'attente."""
+    calls = sorted(metrics.calls.items(), key=lambda item: item[1].total, reverse=True)[:15]
+    lines = []
+    for (kind, name), call in calls:
+        q = call.quantiles()
+        label = f"/{name}" if kind == "commande" else f"/{name} (autocomplétion)"
+        lines.append(
+            f"**{label}** : {call.count} appel(s), {call.errors} erreur(s) — "
+            f"p50 {q[0.5] * 1000:.0f} ms · p95 {q[0.95] * 1000:.0f} ms · p99 {q[0.99] * 1000:.0f} ms — "
+            f"BDD {call.db / call.count * 1000:.0f} ms · Discord {call.api / call.count * 1000:.0f} ms"
+        )
+    embed = discord.Embed(
+        title="📈 Statistiques du bot",
+        description="\n".join(lines) or "Aucune commande mesurée pour l'instant.",
+        color=discord.Color.blue()
+    )
+    pool = db_pool_stats()
+    embed.add_field(
+        name="Base de données",
+        value=f"{pool['used']}/{pool['max']} connexions utilisées, {pool['waiting']} en attente",
+        inline=False
+    )
+    lag = metrics.loop_lag.quantiles()
+    embed.add_field(
+        name="Boucle asyncio",
+        value=f"retard p95 {lag[0.95] * 1000:.0f} ms, max {metrics.loop_lag_max * 1000:.0f} ms",
+        inline=False
+    )
+    joins = join_pipeline.stats()
+    embed.add_field(
+        name="Files d'attente",
+        value=f"{outbox.queued()} message(s) à envoyer, {joins['depth']} arrivée(s) à traiter",
+        inline=False
+    )
+    for field in list(stats_fields.values()):
+        section = field()
+        if section is not None:
+            embed.add_field(name=section[0], value=section[1], inline=False)
+    shards = ", ".join(
+        f"#{shard_id} {latency * 1000:.0f} ms" if math.isfinite(latency) else f"#{shard_id} déconnecté"
+        for shard_id, latency in bot.latencies
+    )
+    embed.add_field(
+        name="Shards",
+        value=f"{shards} — {len(bot.guilds)} serveur(s) sur ce processus (shard de ce serveur : #{interaction.guild.shard_id})",
+        inline=False
+    )
+    await interaction.response.send_message(embed=embed, ephemeral=True)
+
+@bot.tree.command(name="profil", description="Démarre ou arrête le profilage de la boucle du bot (ADMIN)")
+@app_commands.check(lambda interaction: interaction.user.guild_permissions.administrator)
+async def profil(interaction: discord.Interaction, actif: bool):
+    """Active le profileur par échantillonnage, ou l'arrête et écrit le profil sur disque."""
+    if actif:
+        if loop_diagnostics.start_profiling():
+            await interaction.response.send_message("🔬 Profilage démarré.", ephemeral=True)
+        else:
+            await interaction.response.send_message("⚠️ Le profilage est déjà en cours.", ephemeral=True)
+        return
+    path = loop_diagnostics.stop_profiling()
+    if path is None:
+        await interaction.response.send_message("⚠️ Aucun profilage en cours.", ephemeral=True)
+    else:
+        await interaction.response.send_message(f"🔬 Profil écrit dans `{path}`.", ephemeral=True)
+
 ############################################
 #         CLASSE DE PAGINATION
 ############################################
 
-class PaginationView(discord.ui.View):
-    def __init__(self, embeds, timeout=120):
+PAGE_SIZE = 15
+# Longueur maximale d'une ligne : 15 lignes tiennent toujours dans une description d'embed (4096)
+PAGE_LINE_MAX = 250
+
+
+class ListPageSource:
+    """Pages d'une liste déjà en mémoire (fiches du catalogue, noms...), formatées à la demande.
+
+    La liste n'est pas copiée : pour /listejeux c'est la liste triée partagée du catalogue.
+    Avec `sort_key`, la liste est triée par cette clé et on peut sauter à une lettre.
+    """
+
+    def __init__(self, title, items, format_item, sort_key=None, color=None):
+        self.title = title
+        self.items = items
+        self.format_item = format_item
+        self.sort_key = sort_key
+        self.color = color or discord.Color.blue()
+
+    async def page_count(self):
+        return max(1, -(-len(self.items) // PAGE_SIZE))
+
+    async def lines(self, page):
+        start = page * PAGE_SIZE
+        return [self.format_item(item) for item in self.items[start:start + PAGE_SIZE]]
+
+    async def page_of(self, text):
+        if self.sort_key is None or not self.items:
+            return None
+        index = bisect.bisect_left(self.items, text, key=self.sort_key)
+        return min(index, len(self.items) - 1) // PAGE_SIZE
+
+
+class QueryPageSource:
+    """Pages lues en base à la demande, du plus récent au plus ancien (ORDER BY date, id).
+
+    Pagination par clé : seule la dernière ligne de chaque page déjà vue est retenue et sert
+    de point de départ à la suivante. Un saut vers une page jamais vue passe par OFFSET.
+    """
+
+    def __init__(self, title, table, columns, format_row, color=None):
+        self.title = title
+        self.table = table
+        self.columns = columns
+        self.format_row = format_row
+        self.color = color or discord.Color.blue()
+        self.after = {0: None}  # page -> (date, id) de la dernière ligne de la page précédente
+        self.total = None
+
+    async def page_count(self):
+        if self.total is None:
+            self.total = (await db_fetchone(f"SELECT COUNT(*) FROM {self.table}"))[0]
+        return max(1, -(-self.total // PAGE_SIZE))
+
+    async def lines(self, page):
+        select = f"SELECT {self.columns}, date, id FROM {self.table}"
+        order = f"ORDER BY date DESC, id DESC LIMIT {PAGE_SIZE}"
+        if page not in self.after:
+            rows = await db_fetchall(f"{select} {order} OFFSET %s", (page * PAGE_SIZE,))
+        elif self.after[page] is None:
+            rows = await db_fetchall(f"{select} {order}")
+        else:
+            rows = await db_fetchall(f"{select} WHERE (date, id) < (%s, %s) {order}", self.after[page])
+        if rows:
+            self.after[page + 1] = (rows[-1][-2], rows[-1][-1])
+        return [self.format_row(row[:-1]) for row in rows]
+
+    async def page_of(self, text):
+        return None
+
+
+class Paginator(discord.ui.View):
+    """Liste paginée : seule la page affichée est construite, au moment du clic.
+
+    La vue ne garde que sa source et le numéro de page, quelle que soit la taille de la liste.
+    """
+
+    def __init__(self, source, timeout=120):
         super().__init__(timeout=timeout)
-        self.embeds = embeds
-        self.current_page = 0
+        self.source = source
+        self.page = 0
+        self.pages = 1
+
+    async def render(self):
+        self.pages = await self.source.page_count()
+        self.page = max(0, min(self.page, self.pages - 1))
+        lines = [
+            line if len(line) <= PAGE_LINE_MAX else line[:PAGE_LINE_MAX - 1] + "…"
+            for line in await self.source.lines(self.page)
+        ]
+        title = self.source.title if self.pages == 1 else f"{self.source.title} (Page {self.page + 1}/{self.pages})"
+        return discord.Embed(title=title, description="\n".join(lines), color=self.source.color)
+
+    async def start(self, send):
+        """Envoie la première page avec `send` (response.send_message ou followup.send)."""
+        embed = await self.render()
+        if self.pages == 1:
+            await send(embed=embed)
+        else:
+            await send(embed=embed, view=self)
+
+    async def show(self, interaction, page):
+        self.page = page
+        await interaction.response.edit_message(embed=await self.render(), view=self)
 
     @discord.ui.button(label="Précédent", style=discord.ButtonStyle.secondary)
     async def previous(self, interaction: discord.Interaction, button: discord.ui.Button):
-        if self.current_page > 0:
-            self.current_page -= 1
-            await interaction.response.edit_message(embed=self.embeds[self.current_page], view=self)
+        if self.page > 0:
+            await self.show(interaction, self.page - 1)
         else:
             await interaction.response.defer()
 
     @discord.ui.button(label="Suivant", style=discord.ButtonStyle.secondary)
     async def next(self, interaction: discord.Interaction, button: discord.ui.Button):
-        if self.current_page < len(self.embeds) - 1:
-            self.current_page += 1
-            await interaction.response.edit_message(embed=self.embeds[self.current_page], view=self)
+        if self.page < self.pages - 1:
+            await self.show(interaction, self.page + 1)
         else:
             await interaction.response.defer()
 
-@supprjeu.autocomplete("name")
-async def supprjeu_autocomplete(interaction: discord.Interaction, current: str):
-    """Propose les noms de jeux présents dans la bibliothèque pour le paramètre 'name'."""
-    current_lower = current.strip().lower()
-    try:
-        cursor.execute("SELECT nom FROM games WHERE LOWER(nom) LIKE %s ORDER BY nom ASC LIMIT 25", (f"%{current_lower}%",))
-        results = cursor.fetchall()
-        suggestions = [row[0] for row in results]
-        return [app_commands.Choice(name=s.capitalize(), value=s) for s in suggestions]
-    except Exception as e:
-        conn.rollback()
-        return []
+    @discord.ui.button(label="Aller à…", style=discord.ButtonStyle.secondary)
+    async def jump(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await interaction.response.send_modal(PageJumpModal(self))
 
-TOKEN = os.getenv("DISCORD_BOT_TOKEN")
-if TOKEN is None:
-    raise ValueError("❌ La variable d'environnement DISCORD_BOT_TOKEN n'est pas définie sur Railway !")
 
-bot.run(TOKEN)
+class PageJumpModal(discord.ui.Modal, title="Aller à…"):
+    target = discord.ui.TextInput(label="Numéro de page, ou début d'un nom", max_length=50)
+
+    def __init__(self, paginator):
+        super().__init__()
+        self.paginator = paginator
+
+    async def on_submit(self, interaction: discord.Interaction):
+        value = self.target.value.strip().lower()
+        if value.isdigit():
+            page = int(value) - 1
+        else:
+            page = await self.paginator.source.page_of(value)
+            if page is None:
+                await interaction.response.send_message("❌ Indiquez un numéro de page.", ephemeral=True)
+                return
+        await self.paginator.show(interaction, page)
+
+if __name__ == "__main__":
+    # Lancé en script (Procfile) : les sous-systèmes qui importent discord_game_bot doivent
+    # retrouver ce module-ci, pas en exécuter une seconde copie avec un autre bot
+    sys.modules.setdefault("discord_game_bot", sys.modules[__name__])
+    TOKEN = os.getenv("DISCORD_BOT_TOKEN")
+    if TOKEN is None:
+        raise ValueError("❌ La variable d'environnement DISCORD_BOT_TOKEN n'est pas définie sur Railway !")
+
+    if VOICE_LISTEN:
+        # Processus de reconnaissance créés avant bot.run(), voir ÉCOUTE VOCALE dans voice.py
+        from voice import voice_listener
+        voice_listener.start()
+    bot.run(TOKEN)
@@ -0,0 +1,448 @@
+import asyncio
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import discord
+from discord import app_commands
+
+from bot_metrics import LatencyStats, metrics
+from discord_game_bot import (
+    ListPageSource, Paginator, catalog, db_fetchall, favorites, start_background_task, stats_fields
+)
+
+############################################
+#         RECOMMANDATIONS
+############################################
+# /recommande : modèle item-item calculé avec numpy (dépendance optionnelle, comme pour
+# l'écoute vocale) à partir des favoris de tous les utilisateurs et des types des jeux.
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+RECOMMEND_NEIGHBORS = int(os.getenv("RECOMMEND_NEIGHBORS", "30"))
+# Part des types dans la similarité entre deux jeux, le reste vient des favoris en commun
+RECOMMEND_TAG_WEIGHT = float(os.getenv("RECOMMEND_TAG_WEIGHT", "0.3"))
+RECOMMEND_UPDATE_INTERVAL = float(os.getenv("RECOMMEND_UPDATE_INTERVAL", "30"))
+RECOMMEND_REBUILD_INTERVAL = float(os.getenv("RECOMMEND_REBUILD_INTERVAL", "3600"))
+# Les paires de favoris d'un utilisateur croissent en n² : au-delà, seul un échantillon compte
+RECOMMEND_MAX_FAVORITES = 200
+# Au-delà de ce nombre de combinaisons de types, pas de matrice de Jaccard entre combinaisons :
+# seuls les jeux aux types identiques se ressemblent
+RECOMMEND_MAX_TAG_SETS = 3000
+RECOMMEND_POPULAR = 200
+RECOMMEND_MAX_RESULTS = 50
+
+
+def favorite_pairs(users, items, n, rows=None):
+    """Paires (a, b) de jeux distincts mis en favoris par un même utilisateur, avec leur nombre.
+
+    Les paires sont triées par (a, b).
+
+    `users` et `items` décrivent les favoris (index compacts). `rows` (masque booléen sur
+    les jeux) restreint le calcul aux paires dont le premier jeu y figure.
+    """
+    empty = np.empty(0, dtype=np.int64)
+    if len(users) == 0:
+        return empty, empty, empty
+    # Regroupe par utilisateur, dans un ordre aléatoire mais reproductible pour l'échantillon
+    shuffle = np.random.default_rng(0).random(len(users))
+    order = np.lexsort((shuffle, users))
+    users, items = users[order], items[order]
+    _, starts, sizes = np.unique(users, return_index=True, return_counts=True)
+    rank = np.arange(len(users)) - np.repeat(starts, sizes)
+    kept = rank < RECOMMEND_MAX_FAVORITES
+    if not kept.all():
+        users, items = users[kept], items[kept]
+        _, starts, sizes = np.unique(users, return_index=True, return_counts=True)
+    group_starts = np.repeat(starts, sizes)
+    group_sizes = np.repeat(sizes, sizes)
+    positions = np.arange(len(items)) if rows is None else np.flatnonzero(rows[items])
+    counts = group_sizes[positions]
+    first = np.repeat(positions, counts)
+    second = np.repeat(group_starts[positions], counts) + (
+        np.arange(len(first)) - np.repeat(np.cumsum(counts) - counts, counts)
+    )
+    distinct = first != second
+    a = items[first[distinct]].astype(np.int64)
+    b = items[second[distinct]].astype(np.int64)
+    keys, together = np.unique(a * n + b, return_counts=True)
+    return keys // n, keys % n, together
+
+
+def top_neighbors(a, b, scores, n, k):
+    """Les k meilleurs voisins de chaque jeu, au format CSR (indptr, voisins, scores)."""
+    # Un seul tri : par jeu, puis par score décroissant (scores entre 0 et 1)
+    order = np.argsort(a + (1 - scores) / 2, kind="stable")
+    a, b, scores = a[order], b[order], scores[order]
+    starts = np.flatnonzero(np.r_[True, a[1:] != a[:-1]]) if len(a) else a[:0]
+    rank = np.arange(len(a)) - np.repeat(starts, np.diff(np.r_[starts, len(a)]))
+    kept = rank < k
+    a, b, scores = a[kept], b[kept], scores[kept]
+    indptr = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(np.bincount(a, minlength=n), out=indptr[1:])
+    return indptr, b.astype(np.int32), scores.astype(np.float32)
+
+
+def sorted_update(keys, added, removed):
+    """Tableau trié `keys` avec `added` en plus et `removed` en moins, sans retrier le tout."""
+    if len(keys):
+        slots = np.searchsorted(keys, removed).clip(max=len(keys) - 1)
+        keys = np.delete(keys, slots[keys[slots] == removed])
+    added = np.unique(added)
+    if len(keys):
+        slots = np.searchsorted(keys, added).clip(max=len(keys) - 1)
+        added = added[keys[slots] != added]
+    return np.insert(keys, np.searchsorted(keys, added), added)
+
+
+class NeighborTable:
+    """Voisins précalculés de chaque jeu, au format CSR.
+
+    Les lignes recalculées par une mise à jour incrémentale sont rangées dans `patched`,
+    qui prime sur le CSR jusqu'à la reconstruction complète suivante.
+    """
+    __slots__ = (
+        "ids", "item_sets", "jaccard", "tag_neighbors", "tag_scores",
+        "indptr", "neighbors", "scores", "patched", "popular"
+    )
+
+    def __init__(self, ids, item_sets, jaccard, tag_neighbors, tag_scores):
+        self.ids = ids                        # ids des jeux, triés (index compact = position)
+        self.item_sets = item_sets            # combinaison de types de chaque jeu, -1 sans type
+        self.jaccard = jaccard                # similarité entre combinaisons, None si trop nombreuses
+        self.tag_neighbors = tag_neighbors    # jeux candidats par combinaison (-1 = vide)
+        self.tag_scores = tag_scores
+        self.indptr = self.neighbors = self.scores = None
+        self.patched = {}
+        self.popular = []
+
+    def index(self, game_ids):
+        """Index compacts des ids connus de la table."""
+        game_ids = np.asarray(game_ids, dtype=np.int64)
+        if not len(self.ids):
+            return game_ids[:0]
+        positions = np.searchsorted(self.ids, game_ids).clip(max=len(self.ids) - 1)
+        return positions[self.ids[positions] == game_ids]
+
+    def row(self, i):
+        patch = self.patched.get(i)
+        if patch is not None:
+            return patch
+        start, end = self.indptr[i], self.indptr[i + 1]
+        return self.neighbors[start:end], self.scores[start:end]
+
+    def tag_similarity(self, a, b):
+        sa, sb = self.item_sets[a], self.item_sets[b]
+        typed = (sa >= 0) & (sb >= 0)
+        similarity = np.zeros(len(a), dtype=np.float32)
+        if self.jaccard is None:
+            similarity[typed & (sa == sb)] = 1
+        else:
+            similarity[typed] = self.jaccard[sa[typed], sb[typed]]
+        return similarity
+
+    def compute_rows(self, users, items, popularity, rows=None):
+        """Voisins des jeux de `rows` (tous si None) : favoris en commun, complétés par les types.
+
+        `popularity` : nombre de favoris de chaque jeu, sur tous les utilisateurs.
+        """
+        n = len(self.ids)
+        a, b, together = favorite_pairs(users, items, n, rows)
+        cooccurrence = together / np.sqrt(popularity[a] * popularity[b])
+        scores = (1 - RECOMMEND_TAG_WEIGHT) * cooccurrence + RECOMMEND_TAG_WEIGHT * self.tag_similarity(a, b)
+
+        typed = np.flatnonzero(self.item_sets >= 0)
+        if rows is not None:
+            typed = typed[rows[typed]]
+        width = self.tag_neighbors.shape[1]
+        tag_a = np.repeat(typed, width)
+        tag_b = self.tag_neighbors[self.item_sets[typed]].ravel()
+        tag_scores = RECOMMEND_TAG_WEIGHT * self.tag_scores[self.item_sets[typed]].ravel()
+        valid = (tag_b >= 0) & (tag_b != tag_a)
+        # Une paire déjà liée par des favoris a déjà sa part de types dans son score
+        pairs = a * n + b
+        tag_pairs = tag_a * n + tag_b
+        found = np.searchsorted(pairs, tag_pairs).clip(max=max(len(pairs) - 1, 0))
+        if len(pairs):
+            valid &= pairs[found] != tag_pairs
+
+        return top_neighbors(
+            np.concatenate([a, tag_a[valid]]), np.concatenate([b, tag_b[valid]]),
+            np.concatenate([scores, tag_scores[valid]]), n, RECOMMEND_NEIGHBORS
+        )
+
+    def set_popularity(self, popularity):
+        ranked = np.argsort(-popularity, kind="stable")[:RECOMMEND_POPULAR]
+        self.popular = [int(self.ids[i]) for i in ranked if popularity[i] > 0]
+
+    @classmethod
+    def build(cls, game_ids, game_tags, users, items):
+        """Table complète à partir des jeux (ids triés, frozenset de tags) et des favoris."""
+        sets = {}
+        item_sets = np.fromiter(
+            (sets.setdefault(tags, len(sets)) if tags else -1 for tags in game_tags),
+            dtype=np.int64, count=len(game_tags)
+        )
+        jaccard = None
+        if len(sets) <= RECOMMEND_MAX_TAG_SETS:
+            tag_index = {}
+            cells = [(s, tag_index.setdefault(tag, len(tag_index))) for tags, s in sets.items() for tag in tags]
+            members = np.zeros((len(sets), len(tag_index)), dtype=np.float32)
+            if cells:
+                members[tuple(np.array(cells).T)] = 1
+            common = members @ members.T
+            size = members.sum(axis=1)
+            jaccard = common / (size[:, None] + size[None, :] - common)
+
+        # Candidats par combinaison de types : les jeux les plus mis en favoris des
+        # combinaisons les plus proches (la combinaison elle-même d'abord)
+        popularity = np.bincount(items, minlength=len(game_ids))
+        order = np.lexsort((-popularity, item_sets))
+        order = order[item_sets[order] >= 0]
+        grouped = item_sets[order]
+        starts = np.searchsorted(grouped, np.arange(len(sets)))
+        ends = np.searchsorted(grouped, np.arange(len(sets)), side="right")
+        width = RECOMMEND_NEIGHBORS + 1  # + 1 : le jeu lui-même figure parmi les candidats
+        tag_neighbors = np.full((len(sets), width), -1, dtype=np.int64)
+        tag_scores = np.zeros((len(sets), width), dtype=np.float32)
+        for s in range(len(sets)):
+            if jaccard is None:
+                closest = [s]
+            else:
+                similar = np.flatnonzero(jaccard[s] > 0)
+                closest = similar[np.argsort(-jaccard[s, similar], kind="stable")]
+            filled = 0
+            for t in closest:
+                taken = order[starts[t]:min(ends[t], starts[t] + width - filled)]
+                tag_neighbors[s, filled:filled + len(taken)] = taken
+                tag_scores[s, filled:filled + len(taken)] = 1 if jaccard is None else jaccard[s, t]
+                filled += len(taken)
+                if filled == width:
+                    break
+
+        table = cls(np.asarray(game_ids, dtype=np.int64), item_sets, jaccard, tag_neighbors, tag_scores)
+        table.indptr, table.neighbors, table.scores = table.compute_rows(users, items, popularity)
+        table.set_popularity(popularity)
+        return table
+
+
+class RecommendationModel:
+    """Modèle item-item de /recommande, tenu à jour en arrière-plan.
+
+    Similarité de deux jeux = favoris en commun (cosinus sur les utilisateurs) mélangés à la
+    ressemblance de leurs types (Jaccard). Les RECOMMEND_NEIGHBORS meilleurs voisins de chaque
+    jeu sont précalculés : une recommandation ne fait que sommer les lignes des favoris de
+    l'utilisateur. /fav et /unfav signalent leurs changements ; seules les lignes des jeux
+    concernés sont recalculées toutes les RECOMMEND_UPDATE_INTERVAL secondes. Ces lignes gardent
+    la popularité des autres jeux telle qu'à la dernière reconstruction complète, refaite toutes
+    les RECOMMEND_REBUILD_INTERVAL secondes ou quand le catalogue change.
+    """
+
+    def __init__(self):
+        self.table = None
+        self.users = {}       # id Discord -> index compact (tenus par le thread de calcul)
+        self.favorites = None  # clés utilisateur * jeux + jeu, triées
+        self.changes = {}     # (utilisateur, jeu) -> présent, en attente de mise à jour
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="recommend")
+        self.built_at = 0.0
+        self.build_seconds = 0.0
+        self.update_seconds = 0.0
+        self.query_time = LatencyStats()
+
+    @property
+    def available(self):
+        return self.table is not None
+
+    def record(self, user_id, game_id, present):
+        """Favori ajouté (present=True) ou retiré, pris en compte à la prochaine mise à jour."""
+        if np is not None:
+            self.changes[(user_id, game_id)] = present
+
+    async def run(self):
+        if np is None:
+            print("🧭 Recommandations indisponibles : module numpy manquant")
+            return
+        while True:
+            try:
+                if (self.table is None or len(self.table.ids) != len(catalog)
+                        or time.monotonic() - self.built_at > RECOMMEND_REBUILD_INTERVAL):
+                    await self.rebuild()
+                elif self.changes:
+                    await self.update()
+            except Exception as e:
+                print(f"❌ Mise à jour des recommandations impossible : {e}")
+            await asyncio.sleep(RECOMMEND_UPDATE_INTERVAL)
+
+    async def rebuild(self):
+        started = time.perf_counter()
+        self.changes.clear()
+        games = sorted(catalog.games.items())
+        rows = await db_fetchall("SELECT user_id, game_id FROM user_favorites")
+        self.table, self.users, self.favorites = await asyncio.get_running_loop().run_in_executor(
+            self.executor, self._build, [game_id for game_id, _ in games],
+            [frozenset(game.tags) for _, game in games], rows
+        )
+        self.built_at = time.monotonic()
+        self.build_seconds = time.perf_counter() - started
+        print(f"🧭 Recommandations calculées : {len(games)} jeux, {len(rows)} favoris ({self.build_seconds:.2f} s)")
+
+    @staticmethod
+    def _build(game_ids, game_tags, rows):
+        favorites = np.array(rows, dtype=np.int64).reshape(-1, 2)
+        users, compact = np.unique(favorites[:, 0], return_inverse=True)
+        game_ids = np.asarray(game_ids, dtype=np.int64)
+        positions = np.searchsorted(game_ids, favorites[:, 1]).clip(max=max(len(game_ids) - 1, 0))
+        known = game_ids[positions] == favorites[:, 1] if len(game_ids) else np.zeros(len(favorites), dtype=bool)
+        compact, items = compact[known], positions[known]
+        table = NeighborTable.build(game_ids, game_tags, compact, items)
+        keys = np.unique(compact * len(game_ids) + items)
+        return table, {int(user): i for i, user in enumerate(users)}, keys
+
+    async def update(self):
+        changes, self.changes = self.changes, {}
+        started = time.perf_counter()
+        result = await asyncio.get_running_loop().run_in_executor(self.executor, self._update, changes)
+        if result is None:
+            await self.rebuild()  # favori d'un jeu arrivé depuis la dernière reconstruction
+            return
+        patches, popularity = result
+        self.table.patched.update(patches)
+        self.table.set_popularity(popularity)
+        self.update_seconds = time.perf_counter() - started
+
+    def _update(self, changes):
+        table = self.table
+        n = len(table.ids)
+        game_ids = list({game_id for _, game_id in changes})
+        changed = table.index(game_ids)
+        if len(changed) != len(game_ids):
+            return None
+        position = dict(zip(table.ids[changed].tolist(), changed.tolist()))
+        added, removed = [], []
+        for (user_id, game_id), present in changes.items():
+            user = self.users.setdefault(user_id, len(self.users))
+            (added if present else removed).append(user * n + position[game_id])
+        added, removed = np.array(added, dtype=np.int64), np.array(removed, dtype=np.int64)
+        self.favorites = sorted_update(self.favorites, added, removed)
+        users, items = self.favorites // n, self.favorites % n
+
+        # Lignes touchées : les jeux modifiés et les autres favoris des mêmes utilisateurs
+        touched = np.concatenate([added, removed])
+        rows = np.zeros(n, dtype=bool)
+        rows[touched % n] = True
+        rows[items[np.isin(users, touched // n)]] = True
+        popularity = np.bincount(items, minlength=n)
+        concerned = np.isin(users, np.unique(users[rows[items]]))
+        indptr, neighbors, scores = table.compute_rows(users[concerned], items[concerned], popularity, rows)
+        patches = {
+            int(i): (neighbors[indptr[i]:indptr[i + 1]], scores[indptr[i]:indptr[i + 1]])
+            for i in np.flatnonzero(rows)
+        }
+        return patches, popularity
+
+    def recommend(self, favorite_ids, count):
+        """[(id du jeu, id du favori qui l'amène ou None)], les meilleurs d'abord."""
+        started = time.perf_counter()
+        table = self.table
+        liked = table.index(list(favorite_ids))
+        results = []
+        rows = [table.row(i) for i in liked]
+        if rows:
+            neighbors = np.concatenate([row[0] for row in rows])
+            scores = np.concatenate([row[1] for row in rows])
+            sources = np.repeat(liked, [len(row[0]) for row in rows])
+            fresh = ~np.isin(neighbors, liked)
+            neighbors, scores, sources = neighbors[fresh], scores[fresh], sources[fresh]
+            candidates, inverse = np.unique(neighbors, return_inverse=True)
+            totals = np.bincount(inverse, weights=scores, minlength=len(candidates))
+            # Favori qui contribue le plus à chaque candidat
+            order = np.lexsort((scores, inverse))
+            last = np.ones(len(order), dtype=bool)
+            last[:-1] = inverse[order][1:] != inverse[order][:-1]
+            reasons = sources[order][last]
+            for j in np.argsort(-totals, kind="stable"):
+                game_id = int(table.ids[candidates[j]])
+                if game_id in catalog.games:
+                    results.append((game_id, int(table.ids[reasons[j]])))
+                    if len(results) == count:
+                        break
+        if len(results) < count:
+            # Complète avec les jeux les plus mis en favoris (utilisateur sans favoris...)
+            taken = set(favorite_ids).union(game_id for game_id, _ in results)
+            for game_id in table.popular:
+                if game_id not in taken and game_id in catalog.games:
+                    results.append((game_id, None))
+                    if len(results) == count:
+                        break
+        self.query_time.observe(time.perf_counter() - started)
+        return results
+
+
+recommendations = RecommendationModel()
+
+
+@app_commands.command(name="recommande", description="Vous recommande des jeux d'après vos favoris")
+async def recommande(interaction: discord.Interaction, nombre: int = 10):
+    """Jeux proches de vos favoris (appréciés par les mêmes joueurs, ou de types voisins)."""
+    if not recommendations.available:
+        await interaction.response.send_message("❌ Les recommandations ne sont pas encore disponibles.", ephemeral=True)
+        return
+    try:
+        fav_ids = await favorites.get(interaction.user.id)
+        results = recommendations.recommend(fav_ids, max(1, min(nombre, RECOMMEND_MAX_RESULTS)))
+        if not results:
+            await interaction.response.send_message("❌ Pas encore assez de favoris pour vous recommander des jeux.", ephemeral=True)
+            return
+
+        def format_item(result):
+            game = catalog.get(result[0])
+            if game is None:
+                return "• *(jeu retiré du catalogue)*"
+            reason = catalog.get(result[1]) if result[1] is not None else None
+            because = f"parce que vous aimez {reason.nom.capitalize()}" if reason else "populaire chez les joueurs"
+            return f"• **{game.nom.capitalize()}** ({(game.type or '—').capitalize()}) — {because}"
+
+        source = ListPageSource("🧭 Jeux recommandés pour vous", results, format_item)
+        await Paginator(source).start(interaction.response.send_message)
+    except Exception as e:
+        await interaction.response.send_message(f"❌ Erreur lors de la recommandation : {str(e)}", ephemeral=True)
+
+
+############################################
+#         BRANCHEMENT AU BOT
+############################################
+# setup(bot) est appelé par setup_hook (SUBSYSTEMS dans discord_game_bot.py)
+
+def recommend_metrics(out):
+    if not recommendations.available:
+        return
+    out.gauge("bot_recommend_build_seconds", "Durée de la dernière reconstruction des recommandations.",
+              f"{recommendations.build_seconds:.3f}")
+    out.gauge("bot_recommend_update_seconds", "Durée de la dernière mise à jour incrémentale des recommandations.",
+              f"{recommendations.update_seconds:.3f}")
+    out.gauge("bot_recommend_patched_rows", "Voisinages recalculés depuis la dernière reconstruction.",
+              len(recommendations.table.patched))
+    out.summary("bot_recommend_seconds", "Durée du calcul d'une recommandation.",
+                {"all": recommendations.query_time}, lambda key: 'model="item-item"')
+
+
+def recommend_stats():
+    if not recommendations.available:
+        return None
+    q = recommendations.query_time.quantiles()
+    return "Recommandations", (
+        f"{len(recommendations.table.ids)} jeux, reconstruites en {recommendations.build_seconds:.2f} s, "
+        f"{len(recommendations.table.patched)} voisinage(s) mis à jour depuis — "
+        f"p50 {q[0.5] * 1000:.1f} ms · p95 {q[0.95] * 1000:.1f} ms"
+    )
+
+
+async def setup(bot):
+    bot.tree.add_command(recommande)
+    favorites.listeners["recommender"] = recommendations.record
+    metrics.collectors["recommender"] = recommend_metrics
+    stats_fields["recommender"] = recommend_stats
+    start_background_task(recommendations.run())
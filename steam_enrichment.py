@@ -0,0 +1,455 @@
+import asyncio
+import datetime
+import json
+import os
+import re
+import threading
+import time
+
+import aiohttp
+import discord
+import psycopg2
+import psycopg2.extras
+from discord import app_commands
+
+from bot_metrics import metrics
+from discord_game_bot import (
+    GAME_COLUMNS, ListPageSource, Paginator, TokenBucket, catalog, db_execute, db_fetchall, db_run,
+    normalize_name, parse_price, save_games, start_background_task
+)
+
+############################################
+#         ENRICHISSEMENT STEAM
+############################################
+# Un worker relit périodiquement la page Steam des jeux (d'après leur steam_link) et propose
+# la date de sortie, le prix et les genres quand ils diffèrent de la fiche. Rien n'est écrit
+# dans games sans validation d'un admin (/steamvalide). Activé par STEAM_ENRICH=1.
+
+STEAM_ENRICH = os.getenv("STEAM_ENRICH", "0") == "1"
+# Racine du magasin (un serveur local de test peut la remplacer)
+STEAM_STORE_URL = os.getenv("STEAM_STORE_URL", "https://store.steampowered.com").rstrip("/")
+STEAM_CONCURRENCY = int(os.getenv("STEAM_CONCURRENCY", "4"))
+# Steam tolère environ 200 requêtes par tranche de 5 minutes
+STEAM_RATE = int(os.getenv("STEAM_RATE", "200"))
+STEAM_RATE_PERIOD = 300
+STEAM_CACHE_DIR = os.getenv("STEAM_CACHE_DIR", "steam_cache")
+STEAM_CACHE_TTL = float(os.getenv("STEAM_CACHE_TTL", str(7 * 86400)))
+STEAM_ENRICH_INTERVAL = float(os.getenv("STEAM_ENRICH_INTERVAL", str(86400)))
+STEAM_BATCH_SIZE = 50         # propositions écrites en base par lot
+STEAM_MAX_ATTEMPTS = 3
+
+STEAM_APP_ID = re.compile(r"(?:/app/|steam://(?:run|store)/)(\d+)")
+
+
+def steam_app_id(link):
+    """Identifiant Steam d'un lien "https://store.steampowered.com/app/1145360/Hades/", None sinon."""
+    match = STEAM_APP_ID.search(link or "")
+    return int(match.group(1)) if match else None
+
+
+def steam_price(data):
+    """Prix affiché dans les fiches ("19,99 €", "Gratuit"), None si Steam n'en donne pas."""
+    if data.get("is_free"):
+        return "Gratuit"
+    overview = data.get("price_overview")
+    if not overview:
+        return None
+    if overview.get("currency") == "EUR":
+        return f"{overview['final'] / 100:.2f} €".replace(".", ",")
+    return overview.get("final_formatted")
+
+
+# Mois écrits en toutes lettres ou abrégés, français et anglais (sans accents)
+MONTH_PREFIXES = (
+    ("janv", 1), ("jan", 1), ("fevr", 2), ("fev", 2), ("feb", 2), ("mar", 3), ("avr", 4), ("apr", 4),
+    ("mai", 5), ("may", 5), ("juin", 6), ("jun", 6), ("juil", 7), ("jul", 7), ("aou", 8), ("aug", 8),
+    ("sep", 9), ("oct", 10), ("nov", 11), ("dec", 12),
+)
+NUMERIC_DATE = re.compile(r"\b(\d{1,2})[/.-](\d{1,2})[/.-](\d{4})\b")
+ISO_DATE = re.compile(r"\b(\d{4})-(\d{1,2})-(\d{1,2})\b")
+
+# Genres Steam -> types du bot ; les genres absents ne sont proposés que s'ils sont déjà des
+# types du catalogue, et jamais ceux qui décrivent le modèle économique ou le studio
+STEAM_GENRE_TYPES = {
+    "adventure": "aventure", "racing": "course", "strategy": "stratégie", "sports": "sport",
+    "role-playing": "rpg", "jeu de rôle": "rpg", "occasionnel": "chill", "casual": "chill",
+}
+STEAM_IGNORED_GENRES = {
+    "indépendant", "indie", "accès anticipé", "early access", "free to play", "gratuit",
+    "massivement multijoueur", "massively multiplayer",
+}
+
+
+def parse_release_date(text):
+    """(année, mois, jour) d'une date libre ("13 déc. 2022", "2020", "13/12/2022"), None si illisible.
+
+    Le mois et le jour valent None quand la date ne les donne pas.
+    """
+    text = normalize_name(text or "")
+    match = ISO_DATE.search(text)
+    if match:
+        return int(match.group(1)), int(match.group(2)), int(match.group(3))
+    match = NUMERIC_DATE.search(text)
+    if match:
+        return int(match.group(3)), int(match.group(2)), int(match.group(1))
+    year = re.search(r"\b(\d{4})\b", text)
+    if not year:
+        return None
+    month = next(
+        (number for word in re.findall(r"[a-z]+", text) for prefix, number in MONTH_PREFIXES if word.startswith(prefix)),
+        None
+    )
+    day = re.search(r"\b(\d{1,2})\b", text) if month else None
+    return int(year.group(1)), month, int(day.group(1)) if day else None
+
+
+def same_release_date(steam, current):
+    """Vrai si les deux dates concordent sur tout ce qu'elles précisent toutes les deux."""
+    return all(a is None or b is None or a == b for a, b in zip(steam, current))
+
+
+def steam_types(record, data):
+    """Types à ajouter à la fiche d'après les genres Steam."""
+    missing = []
+    for genre in data.get("genres", ()):
+        name = (genre.get("description") or "").strip().lower()
+        tag = STEAM_GENRE_TYPES.get(name, name)
+        if tag and tag not in STEAM_IGNORED_GENRES and tag in catalog.by_type and tag not in record.tags:
+            missing.append(tag)
+    return list(dict.fromkeys(missing))
+
+
+def steam_proposal(record, data):
+    """(sortie, prix, types) tirés de la fiche Steam, None pour un champ inchangé."""
+    release = data.get("release_date") or {}
+    release_date = None if release.get("coming_soon") else release.get("date")
+    steam_date = parse_release_date(release_date)
+    current_date = parse_release_date(record.release_date)
+    # Date Steam illisible : rien à proposer ; date de la fiche illisible ou vide : on propose
+    if steam_date is None or current_date is not None and same_release_date(steam_date, current_date):
+        release_date = None
+
+    price = steam_price(data)
+    if price is not None and (
+        price == record.price
+        or price == "Gratuit" and record.price_value == 0
+        or parse_price(price) is not None and parse_price(price) == record.price_value
+    ):
+        price = None
+
+    # Les genres Steam complètent les types saisis (chill, coop...) sans les remplacer
+    missing = steam_types(record, data)
+    types = ", ".join(record.tags + tuple(missing)) if missing else None
+
+    if release_date is None and price is None and types is None:
+        return None
+    return release_date, price, types
+
+
+class SteamResponseCache:
+    """Réponses de l'API du magasin Steam sur disque, une par jeu, avec ETag et Last-Modified.
+
+    Une réponse de moins de STEAM_CACHE_TTL est réutilisée sans requête ; au-delà, la requête
+    est conditionnelle et un 304 prolonge la réponse gardée.
+    """
+
+    def __init__(self, directory=STEAM_CACHE_DIR):
+        self.directory = directory
+
+    def path(self, app_id):
+        return os.path.join(self.directory, f"{app_id}.json")
+
+    def load(self, app_id):
+        try:
+            with open(self.path(app_id), encoding="utf-8") as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def store(self, app_id, entry):
+        os.makedirs(self.directory, exist_ok=True)
+        path = self.path(app_id)
+        temporary = f"{path}.{threading.get_ident()}.tmp"
+        with open(temporary, "w", encoding="utf-8") as f:
+            json.dump(entry, f)
+        os.replace(temporary, path)
+
+
+class SteamEnricher:
+    """Worker d'enrichissement des fiches depuis le magasin Steam.
+
+    Une session HTTP partagée (connexions réutilisées, au plus STEAM_CONCURRENCY à la fois),
+    STEAM_CONCURRENCY tâches qui se partagent les jeux à relire et un seau à jetons commun
+    pour rester sous la limite de Steam. Les propositions sont écrites par lots.
+    """
+
+    def __init__(self):
+        self.cache = SteamResponseCache()
+        self.bucket = TokenBucket(STEAM_RATE, STEAM_RATE_PERIOD)
+        self.session = None
+        self.wakeup = asyncio.Event()
+        self.started = False
+        self.running = False
+        self.requests = 0
+        self.not_modified = 0
+        self.cache_hits = 0
+        self.errors = 0
+        self.proposed = 0
+        self.last_run = None
+
+    async def run(self):
+        self.started = True
+        while True:
+            try:
+                await self.enrich(list(catalog.games.values()))
+            except Exception as e:
+                print(f"❌ Enrichissement Steam interrompu : {e}")
+            self.wakeup.clear()
+            try:
+                await asyncio.wait_for(self.wakeup.wait(), STEAM_ENRICH_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+
+    async def enrich(self, games):
+        """Relit la page Steam de `games` et enregistre les propositions. Renvoie leur nombre."""
+        self.running = True
+        started = time.perf_counter()
+        jobs = asyncio.Queue()
+        for game in games:
+            app_id = steam_app_id(game.steam_link)
+            if app_id is not None:
+                jobs.put_nowait((game.id, app_id))
+        proposals = []
+        settled = []  # jeux dont la fiche correspond déjà à Steam
+        proposed = 0
+
+        async def flush():
+            nonlocal proposed
+            batch, done = proposals[:], settled[:]
+            proposals.clear()
+            settled.clear()
+            proposed += await save_steam_proposals(batch, done)
+
+        async def work():
+            while not jobs.empty():
+                game_id, app_id = jobs.get_nowait()
+                try:
+                    data = await self.fetch(app_id)
+                except Exception as e:
+                    self.errors += 1
+                    print(f"⚠️ Fiche Steam {app_id} illisible : {e}")
+                    continue
+                record = catalog.get(game_id)
+                proposal = steam_proposal(record, data) if record is not None and data else None
+                if proposal is not None:
+                    proposals.append((game_id, app_id) + proposal)
+                elif data:
+                    settled.append(game_id)
+                if len(proposals) + len(settled) >= STEAM_BATCH_SIZE:
+                    await flush()
+
+        count = jobs.qsize()
+        try:
+            async with aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=STEAM_CONCURRENCY, ttl_dns_cache=300),
+                timeout=aiohttp.ClientTimeout(total=30),
+                headers={"User-Agent": "Clank/2.0 (bot Discord)"}
+            ) as self.session:
+                await asyncio.gather(*(work() for _ in range(STEAM_CONCURRENCY)))
+            if proposals or settled:
+                await flush()
+        finally:
+            self.session = None
+            self.running = False
+        self.proposed += proposed
+        self.last_run = datetime.datetime.now()
+        print(f"🛒 Enrichissement Steam : {count} jeux relus, {proposed} proposition(s) ({time.perf_counter() - started:.0f} s)")
+        return proposed
+
+    async def fetch(self, app_id):
+        """Champ "data" de la réponse appdetails, depuis le cache disque quand il est frais."""
+        loop = asyncio.get_running_loop()
+        entry = await loop.run_in_executor(None, self.cache.load, app_id)
+        if entry is not None and time.time() - entry["fetched"] < STEAM_CACHE_TTL:
+            self.cache_hits += 1
+            return entry["data"]
+
+        headers = {}
+        if entry is not None:
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                headers["If-Modified-Since"] = entry["last_modified"]
+        params = {"appids": str(app_id), "cc": "fr", "l": "french"}
+        for attempt in range(1, STEAM_MAX_ATTEMPTS + 1):
+            await self.bucket.acquire()
+            self.requests += 1
+            async with self.session.get(f"{STEAM_STORE_URL}/api/appdetails", params=params, headers=headers) as response:
+                if response.status == 304 and entry is not None:
+                    self.not_modified += 1
+                    entry["fetched"] = time.time()
+                    break
+                if response.status == 429 or response.status >= 500:
+                    if attempt == STEAM_MAX_ATTEMPTS:
+                        response.raise_for_status()
+                    retry_after = response.headers.get("Retry-After", "")
+                    self.bucket.pause(float(retry_after) if retry_after.isdigit() else 60 * attempt)
+                    continue
+                response.raise_for_status()
+                body = await response.json(content_type=None)
+                result = (body or {}).get(str(app_id)) or {}
+                entry = {
+                    "fetched": time.time(),
+                    "etag": response.headers.get("ETag"),
+                    "last_modified": response.headers.get("Last-Modified"),
+                    "data": result.get("data") if result.get("success") else None,
+                }
+                break
+        await loop.run_in_executor(None, self.cache.store, app_id, entry)
+        return entry["data"]
+
+
+steam_enricher = SteamEnricher()
+
+
+async def save_steam_proposals(rows, settled=()):
+    """Enregistre un lot de propositions (game_id, app_id, sortie, prix, types). Renvoie les nouvelles.
+
+    Une proposition refusée n'est pas reproposée tant que Steam renvoie les mêmes valeurs.
+    Les propositions des jeux de `settled`, déjà à jour, sont retirées.
+    """
+    def work(cur):
+        if settled:
+            cur.execute("DELETE FROM steam_proposals WHERE game_id = ANY(%s)", (list(settled),))
+        if not rows:
+            return 0
+        psycopg2.extras.execute_values(cur, '''
+            INSERT INTO steam_proposals (game_id, app_id, new_release_date, new_price, new_type)
+            SELECT v.game_id, v.app_id, v.new_release_date, v.new_price, v.new_type
+            FROM (VALUES %s) AS v(game_id, app_id, new_release_date, new_price, new_type)
+            JOIN games ON games.id = v.game_id
+            ON CONFLICT (game_id) DO UPDATE SET
+                app_id = EXCLUDED.app_id, new_release_date = EXCLUDED.new_release_date,
+                new_price = EXCLUDED.new_price, new_type = EXCLUDED.new_type,
+                refused = FALSE, date = CURRENT_TIMESTAMP
+            WHERE (steam_proposals.new_release_date, steam_proposals.new_price, steam_proposals.new_type)
+                IS DISTINCT FROM (EXCLUDED.new_release_date, EXCLUDED.new_price, EXCLUDED.new_type)
+        ''', rows)
+        return cur.rowcount
+    return await db_run(work)
+
+
+@app_commands.command(name="steampropositions", description="Liste les mises à jour proposées depuis Steam (ADMIN)")
+@app_commands.check(lambda interaction: interaction.user.guild_permissions.administrator)
+async def steampropositions(interaction: discord.Interaction):
+    """Champs de chaque fiche que Steam propose de changer, en attente de /steamvalide."""
+    try:
+        rows = await db_fetchall('''
+            SELECT game_id, new_release_date, new_price, new_type FROM steam_proposals
+            WHERE NOT refused ORDER BY date DESC
+        ''')
+        rows = [row for row in rows if catalog.get(row[0]) is not None]
+        if not rows:
+            status = " (relecture en cours)" if steam_enricher.running else ""
+            await interaction.response.send_message(f"✅ Aucune proposition en attente{status}.", ephemeral=True)
+            return
+
+        def format_row(row):
+            game = catalog.get(row[0])
+            if game is None:
+                return "• *(jeu retiré du catalogue)*"
+            changes = [
+                f"{label} {old or '—'} → {new}"
+                for label, old, new in (("sortie", game.release_date, row[1]), ("prix", game.price, row[2]),
+                                        ("types", game.type, row[3]))
+                if new is not None
+            ]
+            return f"• **{game.nom.capitalize()}** : " + " · ".join(changes)
+
+        source = ListPageSource(f"🛒 Propositions Steam ({len(rows)})", rows, format_row)
+        await Paginator(source).start(interaction.response.send_message)
+    except Exception as e:
+        await interaction.response.send_message(f"❌ Erreur lors de la lecture des propositions : {str(e)}", ephemeral=True)
+
+@app_commands.command(name="steamvalide", description="Applique (ou refuse) les propositions Steam d'un jeu, ou de tous (ADMIN)")
+@app_commands.check(lambda interaction: interaction.user.guild_permissions.administrator)
+async def steamvalide(interaction: discord.Interaction, name: str, refuser: bool = False):
+    """`name` = "tout" pour traiter toutes les propositions en attente."""
+    try:
+        if name.strip().lower() == "tout":
+            ids = [row[0] for row in await db_fetchall("SELECT game_id FROM steam_proposals WHERE NOT refused")]
+        else:
+            game_info = catalog.find(name)
+            if game_info is None:
+                await interaction.response.send_message(f"❌ Aucun jeu trouvé avec le nom '{name}'.", ephemeral=True)
+                return
+            ids = [game_info.id]
+
+        if refuser:
+            count = await db_execute(
+                "UPDATE steam_proposals SET refused = TRUE WHERE game_id = ANY(%s) AND NOT refused", (ids,)
+            )
+            await interaction.response.send_message(f"🗑️ {count} proposition(s) Steam refusée(s).")
+            return
+
+        updated = await save_games(f'''
+            WITH accepted AS (
+                DELETE FROM steam_proposals WHERE game_id = ANY(%s) AND NOT refused
+                RETURNING game_id, new_release_date, new_price, new_type
+            )
+            UPDATE games SET
+                release_date = COALESCE(new_release_date, release_date),
+                price = COALESCE(new_price, price),
+                type = COALESCE(new_type, type)
+            FROM accepted WHERE accepted.game_id = games.id
+            RETURNING {GAME_COLUMNS}
+        ''', (ids,))
+        if not updated:
+            await interaction.response.send_message("❌ Aucune proposition Steam en attente.", ephemeral=True)
+            return
+        names = ", ".join(game.nom.capitalize() for game in updated[:10])
+        more = f" et {len(updated) - 10} autre(s)" if len(updated) > 10 else ""
+        await interaction.response.send_message(f"✅ Fiche(s) mise(s) à jour depuis Steam : **{names}**{more}")
+    except Exception as e:
+        await interaction.response.send_message(f"❌ Erreur lors de la validation des propositions : {str(e)}", ephemeral=True)
+
+@steamvalide.autocomplete("name")
+async def steamvalide_autocomplete(interaction: discord.Interaction, current: str):
+    suggestions = ["tout"] + [game.nom.capitalize() for game in catalog.autocomplete(current, limit=24)]
+    return [app_commands.Choice(name=name, value=name) for name in suggestions]
+
+@app_commands.command(name="steamsync", description="Relance tout de suite l'enrichissement depuis Steam (ADMIN)")
+@app_commands.check(lambda interaction: interaction.user.guild_permissions.administrator)
+async def steamsync(interaction: discord.Interaction):
+    if not steam_enricher.started:
+        await interaction.response.send_message("❌ L'enrichissement Steam ne tourne pas sur cette instance du bot.", ephemeral=True)
+    elif steam_enricher.running:
+        await interaction.response.send_message("⏳ Une relecture des fiches Steam est déjà en cours.", ephemeral=True)
+    else:
+        steam_enricher.wakeup.set()
+        await interaction.response.send_message("🛒 Relecture des fiches Steam lancée.", ephemeral=True)
+
+
+############################################
+#         BRANCHEMENT AU BOT
+############################################
+# setup(bot) est appelé par setup_hook (SUBSYSTEMS dans discord_game_bot.py)
+
+def steam_metrics(out):
+    if not steam_enricher.started:
+        return
+    out.gauge("bot_steam_requests", "Requêtes envoyées au magasin Steam.", steam_enricher.requests)
+    out.gauge("bot_steam_not_modified", "Réponses 304 du magasin Steam (cache disque revalidé).",
+              steam_enricher.not_modified)
+    out.gauge("bot_steam_cache_hits", "Fiches Steam lues dans le cache disque sans requête.", steam_enricher.cache_hits)
+    out.gauge("bot_steam_errors", "Fiches Steam illisibles.", steam_enricher.errors)
+    out.gauge("bot_steam_proposals", "Propositions de mise à jour enregistrées.", steam_enricher.proposed)
+
+
+async def setup(bot):
+    for command in (steampropositions, steamvalide, steamsync):
+        bot.tree.add_command(command)
+    metrics.collectors["steam"] = steam_metrics
+    # Un seul processus relit Steam : celui du shard 0
+    if STEAM_ENRICH and 0 in (bot.shard_ids or [0]):
+        start_background_task(steam_enricher.run())
@@ -0,0 +1,23 @@
+import asyncio
+from types import SimpleNamespace
+
+import discord
+
+import discord_game_bot as bot
+
+
+def interaction(administrator):
+    permissions = discord.Permissions(administrator=administrator)
+    return SimpleNamespace(user=SimpleNamespace(guild_permissions=permissions))
+
+
+def test_config_hidden_from_non_admins_by_default():
+    assert bot.config_command.default_permissions.administrator
+
+
+def test_config_rejects_non_admin():
+    assert not asyncio.run(bot.config_command._check_can_run(interaction(False)))
+
+
+def test_config_accepts_admin():
+    assert asyncio.run(bot.config_command._check_can_run(interaction(True)))
@@ -0,0 +1,15 @@
+import discord_game_bot as bot
+
+
+def test_rendered_card_does_not_share_the_cached_payload():
+    record = bot.GameRecord((
+        1, "hades", "2020", "25 €", "rogue-like", "20h", "Oui", "", "", "Aucun", None, None, None
+    ))
+    renderer = bot.GameCardRenderer()
+    embed = renderer.render(record)
+    fields = len(embed.fields)
+    embed.add_field(name="ajout", value="local")
+    embed.title = "modifié"
+    again = renderer.render(record)
+    assert len(again.fields) == fields
+    assert again.title == "🎮 Hades"
@@ -0,0 +1,67 @@
+import asyncio
+from types import SimpleNamespace
+
+import aiohttp
+import discord
+from aiohttp import web
+
+import bot_metrics
+import discord_game_bot as bot
+
+
+def interaction(name, kind=discord.InteractionType.application_command):
+    return SimpleNamespace(data={"name": name}, type=kind, command_failed=False,
+                           response=SimpleNamespace(is_done=lambda: False))
+
+
+def test_command_timed_until_its_task_ends():
+    async def handle(fake):
+        assert await bot.bot.tree.interaction_check(fake)
+        bot_metrics.metrics.add_api("GET /users/@me", 0.25, False)  # requête faite par la commande
+        await asyncio.sleep(0.01)
+
+    async def main():
+        await asyncio.create_task(handle(interaction("test_mesure")))
+        await asyncio.sleep(0)  # laisse passer le rappel de fin de tâche
+
+    asyncio.run(main())
+    stats = bot_metrics.metrics.calls[("commande", "test_mesure")]
+    assert stats.count == 1 and stats.errors == 0
+    assert stats.api == 0.25 and stats.total >= 0.01
+
+
+def test_unanswered_autocomplete_counts_as_error():
+    async def main():
+        fake = interaction("test_auto", discord.InteractionType.autocomplete)
+        await asyncio.create_task(bot.bot.tree.interaction_check(fake))
+        await asyncio.sleep(0)
+
+    asyncio.run(main())
+    assert bot_metrics.metrics.calls[("autocomplete", "test_auto")].errors == 1
+
+
+def test_http_trace_records_templated_routes():
+    async def messages(request):
+        return web.json_response([])
+
+    async def main():
+        app = web.Application()
+        app.router.add_get("/api/v10/channels/{channel}/messages", messages)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        try:
+            async with aiohttp.ClientSession(trace_configs=[bot_metrics.api_trace_config()]) as session:
+                url = f"http://127.0.0.1:{port}/api/v10/channels/123456789012345678/messages"
+                async with session.get(url) as response:
+                    await response.read()
+                async with session.get(url.replace("messages", "pins")) as response:
+                    await response.read()
+        finally:
+            await runner.cleanup()
+
+    asyncio.run(main())
+    assert bot_metrics.metrics.routes["GET /channels/{id}/messages"].errors == 0
+    assert bot_metrics.metrics.routes["GET /channels/{id}/pins"].errors == 1  # 404
@@ -0,0 +1,28 @@
+import asyncio
+import socket
+
+import bot_metrics
+
+
+def test_metrics_port_offset_by_first_shard(monkeypatch):
+    monkeypatch.setattr(bot_metrics, "METRICS_PORT", 9108)
+    assert bot_metrics.metrics_port([4, 5]) == 9112
+    assert bot_metrics.metrics_port(None) == 9108
+    monkeypatch.setattr(bot_metrics, "METRICS_PORT", 0)
+    assert bot_metrics.metrics_port([4, 5]) == 0  # endpoint désactivé
+
+
+def test_metrics_port_in_use_does_not_stop_startup(monkeypatch):
+    with socket.socket() as taken:
+        taken.bind((bot_metrics.METRICS_HOST, 0))
+        taken.listen()
+        monkeypatch.setattr(bot_metrics, "METRICS_PORT", taken.getsockname()[1])
+        asyncio.run(bot_metrics.start_metrics_server())
+
+
+def test_collectors_add_their_own_metrics(monkeypatch):
+    def collector(out):
+        out.gauge("bot_test_gauge", "Jauge de test.", 3)
+
+    monkeypatch.setitem(bot_metrics.metrics.collectors, "test", collector)
+    assert "\nbot_test_gauge 3\n" in bot_metrics.metrics.render()
@@ -0,0 +1,66 @@
+import pytest
+
+import discord_game_bot as bot
+import steam_enrichment
+
+
+def record(release_date="13 décembre 2022", price="19,99 €", types="action, rpg"):
+    return bot.GameRecord((
+        1, "jeu", release_date, price, types, "20h", "Non", "", "https://store.steampowered.com/app/1/",
+        "Aucun", None, bot.parse_price(price), 20.0
+    ))
+
+
+def steam(date="13 déc. 2022", final=1999, genres=("Action", "RPG")):
+    return {
+        "release_date": {"coming_soon": False, "date": date},
+        "price_overview": {"currency": "EUR", "final": final, "final_formatted": "19,99€"},
+        "genres": [{"description": genre} for genre in genres],
+    }
+
+
+@pytest.fixture(autouse=True)
+def catalog_types(monkeypatch):
+    monkeypatch.setattr(bot.catalog, "by_type", {tag: bot.IdPool() for tag in ("action", "rpg", "aventure", "chill")})
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("13 déc. 2022", (2022, 12, 13)),
+    ("13 décembre 2022", (2022, 12, 13)),
+    ("Dec 13, 2022", (2022, 12, 13)),
+    ("13/12/2022", (2022, 12, 13)),
+    ("2022-12-13", (2022, 12, 13)),
+    ("1 août 2019", (2019, 8, 1)),
+    ("juin 2021", (2021, 6, None)),
+    ("2020", (2020, None, None)),
+    ("Bientôt", None),
+    ("", None),
+])
+def test_parse_release_date(text, expected):
+    assert steam_enrichment.parse_release_date(text) == expected
+
+
+def test_same_game_gives_no_proposal():
+    assert steam_enrichment.steam_proposal(record(), steam()) is None
+
+
+def test_year_only_card_agrees_with_full_steam_date():
+    assert steam_enrichment.steam_proposal(record(release_date="2022"), steam()) is None
+
+
+def test_different_date_is_proposed():
+    assert steam_enrichment.steam_proposal(record(), steam(date="14 déc. 2022")) == ("14 déc. 2022", None, None)
+
+
+def test_unreadable_card_date_is_proposed():
+    assert steam_enrichment.steam_proposal(record(release_date="Aucun"), steam())[0] == "13 déc. 2022"
+
+
+def test_store_only_genres_are_not_proposed():
+    assert steam_enrichment.steam_proposal(record(), steam(genres=("Action", "Indépendant", "Accès anticipé", "Utilitaires"))) is None
+
+
+def test_genres_are_mapped_to_known_types():
+    assert steam_enrichment.steam_proposal(record(), steam(genres=("Adventure", "Occasionnel"))) == (
+        None, None, "action, rpg, aventure, chill"
+    )
@@ -0,0 +1,750 @@
+import asyncio
+import hashlib
+import importlib
+import io
+import itertools
+import json
+import multiprocessing
+import os
+import queue
+import re
+import subprocess
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import discord
+from discord import app_commands
+
+from bot_metrics import LatencyStats, metrics
+from discord_game_bot import (
+    VOICE_TTS, catalog, game_cards, game_search, games_added_listeners, outbox, parse_types, pick_suggestion,
+    start_background_task, stats_fields
+)
+
+############################################
+#         ÉCOUTE VOCALE (VOSK)
+############################################
+# Activée par VOICE_LISTEN=1. Dépendances optionnelles : sans vosk, numpy ou
+# discord-ext-voice-recv, /ecoute est simplement indisponible.
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+try:
+    import vosk
+    from discord.ext import voice_recv
+except ImportError as e:
+    vosk = voice_recv = None
+    VOICE_MISSING = e.name
+else:
+    VOICE_MISSING = None if np is not None else "numpy"
+
+# Le modèle Kaldi/Vosk livré avec le dépôt (final.mat, mfcc.conf...) est à la racine
+VOSK_MODEL_PATH = os.getenv("VOSK_MODEL_PATH", os.path.dirname(os.path.abspath(__file__)))
+VOICE_WORKERS = int(os.getenv("VOICE_WORKERS", str(max(1, (os.cpu_count() or 2) - 1))))
+VOICE_SAMPLE_RATE = 16000
+VOICE_CHUNK_SAMPLES = VOICE_SAMPLE_RATE * 60 // 1000  # 60 ms de parole au minimum par envoi
+VOICE_FLUSH_DELAY = 0.8  # silence (s) après lequel la phrase en cours est terminée
+# Mot d'éveil à prononcer avant la commande ("clank, propose un jeu"), vide = aucun
+VOICE_WAKE_WORD = os.getenv("VOICE_WAKE_WORD", "clank").strip().lower()
+# Détection de parole : énergie minimale d'un paquet, puis traîne et préambule gardés autour
+VOICE_VAD_DBFS = float(os.getenv("VOICE_VAD_DBFS", "-45"))
+VOICE_VAD_HANGOVER = VOICE_SAMPLE_RATE * 300 // 1000
+VOICE_VAD_PREROLL = VOICE_SAMPLE_RATE * 200 // 1000
+
+DISCORD_FRAME = 960  # échantillons par canal d'un paquet Discord (20 ms à 48 kHz)
+DECIMATION = 3       # 48 kHz -> 16 kHz
+
+
+def decimation_filter(taps=48):
+    """Passe-bas avant décimation (sinus cardinal fenêtré, coupure 7 kHz à 48 kHz).
+
+    Inclut le facteur 1/2 du mixage stéréo -> mono (les deux voies sont additionnées).
+    """
+    n = np.arange(taps) - (taps - 1) / 2
+    h = np.sinc(2 * 7000 / 48000 * n) * np.hamming(taps)
+    return (h / h.sum() / 2).astype(np.float32)
+
+
+DECIMATION_TAPS = decimation_filter() if np is not None else None
+
+
+class AudioFrontEnd:
+    """Chaîne audio d'un locuteur : 48 kHz stéréo -> 16 kHz mono, détection de parole, blocs.
+
+    Tous les tableaux sont alloués à la création. Un paquet est lu en place (np.frombuffer),
+    mixé en mono dans `work` derrière l'historique du filtre, filtré et décimé d'un seul
+    matmul sur une vue à pas de 3 (as_strided, sans copie), puis rangé dans un tampon
+    circulaire. Seul le bloc finalement envoyé au recognizer est copié (bytes).
+    Les paquets sous VOICE_VAD_DBFS ne partent jamais, à part le préambule et la traîne
+    qui entourent la parole.
+    """
+
+    __slots__ = ("work", "filled", "right", "out", "views", "ring", "head", "sent", "hangover", "active", "silence_floor")
+
+    def __init__(self, max_frames=DISCORD_FRAME * 6):
+        taps = len(DECIMATION_TAPS)
+        self.work = np.zeros(taps - 1 + max_frames, dtype=np.float32)
+        self.filled = taps - 1  # historique du filtre, nul au départ
+        self.right = np.empty(max_frames, dtype=np.float32)
+        self.out = np.empty(max_frames // DECIMATION + 1, dtype=np.float32)
+        self.views = {}  # nombre de sorties -> (vue des fenêtres, sortie) : construites une fois
+        self.ring = np.zeros(VOICE_SAMPLE_RATE * 2, dtype=np.int16)
+        self.head = 0        # position absolue du prochain échantillon 16 kHz écrit
+        self.sent = 0        # échantillons déjà envoyés ou abandonnés
+        self.hangover = 0    # échantillons de traîne restant à envoyer après la dernière parole
+        self.active = False
+        # Énergie (somme des carrés par échantillon) correspondant au seuil en dBFS
+        self.silence_floor = 32768.0 ** 2 * 10 ** (VOICE_VAD_DBFS / 10)
+
+    def push(self, pcm):
+        """Traite un paquet PCM 48 kHz stéréo 16 bits. Renvoie un bloc PCM 16 kHz mono
+        (bytes) à transmettre au recognizer, ou None."""
+        stereo = np.frombuffer(pcm, dtype=np.int16).reshape(-1, 2)
+        step = len(self.work) - len(DECIMATION_TAPS) + 1
+        for start in range(0, len(stereo), step):
+            self._process(stereo[start:start + step])
+        return self._emit()
+
+    def _process(self, stereo):
+        taps = len(DECIMATION_TAPS)
+        work = self.work
+        end = self.filled + len(stereo)
+        # Conversion en float32 par copyto dans des tableaux existants (un ufunc mixte int16/float32
+        # passerait par un tampon de conversion alloué à chaque appel)
+        mono, right = work[self.filled:end], self.right[:len(stereo)]
+        np.copyto(mono, stereo[:, 0], casting="unsafe")
+        np.copyto(right, stereo[:, 1], casting="unsafe")
+        np.add(mono, right, out=mono)
+        count = (end - taps) // DECIMATION + 1 if end >= taps else 0
+        if count <= 0:
+            self.filled = end
+            return
+        views = self.views.get(count)
+        if views is None:
+            # Fenêtre j = work[3j : 3j + taps] : une ligne par échantillon de sortie, aucune copie
+            views = self.views[count] = (
+                np.lib.stride_tricks.as_strided(
+                    work, shape=(count, taps), strides=(DECIMATION * work.itemsize, work.itemsize)
+                ),
+                self.out[:count],
+            )
+        windows, out = views
+        np.matmul(windows, DECIMATION_TAPS, out=out)
+        consumed = count * DECIMATION
+        work[:end - consumed] = work[consumed:end]
+        self.filled = end - consumed
+
+        if np.dot(out, out) > self.silence_floor * count:
+            self.hangover = VOICE_VAD_HANGOVER
+        else:
+            self.hangover = max(0, self.hangover - count)
+        np.minimum(out, 32767, out=out)
+        np.maximum(out, -32768, out=out)
+        ring = self.ring
+        pos = self.head % len(ring)
+        first = min(count, len(ring) - pos)
+        ring[pos:pos + first] = out[:first]
+        ring[:count - first] = out[first:]
+        self.head += count
+
+    def _emit(self):
+        if self.hangover:
+            self.active = True
+            if self.head - self.sent < VOICE_CHUNK_SAMPLES:
+                return None
+        elif self.active:
+            self.active = False  # fin de la parole : le reste de la traîne part tout de suite
+        else:
+            self.sent = max(self.sent, self.head - VOICE_VAD_PREROLL)
+            return None
+        if self.head == self.sent:
+            return None
+        ring = self.ring
+        start, end = self.sent % len(ring), self.head % len(ring)
+        self.sent = self.head
+        if start < end:
+            return ring[start:end].tobytes()
+        return ring[start:].tobytes() + ring[:end].tobytes()
+
+
+def voice_worker(model_path, inbox, results, model=None):
+    """Processus de reconnaissance : un KaldiRecognizer par locuteur, un seul modèle.
+
+    Reçoit (user_id, pcm, reçu_à) et renvoie (user_id, texte, secondes d'audio, secondes
+    de calcul, attente dans la file). Discord n'envoie rien pendant les silences : la phrase
+    d'un locuteur muet depuis VOICE_FLUSH_DELAY est terminée avec FinalResult().
+    """
+    if model is None:
+        vosk.SetLogLevel(-1)
+        model = vosk.Model(model_path)
+    recognizers = {}  # user_id -> [KaldiRecognizer, dernier audio (monotonic)]
+    while True:
+        try:
+            item = inbox.get(timeout=VOICE_FLUSH_DELAY / 2)
+        except queue.Empty:
+            item = ()
+        if item is None:
+            return
+        now = time.monotonic()
+        if item:
+            user_id, pcm, received_at = item
+            entry = recognizers.get(user_id)
+            if entry is None:
+                entry = recognizers[user_id] = [vosk.KaldiRecognizer(model, VOICE_SAMPLE_RATE), now]
+            started = time.perf_counter()
+            text = json.loads(entry[0].Result())["text"] if entry[0].AcceptWaveform(pcm) else ""
+            compute = time.perf_counter() - started
+            entry[1] = now
+            results.put((user_id, text, len(pcm) / 2 / VOICE_SAMPLE_RATE, compute, time.time() - received_at))
+        for user_id, entry in list(recognizers.items()):
+            if now - entry[1] > VOICE_FLUSH_DELAY:
+                del recognizers[user_id]
+                started = time.perf_counter()
+                text = json.loads(entry[0].FinalResult())["text"]
+                results.put((user_id, text, 0.0, time.perf_counter() - started, 0.0))
+
+
+class VoiceListener:
+    """Reconnaissance des commandes vocales dans les salons où /ecoute a été lancé.
+
+    Le modèle est chargé une fois dans le processus du bot, puis partagé (copy-on-write)
+    par les VOICE_WORKERS processus de reconnaissance créés par fork. Chaque locuteur est
+    toujours envoyé au même processus (user_id % VOICE_WORKERS), qui garde son recognizer.
+    Le temps de calcul rapporté à la durée d'audio reconnue (RTF) mesure le recognizer ;
+    rapporté à la durée d'audio reçue (silences compris, écartés par AudioFrontEnd), il
+    donne la charge supportée : chaque processus suit environ 1 / charge locuteurs.
+    """
+
+    def __init__(self):
+        self.inboxes = []
+        self.results = None
+        self.loop = None
+        self.sessions = {}   # id du serveur -> (VoiceRecvClient, salon texte des réponses)
+        self.speakers = {}   # user_id -> (id du serveur, dernier paquet reçu)
+        self.frontends = {}  # user_id -> AudioFrontEnd
+        self.input_seconds = 0.0
+        self.lock = threading.Lock()
+        self.audio_seconds = 0.0
+        self.compute_seconds = 0.0
+        self.queue_lag = LatencyStats()
+        self.recognized = 0
+
+    @property
+    def available(self):
+        return bool(self.inboxes)
+
+    def start(self):
+        """Charge le modèle et lance les processus, avant bot.run() : aucun thread n'existe encore au fork."""
+        if VOICE_MISSING:
+            print(f"🔇 Écoute vocale indisponible : module {VOICE_MISSING} manquant")
+            return
+        try:
+            vosk.SetLogLevel(-1)
+            started = time.perf_counter()
+            context = multiprocessing.get_context("fork" if "fork" in multiprocessing.get_all_start_methods() else "spawn")
+            model = vosk.Model(VOSK_MODEL_PATH) if context.get_start_method() == "fork" else None
+        except Exception as e:
+            print(f"🔇 Écoute vocale indisponible : modèle Vosk illisible dans {VOSK_MODEL_PATH} ({e})")
+            return
+        self.results = context.Queue()
+        for index in range(VOICE_WORKERS):
+            inbox = context.Queue()
+            context.Process(
+                target=voice_worker, args=(VOSK_MODEL_PATH, inbox, self.results, model),
+                name=f"voice-{index}", daemon=True
+            ).start()
+            self.inboxes.append(inbox)
+        threading.Thread(target=self._collect, name="voice-results", daemon=True).start()
+        print(f"🎙️ Écoute vocale prête : {VOICE_WORKERS} processus ({time.perf_counter() - started:.1f} s)")
+
+    async def join(self, channel, text_channel):
+        self.loop = asyncio.get_running_loop()
+        voice_client = channel.guild.voice_client
+        if voice_client is None:
+            voice_client = await channel.connect(cls=voice_recv.VoiceRecvClient)
+        elif voice_client.channel != channel:
+            await voice_client.move_to(channel)
+        if not voice_client.is_listening():
+            voice_client.listen(VoiceCommandSink(self, channel.guild.id))
+        self.sessions[channel.guild.id] = (voice_client, text_channel)
+
+    async def leave(self, guild):
+        session = self.sessions.pop(guild.id, None)
+        if session is None:
+            return False
+        with self.lock:
+            for user_id, (guild_id, _) in list(self.speakers.items()):
+                if guild_id == guild.id:
+                    del self.speakers[user_id]
+                    self.frontends.pop(user_id, None)
+        await session[0].disconnect()
+        return True
+
+    def feed(self, guild_id, user_id, pcm):
+        """Appelé par le thread de réception audio pour chaque paquet d'un locuteur."""
+        with self.lock:
+            self.speakers[user_id] = (guild_id, time.monotonic())
+            self.input_seconds += len(pcm) / 4 / 48000
+            frontend = self.frontends.get(user_id)
+            if frontend is None:
+                frontend = self.frontends[user_id] = AudioFrontEnd()
+            chunk = frontend.push(pcm)
+        if chunk is None:
+            return
+        self.inboxes[user_id % len(self.inboxes)].put((user_id, chunk, time.time()))
+
+    def stats(self):
+        """RTF, part de l'audio gardée par la détection de parole, locuteurs actifs (audio reçu
+        depuis 2 s) et capacité estimée du nœud."""
+        with self.lock:
+            rtf = self.compute_seconds / self.audio_seconds if self.audio_seconds else 0.0
+            load = self.compute_seconds / self.input_seconds if self.input_seconds else 0.0
+            now = time.monotonic()
+            return {
+                "rtf": rtf,
+                "audio_seconds": self.audio_seconds,
+                "speech_ratio": self.audio_seconds / self.input_seconds if self.input_seconds else 0.0,
+                "speakers": sum(1 for _, seen in self.speakers.values() if now - seen < 2),
+                "capacity": int(len(self.inboxes) / load) if load else 0,
+                "queue_lag_p95": self.queue_lag.quantiles()[0.95],
+                "recognized": self.recognized,
+            }
+
+    def _collect(self):
+        while True:
+            user_id, text, audio, compute, waited = self.results.get()
+            with self.lock:
+                self.audio_seconds += audio
+                self.compute_seconds += compute
+                if audio:
+                    self.queue_lag.observe(waited)
+                guild_id = self.speakers.get(user_id, (None,))[0]
+            if text and guild_id is not None:
+                asyncio.run_coroutine_threadsafe(self.handle(guild_id, user_id, text), self.loop)
+
+    async def handle(self, guild_id, user_id, text):
+        session = self.sessions.get(guild_id)
+        if session is None:
+            return
+        words = text.split()
+        if VOICE_WAKE_WORD:
+            if not words or words[0] != VOICE_WAKE_WORD:
+                return
+            words = words[1:]
+        phrase = " ".join(words)
+        for pattern, action in VOICE_COMMANDS:
+            match = pattern.match(phrase)
+            if match:
+                self.recognized += 1
+                print(f"🎙️ <@{user_id}> : « {phrase} »")
+                await action(session[1], user_id, **match.groupdict())
+                return
+
+
+if voice_recv is not None:
+    class VoiceCommandSink(voice_recv.AudioSink):
+        """Transmet le PCM décodé de chaque locuteur à l'écoute vocale."""
+
+        def __init__(self, listener, guild_id):
+            super().__init__()
+            self.listener = listener
+            self.guild_id = guild_id
+
+        def wants_opus(self):
+            return False
+
+        def write(self, user, data):
+            if user is not None and not user.bot:
+                self.listener.feed(self.guild_id, user.id, data.pcm)
+
+        def cleanup(self):
+            pass
+
+
+voice_listener = VoiceListener()
+
+
+async def voice_fiche(channel, user_id, nom):
+    results = await game_search.search(nom, limit=1)
+    if results:
+        outbox.send(channel, f"🎙️ Fiche demandée par <@{user_id}>", embed=game_cards.render(results[0]))
+    else:
+        outbox.send(channel, f"❌ Aucun jeu trouvé pour « {nom} ».")
+
+
+async def voice_propose(channel, user_id, game_type=None):
+    tags = parse_types(game_type) if game_type else []
+    candidates = catalog.ids_with_types(tags) if tags else catalog.all_ids
+    game_id = pick_suggestion(candidates, user_id)
+    if game_id is None:
+        outbox.send(channel, f"❌ Aucun jeu trouvé pour le type '{game_type}'." if tags else "❌ Aucun jeu enregistré.")
+        return
+    game_info = catalog.get(game_id)
+    outbox.send(channel, f"🎲 <@{user_id}>, pourquoi ne pas essayer **{game_info.nom.capitalize()}** ?",
+                embed=game_cards.render(game_info))
+
+
+# Phrases reconnues (texte Vosk en minuscules, sans le mot d'éveil) -> action
+VOICE_COMMANDS = [
+    (re.compile(r"^(?:affiche |montre )?(?:la )?fiche (?:de |du |des |d')?(?P<nom>.+)$"), voice_fiche),
+    (re.compile(r"^propose(?: moi)? un jeu (?:de |d')(?P<game_type>.+)$"), voice_propose),
+    (re.compile(r"^propose(?: moi)? un jeu$"), voice_propose),
+]
+
+
+@app_commands.command(name="ecoute", description="Le bot rejoint votre salon vocal et écoute les commandes vocales")
+async def ecoute(interaction: discord.Interaction):
+    """Rejoint le salon vocal de l'utilisateur ; les réponses arrivent dans le salon de la commande."""
+    if not voice_listener.available:
+        await interaction.response.send_message("❌ L'écoute vocale n'est pas activée sur ce bot.", ephemeral=True)
+        return
+    voice = getattr(interaction.user, "voice", None)
+    if voice is None or voice.channel is None:
+        await interaction.response.send_message("❌ Rejoignez d'abord un salon vocal.", ephemeral=True)
+        return
+    try:
+        await interaction.response.defer()
+        await voice_listener.join(voice.channel, interaction.channel)
+        wake = f"« {VOICE_WAKE_WORD}, " if VOICE_WAKE_WORD else "« "
+        await interaction.followup.send(
+            f"🎙️ J'écoute dans **{voice.channel.name}** ! Dites par exemple {wake}propose un jeu » "
+            f"ou {wake}fiche Hollow Knight »."
+        )
+    except Exception as e:
+        await interaction.followup.send(f"❌ Impossible de rejoindre le salon vocal : {str(e)}", ephemeral=True)
+
+@app_commands.command(name="stopecoute", description="Le bot quitte le salon vocal")
+async def stopecoute(interaction: discord.Interaction):
+    try:
+        if await voice_listener.leave(interaction.guild):
+            await interaction.response.send_message("🔇 Écoute vocale arrêtée.")
+        else:
+            await interaction.response.send_message("❌ Le bot n'écoute aucun salon vocal.", ephemeral=True)
+    except Exception as e:
+        await interaction.response.send_message(f"❌ Erreur lors de l'arrêt de l'écoute : {str(e)}", ephemeral=True)
+
+
+############################################
+#         ANNONCES VOCALES (TTS)
+############################################
+# Activées par VOICE_TTS=1 : le bot lit les annonces dans le salon vocal où il est connecté.
+
+TTS_CACHE_DIR = os.getenv("TTS_CACHE_DIR", "tts_cache")
+TTS_CACHE_BYTES = int(os.getenv("TTS_CACHE_BYTES", str(200 * 1024 * 1024)))
+TTS_WORKERS = int(os.getenv("TTS_WORKERS", "2"))
+# Synthétiseur "module:fabrique" (ex. un synthétiseur local pour les essais), vide = gTTS + ffmpeg
+TTS_SYNTHESIZER = os.getenv("TTS_SYNTHESIZER", "")
+TTS_QUEUE_SIZE = 20  # annonces en attente par serveur, les suivantes sont abandonnées
+
+
+class GTTSSynthesizer:
+    """gTTS (MP3, via le réseau) puis ffmpeg -> Opus 48 kHz en Ogg, joué tel quel par Discord.
+
+    Un synthétiseur n'a besoin que d'un `name` (qui entre dans la clé du cache : changer de
+    voix ou d'encodage invalide tous les clips) et de `synthesize(texte) -> octets Ogg Opus`.
+    """
+
+    name = "gtts-fr/opus-64k"
+
+    def synthesize(self, text):
+        from gtts import gTTS
+
+        mp3 = io.BytesIO()
+        gTTS(text, lang="fr").write_to_fp(mp3)
+        encoded = subprocess.run(
+            ["ffmpeg", "-loglevel", "error", "-i", "pipe:0", "-c:a", "libopus", "-b:a", "64k",
+             "-ar", "48000", "-ac", "2", "-f", "ogg", "pipe:1"],
+            input=mp3.getvalue(), capture_output=True, check=True
+        )
+        return encoded.stdout
+
+
+def load_synthesizer():
+    if not TTS_SYNTHESIZER:
+        return GTTSSynthesizer()
+    module, _, factory = TTS_SYNTHESIZER.partition(":")
+    return getattr(importlib.import_module(module), factory)()
+
+
+class TTSCache:
+    """Clips Opus des annonces vocales, sur disque, adressés par le hash de leur contenu.
+
+    Clé = sha256(synthétiseur + texte) : un même texte n'est synthétisé qu'une fois, quelle
+    que soit la commande qui le demande. LRU borné à TTS_CACHE_BYTES ; l'ordre d'usage est
+    tenu en mémoire et reporté sur la date de modification des fichiers, relue au démarrage.
+    Les synthèses (réseau, ffmpeg) tournent sur leur propre pool de threads.
+    """
+
+    def __init__(self, directory=TTS_CACHE_DIR, max_bytes=TTS_CACHE_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.synthesizer = None
+        self.executor = None
+        self.entries = OrderedDict()  # clé -> taille, du moins au plus récemment utilisé
+        self.size = 0
+        self.pending = {}             # clé -> synthèse en cours
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.synth_time = LatencyStats()
+
+    @property
+    def available(self):
+        return self.synthesizer is not None
+
+    async def start(self, synthesizer=None):
+        self.synthesizer = synthesizer or load_synthesizer()
+        self.executor = ThreadPoolExecutor(max_workers=TTS_WORKERS, thread_name_prefix="tts")
+        await asyncio.get_running_loop().run_in_executor(self.executor, self._scan)
+        print(f"🗣️ Cache des annonces vocales : {len(self.entries)} clips, {self.size / 1e6:.1f} Mo ({self.synthesizer.name})")
+
+    def key(self, text):
+        return hashlib.sha256(f"{self.synthesizer.name}\n{text}".encode("utf-8")).hexdigest()
+
+    def path(self, key):
+        return os.path.join(self.directory, key[:2], f"{key}.ogg")
+
+    async def get(self, text):
+        """Chemin du clip de `text`, synthétisé au premier appel."""
+        key = self.key(text)
+        if key in self.entries:
+            path = self.path(key)
+            try:
+                os.utime(path)
+            except FileNotFoundError:
+                self._forget(key)
+            else:
+                self.hits += 1
+                self.entries.move_to_end(key)
+                return path
+        self.misses += 1
+        task = self.pending.get(key)
+        if task is None:
+            task = self.pending[key] = asyncio.ensure_future(self._create(key, text))
+            task.add_done_callback(lambda _: self.pending.pop(key, None))
+        return await asyncio.shield(task)
+
+    def prewarm(self, texts):
+        """Synthétise en arrière-plan les clips manquants (annonce et fiche des jeux ajoutés)."""
+        if not self.available:
+            return
+        for text in texts:
+            key = self.key(text)
+            if key not in self.entries and key not in self.pending:
+                start_background_task(self._prewarm(text))
+
+    async def _prewarm(self, text):
+        try:
+            await self.get(text)
+        except Exception as e:
+            print(f"⚠️ Préparation de l'annonce vocale impossible : {e}")
+
+    async def _create(self, key, text):
+        started = time.perf_counter()
+        size = await asyncio.get_running_loop().run_in_executor(self.executor, self._write, key, text)
+        self.synth_time.observe(time.perf_counter() - started)
+        self._forget(key)
+        self.entries[key] = size
+        self.size += size
+        self._evict()
+        return self.path(key)
+
+    def _write(self, key, text):
+        data = self.synthesizer.synthesize(text)
+        path = self.path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Écriture atomique : un clip à moitié écrit n'est jamais lu
+        temporary = f"{path}.{threading.get_ident()}.tmp"
+        with open(temporary, "wb") as f:
+            f.write(data)
+        os.replace(temporary, path)
+        return len(data)
+
+    def _scan(self):
+        os.makedirs(self.directory, exist_ok=True)
+        clips = []
+        for folder, _, names in os.walk(self.directory):
+            for name in names:
+                path = os.path.join(folder, name)
+                if name.endswith(".tmp"):
+                    os.remove(path)  # synthèse interrompue par un arrêt
+                elif name.endswith(".ogg"):
+                    stat = os.stat(path)
+                    clips.append((stat.st_mtime, name[:-4], stat.st_size))
+        for _, key, size in sorted(clips):
+            self.entries[key] = size
+            self.size += size
+        self._evict()
+
+    def _evict(self):
+        while self.size > self.max_bytes and len(self.entries) > 1:
+            key, size = self.entries.popitem(last=False)
+            self.size -= size
+            self.evictions += 1
+            try:
+                os.remove(self.path(key))
+            except FileNotFoundError:
+                pass
+
+    def _forget(self, key):
+        size = self.entries.pop(key, None)
+        if size is not None:
+            self.size -= size
+
+
+tts_cache = TTSCache()
+
+
+class VoiceAnnouncer:
+    """Lecture des annonces dans le salon vocal du bot, une file par serveur (un son à la fois)."""
+
+    def __init__(self):
+        self.queues = {}  # id du serveur -> asyncio.Queue de textes
+
+    def announce(self, guild, text):
+        """Met `text` en file si le bot est connecté en vocal sur ce serveur. Renvoie False sinon."""
+        if not tts_cache.available or guild is None or guild.voice_client is None:
+            return False
+        texts = self.queues.get(guild.id)
+        if texts is None:
+            texts = self.queues[guild.id] = asyncio.Queue(maxsize=TTS_QUEUE_SIZE)
+            start_background_task(self._play(guild, texts))
+        if texts.full():
+            print(f"⚠️ Trop d'annonces vocales en attente sur {guild.name}, annonce abandonnée")
+            return False
+        texts.put_nowait(text)
+        return True
+
+    async def _play(self, guild, texts):
+        loop = asyncio.get_running_loop()
+        while True:
+            text = await texts.get()
+            try:
+                path = await tts_cache.get(text)
+                voice_client = guild.voice_client
+                if voice_client is None or not voice_client.is_connected():
+                    continue
+                finished = asyncio.Event()
+                # Clip déjà en Opus : ffmpeg ne fait que le dépaqueter (codec="copy")
+                voice_client.play(
+                    discord.FFmpegOpusAudio(path, codec="copy"),
+                    after=lambda error: loop.call_soon_threadsafe(finished.set)
+                )
+                await finished.wait()
+            except Exception as e:
+                print(f"❌ Annonce vocale impossible : {e}")
+
+
+voice_announcer = VoiceAnnouncer()
+
+
+def added_speech(name):
+    return f"{name.capitalize()} vient d'être ajouté !"
+
+
+def card_speech(record):
+    """Texte lu pour la fiche d'un jeu."""
+    parts = [record.nom.capitalize()]
+    if record.release_date:
+        parts.append(f"Sortie : {record.release_date}")
+    if record.price:
+        parts.append(f"Prix : {record.price}")
+    if record.type:
+        parts.append(f"Type : {record.type}")
+    if record.duration:
+        parts.append(f"Durée : {record.duration}")
+    if record.commentaire and record.commentaire != "Aucun":
+        parts.append(record.commentaire)
+    return ". ".join(parts) + "."
+
+
+def prewarm_added_games(games):
+    tts_cache.prewarm(itertools.chain.from_iterable((added_speech(game.nom), card_speech(game)) for game in games))
+
+
+@app_commands.command(name="lire", description="Lit la fiche d'un jeu dans votre salon vocal")
+async def lire(interaction: discord.Interaction, game: str):
+    """Rejoint le salon vocal de l'utilisateur si besoin et y lit la fiche du jeu."""
+    if not tts_cache.available:
+        await interaction.response.send_message("❌ Les annonces vocales ne sont pas activées sur ce bot.", ephemeral=True)
+        return
+    game_info = catalog.find(game.strip().lower())
+    if game_info is None:
+        await interaction.response.send_message(f"❌ Aucun jeu trouvé avec le nom '{game}'.", ephemeral=True)
+        return
+    voice = getattr(interaction.user, "voice", None)
+    try:
+        if interaction.guild.voice_client is None:
+            if voice is None or voice.channel is None:
+                await interaction.response.send_message("❌ Rejoignez d'abord un salon vocal.", ephemeral=True)
+                return
+            await interaction.response.defer(ephemeral=True)
+            await voice.channel.connect()
+        else:
+            await interaction.response.defer(ephemeral=True)
+        voice_announcer.announce(interaction.guild, card_speech(game_info))
+        await interaction.followup.send(f"🗣️ Lecture de la fiche de **{game_info.nom.capitalize()}**.", ephemeral=True)
+    except Exception as e:
+        await interaction.followup.send(f"❌ Impossible de lire la fiche : {str(e)}", ephemeral=True)
+
+@lire.autocomplete("game")
+async def lire_autocomplete(interaction: discord.Interaction, current: str):
+    suggestions = [game.nom.capitalize() for game in catalog.autocomplete(current)]
+    return [app_commands.Choice(name=name, value=name) for name in suggestions]
+
+
+############################################
+#         BRANCHEMENT AU BOT
+############################################
+# setup(bot) est appelé par setup_hook (SUBSYSTEMS dans discord_game_bot.py)
+
+def announce_added_games(guild, games):
+    """Annonce vocale des jeux ajoutés par /ajoutjeu et /ajoutjeux, clips de leurs fiches préparés d'avance."""
+    prewarm_added_games(games)
+    voice_announcer.announce(
+        guild, added_speech(games[0].nom) if len(games) == 1 else f"{len(games)} jeux viennent d'être ajoutés !"
+    )
+
+
+def voice_metrics(out):
+    if tts_cache.available:
+        out.gauge("bot_tts_cache_hits", "Annonces vocales servies par le cache.", tts_cache.hits)
+        out.gauge("bot_tts_cache_misses", "Annonces vocales synthétisées.", tts_cache.misses)
+        out.gauge("bot_tts_cache_bytes", "Taille du cache des annonces vocales.", tts_cache.size)
+        out.gauge("bot_tts_cache_evictions", "Clips retirés du cache des annonces vocales.", tts_cache.evictions)
+        out.summary("bot_tts_synthesis_seconds", "Durée des synthèses d'annonces vocales.",
+                    {"all": tts_cache.synth_time}, lambda key: f'synthesizer="{tts_cache.synthesizer.name}"')
+    if voice_listener.available:
+        voice = voice_listener.stats()
+        out.gauge("bot_voice_rtf", "Temps de calcul / durée d'audio de la reconnaissance vocale.", f"{voice['rtf']:.4f}")
+        out.gauge("bot_voice_speakers", "Locuteurs actifs dans les salons écoutés.", voice["speakers"])
+        out.gauge("bot_voice_audio_seconds", "Audio passé à la reconnaissance vocale.", f"{voice['audio_seconds']:.1f}")
+        out.gauge("bot_voice_queue_lag_p95_seconds", "Attente de l'audio avant reconnaissance (p95).",
+                  f"{voice['queue_lag_p95']:.4f}")
+
+
+def voice_stats():
+    if not voice_listener.available:
+        return None
+    voice = voice_listener.stats()
+    return "Écoute vocale", (
+        f"RTF {voice['rtf']:.2f} sur {voice['audio_seconds']:.0f} s de parole "
+        f"({voice['speech_ratio']:.0%} de l'audio reçu), "
+        f"{voice['speakers']} locuteur(s) actif(s), attente p95 {voice['queue_lag_p95'] * 1000:.0f} ms — "
+        f"capacité estimée ≈ {voice['capacity']} locuteurs simultanés, {voice['recognized']} commande(s) reconnue(s)"
+    )
+
+
+async def setup(bot):
+    for command in (ecoute, stopecoute, lire):
+        bot.tree.add_command(command)
+    games_added_listeners["voice"] = announce_added_games
+    metrics.collectors["voice"] = voice_metrics
+    stats_fields["voice"] = voice_stats
+    if VOICE_TTS:
+        await tts_cache.start()
+